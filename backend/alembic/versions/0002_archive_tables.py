@@ -0,0 +1,66 @@
+"""ticket and chat archive tables partitioned by month
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Indexes used by the retention job to find rows to move
+    op.create_index("ix_tickets_status_updated_at", "tickets", ["status", "updated_at"])
+    op.create_index("ix_chat_messages_created_at", "chat_messages", ["created_at"])
+
+    # Archive tables are range-partitioned by created_at; monthly partitions
+    # are created on demand by app.core.retention. The partition key must be
+    # part of the primary key.
+    op.execute("""
+        CREATE TABLE tickets_archive (
+            id INTEGER NOT NULL,
+            client_name VARCHAR NOT NULL,
+            client_email VARCHAR NOT NULL,
+            client_phone VARCHAR NOT NULL,
+            event_summary TEXT NOT NULL,
+            urgency_level VARCHAR,
+            status VARCHAR,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE,
+            archived_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE TABLE tickets_archive_default PARTITION OF tickets_archive DEFAULT")
+    op.execute("CREATE INDEX ix_tickets_archive_created_at ON tickets_archive (created_at)")
+
+    op.execute("""
+        CREATE TABLE chat_messages_archive (
+            id INTEGER NOT NULL,
+            message TEXT NOT NULL,
+            user_id INTEGER,
+            is_from_admin BOOLEAN NOT NULL,
+            status VARCHAR NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            archived_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE TABLE chat_messages_archive_default PARTITION OF chat_messages_archive DEFAULT")
+    op.execute("CREATE INDEX ix_chat_messages_archive_user_id ON chat_messages_archive (user_id, created_at)")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE chat_messages_archive")
+    op.execute("DROP TABLE tickets_archive")
+    op.drop_index("ix_chat_messages_created_at", table_name="chat_messages")
+    op.drop_index("ix_tickets_status_updated_at", table_name="tickets")
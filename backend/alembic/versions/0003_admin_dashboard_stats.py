@@ -0,0 +1,61 @@
+"""admin dashboard materialized view
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Recent-items lookups on the dashboard are index scans
+    op.create_index("ix_tickets_created_at", "tickets", ["created_at"])
+    # Keeps the unread aggregate small - only unread client messages are indexed
+    op.execute("""
+        CREATE INDEX ix_chat_messages_unread ON chat_messages (user_id)
+        WHERE status = 'sent' AND is_from_admin = false
+    """)
+
+    op.execute("""
+        CREATE MATERIALIZED VIEW admin_dashboard_stats AS
+        SELECT metric, key, value, now() AS refreshed_at FROM (
+            SELECT 'ticket_status' AS metric, COALESCE(status, '') AS key, count(*) AS value
+            FROM tickets GROUP BY status
+            UNION ALL
+            SELECT 'ticket_urgency', COALESCE(urgency_level, ''), count(*)
+            FROM tickets GROUP BY urgency_level
+            UNION ALL
+            SELECT 'chat_unread', 'messages', count(*)
+            FROM chat_messages WHERE status = 'sent' AND is_from_admin = false
+            UNION ALL
+            SELECT 'chat_unread', 'conversations', count(DISTINCT user_id)
+            FROM chat_messages WHERE status = 'sent' AND is_from_admin = false
+            UNION ALL
+            SELECT 'articles_published', language, count(*) FILTER (WHERE is_published)
+            FROM articles GROUP BY language
+            UNION ALL
+            SELECT 'articles_draft', language, count(*) FILTER (WHERE NOT is_published)
+            FROM articles GROUP BY language
+            UNION ALL
+            SELECT 'clients', 'total', count(*)
+            FROM users WHERE role = 'client'
+        ) stats
+    """)
+    # Required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute("CREATE UNIQUE INDEX ix_admin_dashboard_stats_metric_key ON admin_dashboard_stats (metric, key)")
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW admin_dashboard_stats")
+    op.execute("DROP INDEX ix_chat_messages_unread")
+    op.drop_index("ix_tickets_created_at", table_name="tickets")
@@ -0,0 +1,94 @@
+"""chat conversations
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 13:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "conversations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("client_user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("message_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_message_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_conversations_client_user_id", "conversations", ["client_user_id"], unique=True)
+    op.create_index("ix_conversations_last_message_at", "conversations", ["last_message_at"])
+
+    op.add_column(
+        "chat_messages",
+        sa.Column("conversation_id", sa.Integer(), sa.ForeignKey("conversations.id", ondelete="CASCADE"), nullable=True),
+    )
+    op.add_column("chat_messages_archive", sa.Column("conversation_id", sa.Integer(), nullable=True))
+
+    # Backfill: one conversation per client who has written
+    op.execute("""
+        INSERT INTO conversations (client_user_id, created_at)
+        SELECT m.user_id, min(m.created_at)
+        FROM chat_messages m
+        JOIN users u ON u.id = m.user_id
+        WHERE m.is_from_admin = false AND u.role = 'client'
+        GROUP BY m.user_id
+    """)
+    op.execute("""
+        UPDATE chat_messages m SET conversation_id = c.id
+        FROM conversations c
+        WHERE m.is_from_admin = false AND c.client_user_id = m.user_id
+    """)
+    # Admin replies never recorded a recipient; attribute each one to the
+    # conversation of the latest client message that precedes it
+    op.execute("""
+        UPDATE chat_messages m SET conversation_id = (
+            SELECT p.conversation_id FROM chat_messages p
+            WHERE p.is_from_admin = false
+              AND p.conversation_id IS NOT NULL
+              AND (p.created_at, p.id) <= (m.created_at, m.id)
+            ORDER BY p.created_at DESC, p.id DESC
+            LIMIT 1
+        )
+        WHERE m.is_from_admin = true
+    """)
+    op.execute("""
+        UPDATE conversations c SET
+            message_count = s.message_count,
+            last_message_at = s.last_message_at
+        FROM (
+            SELECT conversation_id, count(*) AS message_count, max(created_at) AS last_message_at
+            FROM chat_messages
+            WHERE conversation_id IS NOT NULL
+            GROUP BY conversation_id
+        ) s
+        WHERE s.conversation_id = c.id
+    """)
+
+    op.create_index(
+        "ix_chat_messages_conversation_created",
+        "chat_messages",
+        ["conversation_id", "created_at", "id"],
+    )
+    op.execute(
+        "CREATE INDEX ix_chat_messages_archive_conversation ON chat_messages_archive (conversation_id, created_at, id)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX ix_chat_messages_archive_conversation")
+    op.drop_index("ix_chat_messages_conversation_created", table_name="chat_messages")
+    op.drop_column("chat_messages_archive", "conversation_id")
+    op.drop_column("chat_messages", "conversation_id")
+    op.drop_table("conversations")
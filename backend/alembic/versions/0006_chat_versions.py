@@ -0,0 +1,54 @@
+"""chat change versions for delta sync
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("conversations", sa.Column("version", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("chat_messages", sa.Column("version", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("chat_messages_archive", sa.Column("version", sa.Integer(), nullable=False, server_default="0"))
+
+    # Existing messages get consecutive versions in id order within their conversation
+    op.execute("""
+        UPDATE chat_messages m SET version = v.version
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY conversation_id ORDER BY id) AS version
+            FROM chat_messages
+            WHERE conversation_id IS NOT NULL
+        ) v
+        WHERE v.id = m.id
+    """)
+    op.execute("""
+        UPDATE conversations c SET version = s.version
+        FROM (
+            SELECT conversation_id, max(version) AS version
+            FROM chat_messages
+            WHERE conversation_id IS NOT NULL
+            GROUP BY conversation_id
+        ) s
+        WHERE s.conversation_id = c.id
+    """)
+
+    op.create_index("ix_chat_messages_conversation_version", "chat_messages", ["conversation_id", "version"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chat_messages_conversation_version", table_name="chat_messages")
+    op.drop_column("chat_messages_archive", "version")
+    op.drop_column("chat_messages", "version")
+    op.drop_column("conversations", "version")
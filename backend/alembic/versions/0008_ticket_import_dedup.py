@@ -0,0 +1,30 @@
+"""ticket import duplicate lookup indexes
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 16:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Bulk import skips rows whose client_email + created_at (+ summary) already exist
+    op.create_index("ix_tickets_client_email_created_at", "tickets", ["client_email", "created_at"])
+    # Partitioned parent - Postgres creates the index on every partition
+    op.create_index("ix_tickets_archive_client_email_created_at", "tickets_archive", ["client_email", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tickets_archive_client_email_created_at", table_name="tickets_archive")
+    op.drop_index("ix_tickets_client_email_created_at", table_name="tickets")
@@ -0,0 +1,31 @@
+"""ticket triage suggestions
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 17:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable, no default - existing rows are filled by scripts/reclassify_tickets.py
+    for table in ("tickets", "tickets_archive"):
+        op.add_column(table, sa.Column("suggested_urgency", sa.String(), nullable=True))
+        op.add_column(table, sa.Column("category", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    for table in ("tickets_archive", "tickets"):
+        op.drop_column(table, "category")
+        op.drop_column(table, "suggested_urgency")
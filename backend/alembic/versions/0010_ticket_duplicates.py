@@ -0,0 +1,36 @@
+"""ticket near-duplicate links
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 18:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # No foreign key - the original may move to tickets_archive
+    op.add_column("tickets", sa.Column("duplicate_of_id", sa.Integer(), nullable=True))
+    op.add_column("tickets_archive", sa.Column("duplicate_of_id", sa.Integer(), nullable=True))
+    op.create_index(
+        "ix_tickets_duplicate_of_id",
+        "tickets",
+        ["duplicate_of_id"],
+        postgresql_where=sa.text("duplicate_of_id IS NOT NULL")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tickets_duplicate_of_id", table_name="tickets")
+    op.drop_column("tickets_archive", "duplicate_of_id")
+    op.drop_column("tickets", "duplicate_of_id")
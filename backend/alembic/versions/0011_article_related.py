@@ -0,0 +1,37 @@
+"""precomputed related articles
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 19:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled by scripts/rebuild_related_articles.py, then kept current on article writes
+    op.create_table(
+        "article_related",
+        sa.Column("article_id", sa.Integer(), sa.ForeignKey("articles.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("rank", sa.SmallInteger(), nullable=False),
+        # No foreign key - rows pointing at a deleted article are replaced when its neighbours are recomputed
+        sa.Column("related_id", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("article_id", "rank"),
+    )
+    op.create_index("ix_article_related_related_id", "article_related", ["related_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_article_related_related_id", table_name="article_related")
+    op.drop_table("article_related")
@@ -0,0 +1,111 @@
+"""client registry linked from tickets and users
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 20:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0012"
+down_revision: Union[str, None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Same rules as app.core.clients.normalize_email / normalize_phone, with the
+# default CLIENT_PHONE_COUNTRY_CODE (972)
+def _email(column: str) -> str:
+    return f"lower(btrim({column}))"
+
+
+def _phone(column: str) -> str:
+    digits = f"regexp_replace({column}, '[^0-9]', '', 'g')"
+    international = f"""
+        CASE
+            WHEN btrim({column}) LIKE '+%' THEN {digits}
+            WHEN {digits} LIKE '00%' THEN substr({digits}, 3)
+            WHEN {digits} LIKE '0%' THEN '972' || substr({digits}, 2)
+            ELSE {digits}
+        END
+    """
+    return f"""
+        CASE WHEN length({international}) BETWEEN 8 AND 15 THEN '+' || {international} END
+    """
+
+
+def upgrade() -> None:
+    op.create_table(
+        "clients",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("email_normalized", sa.String(), nullable=False),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("phone_e164", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.add_column("tickets", sa.Column("client_id", sa.Integer(), sa.ForeignKey("clients.id"), nullable=True))
+    # No foreign key on the partitioned archive, as for its other columns
+    op.add_column("tickets_archive", sa.Column("client_id", sa.Integer(), nullable=True))
+    op.add_column("users", sa.Column("client_id", sa.Integer(), sa.ForeignKey("clients.id"), nullable=True))
+
+    # One client per normalized email across tickets, archived tickets and
+    # client accounts. Name and phone come from the latest row that has a
+    # plausible phone, created_at from the earliest row.
+    op.execute(f"""
+        INSERT INTO clients (name, email, email_normalized, phone, phone_e164, created_at, updated_at)
+        SELECT DISTINCT ON (email_normalized)
+            name, email, email_normalized, phone, phone_e164,
+            min(created_at) OVER (PARTITION BY email_normalized),
+            max(created_at) OVER (PARTITION BY email_normalized)
+        FROM (
+            SELECT client_name AS name, btrim(client_email) AS email, {_email("client_email")} AS email_normalized,
+                   client_phone AS phone, {_phone("client_phone")} AS phone_e164, created_at
+            FROM tickets
+            UNION ALL
+            SELECT client_name, btrim(client_email), {_email("client_email")},
+                   client_phone, {_phone("client_phone")}, created_at
+            FROM tickets_archive
+            UNION ALL
+            SELECT full_name, btrim(email), {_email("email")}, NULL, NULL, created_at
+            FROM users
+            WHERE role = 'client'
+        ) AS seen
+        ORDER BY email_normalized, phone_e164 IS NULL, created_at DESC
+    """)
+    op.execute(f"""
+        UPDATE tickets t SET client_id = c.id
+        FROM clients c WHERE c.email_normalized = {_email("t.client_email")}
+    """)
+    op.execute(f"""
+        UPDATE tickets_archive t SET client_id = c.id
+        FROM clients c WHERE c.email_normalized = {_email("t.client_email")}
+    """)
+    op.execute(f"""
+        UPDATE users u SET client_id = c.id
+        FROM clients c WHERE c.email_normalized = {_email("u.email")} AND u.role = 'client'
+    """)
+
+    # Built after the backfill - cheaper than maintaining them row by row
+    op.create_index("ix_clients_email_normalized", "clients", ["email_normalized"], unique=True)
+    op.create_index("ix_clients_phone_e164", "clients", ["phone_e164"])
+    op.create_index("ix_tickets_client_id_created_at", "tickets", ["client_id", "created_at"])
+    op.create_index("ix_tickets_archive_client_id_created_at", "tickets_archive", ["client_id", "created_at"])
+    op.create_index("ix_users_client_id", "users", ["client_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_client_id", table_name="users")
+    op.drop_index("ix_tickets_archive_client_id_created_at", table_name="tickets_archive")
+    op.drop_index("ix_tickets_client_id_created_at", table_name="tickets")
+    op.drop_column("users", "client_id")
+    op.drop_column("tickets_archive", "client_id")
+    op.drop_column("tickets", "client_id")
+    op.drop_table("clients")
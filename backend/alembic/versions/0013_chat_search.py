@@ -0,0 +1,46 @@
+"""full-text search over chat messages
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 21:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0013"
+down_revision: Union[str, None] = "0012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # GIN operator classes for plain columns, so conversation_id can lead the index
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+
+    # A stored generated column rewrites chat_messages once - on a large table
+    # run this in a maintenance window
+    op.execute("""
+        ALTER TABLE chat_messages
+        ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple', message)) STORED
+    """)
+
+    # Built without blocking chat writes
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_chat_messages_search",
+            "chat_messages",
+            ["conversation_id", "search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chat_messages_search", table_name="chat_messages")
+    op.drop_column("chat_messages", "search_vector")
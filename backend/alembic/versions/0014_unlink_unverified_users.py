@@ -0,0 +1,30 @@
+"""unlink user accounts from clients until an admin confirms them
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-19 22:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0014"
+down_revision: Union[str, None] = "0013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 0012 linked accounts by registration email, which nobody verified.
+    # Admins re-link them with PUT /admin/clients/{id}/users/{user_id}
+    op.execute("UPDATE users SET client_id = NULL WHERE client_id IS NOT NULL")
+
+
+def downgrade() -> None:
+    op.execute("""
+        UPDATE users u SET client_id = c.id
+        FROM clients c WHERE c.email_normalized = lower(btrim(u.email)) AND u.role = 'client'
+    """)
@@ -0,0 +1,91 @@
+"""conversation ids for chat messages archived before 0005
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-19 23:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0015"
+down_revision: Union[str, None] = "0014"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 0005 added chat_messages_archive.conversation_id but only backfilled
+    # the hot table, so messages archived earlier were invisible to their
+    # conversation. Same steps as 0005, for the archive.
+
+    # Clients whose messages have all been archived have no conversation yet
+    op.execute("""
+        INSERT INTO conversations (client_user_id, created_at)
+        SELECT m.user_id, min(m.created_at)
+        FROM chat_messages_archive m
+        JOIN users u ON u.id = m.user_id
+        WHERE m.is_from_admin = false AND u.role = 'client' AND m.conversation_id IS NULL
+        GROUP BY m.user_id
+        ON CONFLICT (client_user_id) DO NOTHING
+    """)
+    # Each UPDATE adds the messages it attributes to message_count (which
+    # counts archived messages too) and moves created_at / last_message_at
+    op.execute("""
+        WITH filled AS (
+            UPDATE chat_messages_archive m SET conversation_id = c.id
+            FROM conversations c
+            WHERE m.is_from_admin = false AND m.conversation_id IS NULL AND c.client_user_id = m.user_id
+            RETURNING m.conversation_id, m.created_at
+        )
+        UPDATE conversations c SET
+            message_count = c.message_count + s.message_count,
+            created_at = least(c.created_at, s.first_message_at),
+            last_message_at = greatest(c.last_message_at, s.last_message_at)
+        FROM (
+            SELECT conversation_id, count(*) AS message_count,
+                   min(created_at) AS first_message_at, max(created_at) AS last_message_at
+            FROM filled
+            GROUP BY conversation_id
+        ) s
+        WHERE s.conversation_id = c.id
+    """)
+    # Admin replies go to the conversation of the latest client message that
+    # precedes them, archived or not
+    op.execute("""
+        WITH filled AS (
+            UPDATE chat_messages_archive m SET conversation_id = (
+                SELECT p.conversation_id
+                FROM (
+                    SELECT conversation_id, created_at, id FROM chat_messages_archive
+                    WHERE is_from_admin = false AND conversation_id IS NOT NULL
+                    UNION ALL
+                    SELECT conversation_id, created_at, id FROM chat_messages
+                    WHERE is_from_admin = false AND conversation_id IS NOT NULL
+                ) p
+                WHERE (p.created_at, p.id) <= (m.created_at, m.id)
+                ORDER BY p.created_at DESC, p.id DESC
+                LIMIT 1
+            )
+            WHERE m.is_from_admin = true AND m.conversation_id IS NULL
+            RETURNING m.conversation_id, m.created_at
+        )
+        UPDATE conversations c SET
+            message_count = c.message_count + s.message_count,
+            last_message_at = greatest(c.last_message_at, s.last_message_at)
+        FROM (
+            SELECT conversation_id, count(*) AS message_count, max(created_at) AS last_message_at
+            FROM filled
+            WHERE conversation_id IS NOT NULL
+            GROUP BY conversation_id
+        ) s
+        WHERE s.conversation_id = c.id
+    """)
+
+
+def downgrade() -> None:
+    # Data only - the backfilled ids are correct under 0005 as well
+    pass
@@ -0,0 +1,251 @@
+"""Admission control - per-route-class concurrency limits and load shedding.
+
+Every request is put in a route class by method and path. Each class has its
+own concurrency limit, so a flood of one kind of request cannot take the
+slots of another:
+    
+    admin   /admin, /tickets/admin, /blog/admin           priority
+    chat    /chat                                         priority
+    auth    POST /auth/login, /auth/register (bcrypt)
+    intake  POST /tickets/, POST /attachments (SMTP, Turnstile, uploads)
+    public  everything else (blog, feeds, /auth/me, downloads)
+
+A request waits for a slot in its class for up to the queue timeout, then
+gets 503 with Retry-After. auth, intake and public are shed earlier still:
+they are refused on arrival while the DB pool is exhausted, or while admin
+or chat requests are queueing for a slot and their recent latency (over at
+least MIN_LATENCY_SAMPLES requests) is above ADMISSION_LATENCY_TARGET_MS.
+A single slow admin request is not contention and sheds nothing. The
+capacity that is left goes to the priority classes. Retry-After is the time
+the class needs to drain its current backlog at its observed latency.
+
+Probes, the SSE event stream and chat long-polls (GET /chat/messages with
+since and wait > 0) bypass admission - they hold a connection open without
+doing work. Requests that are slow by nature - bulk imports and bulk
+updates, chat search, include_archived listings - are admitted but left out
+of the latency signal.
+"""
+import asyncio
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+from fastapi.responses import ORJSONResponse
+from app.core.config import settings
+from app.core.database import engine
+from app.core.logs import is_long_poll
+
+logger = logging.getLogger(__name__)
+
+EXEMPT_PATHS = {"/health", "/ready", "/tickets/admin/events"}
+PRIORITY_PREFIXES = (("/admin", "admin"), ("/tickets/admin", "admin"), ("/blog/admin", "admin"), ("/chat", "chat"))
+AUTH_PATHS = {"/auth/login", "/auth/register", "/auth/create-admin"}
+INTAKE_PREFIXES = ("/tickets", "/attachments")
+UNTIMED_PATHS = {
+    "/tickets/admin/import",
+    "/tickets/admin/bulk/status",
+    "/tickets/admin/bulk/urgency",
+    "/tickets/admin/bulk/delete",
+    "/chat/search",
+}
+
+# Latency is an exponentially weighted moving average; once no request has
+# finished for SIGNAL_TTL_SECONDS the average starts over, so shedding stops
+# once the spike is over and an old value never weighs on a new one
+LATENCY_SMOOTHING = 0.2
+SIGNAL_TTL_SECONDS = 5
+MIN_LATENCY_SAMPLES = 5
+MAX_QUEUE_FACTOR = 4
+MAX_RETRY_AFTER_SECONDS = 30
+
+@dataclass
+class RouteClass:
+    name: str
+    limit: int
+    queue_timeout: float
+    priority: bool
+    in_flight: int = 0
+    waiting: int = 0
+    latency_ms: float = 0.0
+    latency_at: float = 0.0
+    samples: int = 0
+    admitted: int = 0
+    shed: int = 0
+    semaphore: asyncio.Semaphore = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        self.semaphore = asyncio.Semaphore(self.limit)
+    
+    def _expired(self) -> bool:
+        return time.monotonic() - self.latency_at > SIGNAL_TTL_SECONDS
+    
+    def observe(self, duration_ms: float) -> None:
+        if self.samples and not self._expired():
+            self.latency_ms += LATENCY_SMOOTHING * (duration_ms - self.latency_ms)
+            self.samples += 1
+        else:
+            self.latency_ms = duration_ms
+            self.samples = 1
+        self.latency_at = time.monotonic()
+    
+    def recent_latency_ms(self) -> float:
+        if self._expired():
+            return 0.0
+        return self.latency_ms
+    
+    def contended(self) -> bool:
+        """Requests are queueing for a slot, or every slot is taken"""
+        return self.waiting > 0 or self.semaphore.locked()
+    
+    def slow(self) -> bool:
+        """Recent latency over the target, measured on enough requests to mean something"""
+        return (
+            not self._expired()
+            and self.samples >= MIN_LATENCY_SAMPLES
+            and self.latency_ms > settings.ADMISSION_LATENCY_TARGET_MS
+        )
+    
+    def retry_after(self) -> int:
+        """Seconds to drain the current backlog at the observed latency"""
+        backlog = (self.in_flight + self.waiting) / self.limit
+        seconds = math.ceil(backlog * self.recent_latency_ms() / 1000)
+        return min(max(seconds, 1), MAX_RETRY_AFTER_SECONDS)
+
+def default_classes() -> Dict[str, RouteClass]:
+    priority_timeout = settings.ADMISSION_PRIORITY_QUEUE_TIMEOUT_MS / 1000
+    timeout = settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000
+    return {
+        route_class.name: route_class
+        for route_class in (
+            RouteClass("admin", settings.ADMISSION_ADMIN_CONCURRENCY, priority_timeout, priority=True),
+            RouteClass("chat", settings.ADMISSION_CHAT_CONCURRENCY, priority_timeout, priority=True),
+            RouteClass("auth", settings.ADMISSION_AUTH_CONCURRENCY, timeout, priority=False),
+            RouteClass("intake", settings.ADMISSION_INTAKE_CONCURRENCY, timeout, priority=False),
+            RouteClass("public", settings.ADMISSION_PUBLIC_CONCURRENCY, timeout, priority=False),
+        )
+    }
+
+class AdmissionController:
+    def __init__(self, classes: Optional[Dict[str, RouteClass]] = None, pool=None, pool_capacity: Optional[int] = None):
+        self.classes = classes or default_classes()
+        self.pool = pool if pool is not None else engine.pool
+        self.pool_capacity = pool_capacity or settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    
+    def classify(self, scope) -> Optional[RouteClass]:
+        """The request's route class, or None when it bypasses admission"""
+        path = scope["path"]
+        if path in EXEMPT_PATHS or is_long_poll(scope):
+            return None
+        for prefix, name in PRIORITY_PREFIXES:
+            if path.startswith(prefix):
+                return self.classes[name]
+        if scope["method"] == "POST":
+            if path in AUTH_PATHS:
+                return self.classes["auth"]
+            if path.startswith(INTAKE_PREFIXES):
+                return self.classes["intake"]
+        return self.classes["public"]
+    
+    def overload_reason(self) -> Optional[str]:
+        """Why non-priority requests are being shed right now, if they are"""
+        checkedout = getattr(self.pool, "checkedout", None)
+        if checkedout is not None and checkedout() >= self.pool_capacity:
+            return "db_pool"
+        if any(c.priority and c.contended() and c.slow() for c in self.classes.values()):
+            return "latency"
+        return None
+    
+    async def acquire(self, route_class: RouteClass) -> Optional[str]:
+        """Take a slot; returns None when admitted, otherwise why it was shed"""
+        if not route_class.priority:
+            reason = self.overload_reason()
+            if reason:
+                return reason
+        
+        if route_class.semaphore.locked():
+            if route_class.waiting >= route_class.limit * MAX_QUEUE_FACTOR:
+                return "queue_full"
+            route_class.waiting += 1
+            try:
+                await asyncio.wait_for(route_class.semaphore.acquire(), route_class.queue_timeout)
+            except asyncio.TimeoutError:
+                return "queue_timeout"
+            finally:
+                route_class.waiting -= 1
+        else:
+            await route_class.semaphore.acquire()
+        
+        route_class.in_flight += 1
+        route_class.admitted += 1
+        return None
+    
+    def release(self, route_class: RouteClass, duration_ms: Optional[float]) -> None:
+        route_class.in_flight -= 1
+        route_class.semaphore.release()
+        if duration_ms is not None:
+            route_class.observe(duration_ms)
+    
+    def snapshot(self) -> dict:
+        return {
+            name: {
+                "in_flight": c.in_flight,
+                "waiting": c.waiting,
+                "latency_ms": round(c.recent_latency_ms(), 1),
+                "admitted": c.admitted,
+                "shed": c.shed,
+            }
+            for name, c in self.classes.items()
+        }
+
+def untimed(scope) -> bool:
+    """Requests left out of the latency signal because they are slow by nature"""
+    if scope["path"] in UNTIMED_PATHS:
+        return True
+    archived = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("include_archived", [""])
+    return archived[0].lower() in ("true", "1", "yes", "on")
+
+admission = AdmissionController()
+
+class AdmissionControlMiddleware:
+    """Pure ASGI middleware - admits, queues or sheds each request by route class"""
+    
+    def __init__(self, app, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller or admission
+    
+    async def __call__(self, scope, receive, send):
+        route_class = self.controller.classify(scope) if scope["type"] == "http" else None
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+        
+        reason = await self.controller.acquire(route_class)
+        if reason:
+            route_class.shed += 1
+            retry_after = route_class.retry_after()
+            logger.warning(
+                "Request shed",
+                extra={
+                    "route_class": route_class.name,
+                    "reason": reason,
+                    "path": scope["path"],
+                    "retry_after": retry_after,
+                    "sample_rate": 0.01,
+                }
+            )
+            response = ORJSONResponse(
+                {"detail": "Server is busy, please retry shortly"},
+                status_code=503,
+                headers={"Retry-After": str(retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            self.controller.release(route_class, None if untimed(scope) else duration_ms)
@@ -0,0 +1,222 @@
+"""Attachment storage for tickets and chat messages.
+
+Uploads are parsed straight off the request stream with python-multipart -
+no Starlette form parsing, no spooled copies. Each file part is written to a
+temp file chunk by chunk while its sha256 is computed, so memory stays flat
+whatever the file size. Finished files are stored once under
+ATTACHMENTS_DIR/<ab>/<cd>/<sha256>; identical uploads share one blob.
+"""
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterable, List, Optional
+from fastapi import HTTPException, Request, status
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+
+UPLOAD_FIELD = b"file"
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+@dataclass
+class StoredFile:
+    sha256: str
+    size: int
+    filename: str
+    content_type: str
+
+@dataclass
+class _Part:
+    file: BinaryIO
+    path: str
+    hasher: "hashlib._Hash"
+    filename: str
+    content_type: str
+    size: int = 0
+
+def _root() -> Path:
+    path = Path(settings.ATTACHMENTS_DIR)
+    (path / "tmp").mkdir(parents=True, exist_ok=True)
+    return path
+
+def blob_path(sha256: str) -> Path:
+    return Path(settings.ATTACHMENTS_DIR) / sha256[:2] / sha256[2:4] / sha256
+
+def clean_filename(raw: bytes) -> str:
+    """Basename only - browsers may send full client paths"""
+    name = raw.decode("utf-8", "replace").replace("\\", "/").rsplit("/", 1)[-1]
+    name = "".join(ch for ch in name if ch.isprintable()).strip()
+    return name[:255] or "attachment"
+
+class _UploadSink:
+    """MultipartParser callbacks - one temp file and running hash per file part.
+    Runs in a worker thread (parser.write), so blocking file I/O is fine here."""
+    
+    def __init__(self, max_bytes: int, max_files: int):
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.files: List[StoredFile] = []
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._part: Optional[_Part] = None
+    
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+    
+    def on_part_begin(self) -> None:
+        self._headers = {}
+    
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+    
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+    
+    def on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+    
+    def on_headers_finished(self) -> None:
+        _, params = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if params.get(b"name") != UPLOAD_FIELD or b"filename" not in params:
+            return  # Not a file part - ignored
+        
+        if len(self.files) >= self.max_files:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"At most {self.max_files} files per upload"
+            )
+        
+        content_type = self._headers.get(b"content-type", b"").decode("latin-1").strip()
+        fd, path = tempfile.mkstemp(dir=_root() / "tmp")
+        self._part = _Part(
+            file=os.fdopen(fd, "wb"),
+            path=path,
+            hasher=hashlib.sha256(),
+            filename=clean_filename(params[b"filename"]),
+            content_type=content_type or DEFAULT_CONTENT_TYPE
+        )
+    
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        part = self._part
+        if part is None:
+            return
+        
+        chunk = memoryview(data)[start:end]
+        part.size += len(chunk)
+        if part.size > self.max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Attachments are limited to {settings.ATTACHMENT_MAX_MB} MB"
+            )
+        part.hasher.update(chunk)
+        part.file.write(chunk)
+    
+    def on_part_end(self) -> None:
+        part = self._part
+        if part is None:
+            return
+        self._part = None
+        
+        part.file.flush()
+        os.fsync(part.file.fileno())
+        part.file.close()
+        
+        digest = part.hasher.hexdigest()
+        dest = blob_path(digest)
+        if dest.exists():
+            os.unlink(part.path)  # Already stored - deduplicated
+        else:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(part.path, dest)
+        
+        self.files.append(StoredFile(
+            sha256=digest,
+            size=part.size,
+            filename=part.filename,
+            content_type=part.content_type
+        ))
+    
+    def discard(self) -> None:
+        """Drop the temp file of a part that did not finish"""
+        part = self._part
+        self._part = None
+        if part is not None:
+            part.file.close()
+            try:
+                os.unlink(part.path)
+            except FileNotFoundError:
+                pass
+
+async def receive_upload(request: Request) -> List[StoredFile]:
+    """Stream the multipart body of request into blob storage.
+    
+    Every part named "file" is stored; other form fields are ignored. Blobs of
+    a rejected request that were already complete stay on disk - they are
+    content-addressed, so a later identical upload simply reuses them.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a multipart/form-data upload"
+        )
+    
+    sink = _UploadSink(settings.ATTACHMENT_MAX_MB * 1024 * 1024, settings.ATTACHMENT_MAX_FILES)
+    parser = MultipartParser(boundary, sink.callbacks())
+    
+    try:
+        async for chunk in request.stream():
+            await run_in_threadpool(parser.write, chunk)
+        await run_in_threadpool(parser.finalize)
+    except MultipartParseError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Malformed multipart body"
+        )
+    finally:
+        sink.discard()
+    
+    if not sink.files:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No file uploaded"
+        )
+    
+    return sink.files
+
+async def lock_blobs(db: AsyncSession, digests: Iterable[str]) -> None:
+    """Serialize attachment row writes per blob until the transaction ends.
+    
+    Deleting the last row of a blob and unlinking it, and adding a row for an
+    upload that reused the blob, each happen under this lock - so an unlink
+    never races a new row. Taken in sorted order, so two uploads cannot deadlock.
+    """
+    for digest in sorted(set(digests)):
+        await db.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"),
+            {"key": int(digest[:15], 16)}
+        )
+
+def remove_blob(sha256: str) -> None:
+    """Delete a blob - callers hold lock_blobs and check that no attachment row still points at it"""
+    try:
+        os.unlink(blob_path(sha256))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,38 @@
+"""Wake-ups for long-polling chat clients.
+
+Waiters on a conversation are woken as soon as a message is sent or marked
+read - directly in the worker that took the write, and through the event bus
+(chat.changed) in every other worker. The caller still re-checks the
+conversation version every few seconds in case the bus missed an event.
+"""
+import asyncio
+from typing import Dict
+
+class ConversationNotifier:
+    def __init__(self):
+        self._events: Dict[int, asyncio.Event] = {}
+        self._waiters: Dict[int, int] = {}
+    
+    def notify(self, conversation_id: int) -> None:
+        # Pop the event so later waiters get a fresh, unset one
+        event = self._events.pop(conversation_id, None)
+        if event is not None:
+            event.set()
+    
+    async def wait(self, conversation_id: int, timeout: float) -> bool:
+        """Wait until notified or timeout; returns True when notified"""
+        event = self._events.setdefault(conversation_id, asyncio.Event())
+        self._waiters[conversation_id] = self._waiters.get(conversation_id, 0) + 1
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiters[conversation_id] -= 1
+            if self._waiters[conversation_id] == 0:
+                del self._waiters[conversation_id]
+                if self._events.get(conversation_id) is event:
+                    del self._events[conversation_id]
+
+notifier = ConversationNotifier()
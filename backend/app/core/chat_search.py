@@ -0,0 +1,224 @@
+"""Full-text search over chat messages (GET /chat/search).
+
+Messages carry a generated tsvector (search_vector) built with the 'simple'
+configuration - no stemming, since one conversation mixes Hebrew, Russian
+and English. A btree_gin index on (conversation_id, search_vector) serves
+searches within one conversation and across all of them. Every query word
+must match, as a prefix ("hear" finds "hearing"), which also catches many
+inflected forms.
+
+Hits are ranked with ts_rank among the newest CHAT_SEARCH_MAX_CANDIDATES
+matching messages, which keeps a page's cost steady as chat_messages grows.
+For a rare word Postgres reads the few matches from the GIN index. For a
+common one it walks the primary key backwards and stops at the bound.
+Older matches are not dropped: once the ranked ones run out, pages go on
+through the rest newest first, each page again a bounded backward walk.
+Pages use a keyset cursor - the newest message id when the search started,
+then (rank, id) of the last ranked hit or the id of the last older one - so
+later pages never use OFFSET and are not shifted by new messages.
+
+Each hit comes with a ts_headline snippet (HTML-escaped, matches in <mark>)
+and up to `context` messages before and after it in its conversation. Those
+are range scans on (conversation_id, created_at, id). Archived messages are
+not searched.
+"""
+import base64
+import re
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, cast, func, or_, select, true, tuple_
+from sqlalchemy.dialects.postgresql import REAL, REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from app.core.config import settings
+from app.core.serialization import columns_for
+from app.models import ChatMessage
+from app.schemas import ChatMessageResponse
+
+SEARCH_CONFIG = "simple"
+WORD = re.compile(r"[^\W_]+")
+MAX_TERMS = 8
+# Shorter words match exactly - a one-letter prefix matches half the table
+MIN_PREFIX_CHARS = 2
+MAX_PAGE_SIZE = 100
+MAX_CONTEXT = 5
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=25, MinWords=8, MaxFragments=2"
+
+RANKED = "r"
+OLDER = "o"
+
+# (snapshot message id, phase, rank, message id) - rank is 0 in the OLDER phase
+Cursor = Tuple[int, str, float, int]
+
+def tsquery_text(q: str) -> Optional[str]:
+    """to_tsquery input requiring every word of q; None when q has no words"""
+    words = WORD.findall(q.casefold())[:MAX_TERMS]
+    if not words:
+        return None
+    return " & ".join(f"{word}:*" if len(word) >= MIN_PREFIX_CHARS else word for word in words)
+
+def encode_cursor(snapshot: int, phase: str, rank: float, message_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{snapshot}:{phase}:{rank!r}:{message_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Cursor:
+    """ValueError when malformed"""
+    try:
+        snapshot, phase, rank, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        if phase not in (RANKED, OLDER):
+            raise ValueError(phase)
+        return int(snapshot), phase, float(rank), int(message_id)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def _html_escaped(column):
+    return func.replace(func.replace(func.replace(column, "&", "&amp;"), "<", "&lt;"), ">", "&gt;")
+
+def _matches(tsquery, conversation_id: Optional[int], snapshot: int, *columns):
+    query = select(*columns).where(
+        ChatMessage.search_vector.op("@@")(tsquery),
+        ChatMessage.id <= snapshot
+    )
+    if conversation_id is not None:
+        query = query.where(ChatMessage.conversation_id == conversation_id)
+    return query
+
+async def _page(db: AsyncSession, page, tsquery, *order_by) -> List[dict]:
+    """Messages of a (id, rank) subquery with their snippets - ts_headline only runs for the page"""
+    result = await db.execute(
+        select(
+            *columns_for(ChatMessage, ChatMessageResponse),
+            page.c.rank,
+            func.ts_headline(
+                cast(SEARCH_CONFIG, REGCONFIG),
+                _html_escaped(ChatMessage.message),
+                tsquery,
+                HEADLINE_OPTIONS
+            ).label("snippet")
+        )
+        .join(page, page.c.id == ChatMessage.id)
+        .order_by(*order_by)
+    )
+    return [dict(row) for row in result.mappings()]
+
+async def _ranked(db: AsyncSession, tsquery, conversation_id, snapshot: int, limit: int, after):
+    """(up to limit + 1 ranked hits after the cursor, oldest candidate id when the cap was reached)"""
+    # Newest matches first - the bound that keeps the cost flat
+    candidates = (
+        _matches(tsquery, conversation_id, snapshot, ChatMessage.id, ChatMessage.search_vector)
+        .order_by(ChatMessage.id.desc())
+        .limit(settings.CHAT_SEARCH_MAX_CANDIDATES)
+        .subquery("candidates")
+    )
+    
+    rank = func.ts_rank(candidates.c.search_vector, tsquery)
+    page = select(candidates.c.id, rank.label("rank"))
+    if after is not None:
+        after_rank = cast(after[0], REAL)
+        page = page.where(or_(rank < after_rank, and_(rank == after_rank, candidates.c.id < after[1])))
+    page = page.order_by(rank.desc(), candidates.c.id.desc()).limit(limit + 1).subquery("page")
+    rows = await _page(db, page, tsquery, page.c.rank.desc(), page.c.id.desc())
+    
+    if len(rows) > limit:
+        return rows, None
+    result = await db.execute(select(func.count(), func.min(candidates.c.id)))
+    count, oldest = result.one()
+    return rows, oldest if count >= settings.CHAT_SEARCH_MAX_CANDIDATES else None
+
+async def _older(db: AsyncSession, tsquery, conversation_id, snapshot: int, limit: int, before_id: int) -> List[dict]:
+    """Up to limit + 1 matches with id below before_id, newest first"""
+    page = (
+        _matches(
+            tsquery, conversation_id, snapshot,
+            ChatMessage.id, func.ts_rank(ChatMessage.search_vector, tsquery).label("rank")
+        )
+        .where(ChatMessage.id < before_id)
+        .order_by(ChatMessage.id.desc())
+        .limit(limit + 1)
+        .subquery("page")
+    )
+    return await _page(db, page, tsquery, page.c.id.desc())
+
+async def search_messages(
+    db: AsyncSession,
+    query_text: str,
+    conversation_id: Optional[int],
+    limit: int,
+    context: int,
+    cursor: Optional[Cursor]
+) -> Tuple[List[dict], Optional[str]]:
+    """(hits, next cursor or None) - query_text comes from tsquery_text()"""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    context = max(0, min(context, MAX_CONTEXT))
+    tsquery = func.to_tsquery(cast(SEARCH_CONFIG, REGCONFIG), query_text)
+    
+    if cursor is None:
+        snapshot = (await db.execute(select(func.max(ChatMessage.id)))).scalar() or 0
+        phase, after = RANKED, None
+    else:
+        snapshot, phase, rank, message_id = cursor
+        after = (rank, message_id)
+    
+    next_cursor = None
+    if phase == RANKED:
+        rows, oldest = await _ranked(db, tsquery, conversation_id, snapshot, limit, after)
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(snapshot, RANKED, rows[-1]["rank"], rows[-1]["id"])
+        elif oldest is not None:
+            # Ranked candidates used up - fill the page from the older matches
+            room = limit - len(rows)
+            older = await _older(db, tsquery, conversation_id, snapshot, room, oldest)
+            rows += older[:room]
+            if len(older) > room:
+                next_cursor = encode_cursor(snapshot, OLDER, 0.0, older[room - 1]["id"] if room else oldest)
+    else:
+        rows = await _older(db, tsquery, conversation_id, snapshot, limit, after[1])
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(snapshot, OLDER, 0.0, rows[-1]["id"])
+    
+    around = await _context(db, [row["id"] for row in rows], context) if context and rows else {}
+    hits = []
+    for row in rows:
+        before, after_messages = around.get(row["id"], ([], []))
+        hits.append({
+            "rank": row.pop("rank"),
+            "snippet": row.pop("snippet"),
+            "message": row,
+            "before": before,
+            "after": after_messages
+        })
+    return hits, next_cursor
+
+async def _context(db: AsyncSession, hit_ids: List[int], context: int) -> Dict[int, Tuple[List[dict], List[dict]]]:
+    """hit id -> (up to context messages before it, oldest first; and after it)"""
+    hit = (
+        select(ChatMessage.id, ChatMessage.conversation_id, ChatMessage.created_at)
+        .where(ChatMessage.id.in_(hit_ids))
+        .subquery("hit")
+    )
+    around = aliased(ChatMessage, name="around")
+    position = tuple_(around.created_at, around.id)
+    hit_position = tuple_(hit.c.created_at, hit.c.id)
+    
+    found: Dict[int, Tuple[List[dict], List[dict]]] = {hit_id: ([], []) for hit_id in hit_ids}
+    for side, condition, order in (
+        (0, position < hit_position, (around.created_at.desc(), around.id.desc())),
+        (1, position > hit_position, (around.created_at.asc(), around.id.asc())),
+    ):
+        neighbours = (
+            select(*columns_for(around, ChatMessageResponse))
+            .where(around.conversation_id == hit.c.conversation_id, condition)
+            .order_by(*order)
+            .limit(context)
+            .lateral("neighbours")
+        )
+        result = await db.execute(
+            select(hit.c.id.label("hit_id"), neighbours).select_from(hit.join(neighbours, true()))
+        )
+        for row in result.mappings():
+            row = dict(row)
+            found[row.pop("hit_id")][side].append(row)
+    
+    for before, _ in found.values():
+        before.reverse()
+    return found
@@ -0,0 +1,83 @@
+"""Client registry - one row per person across tickets and chat accounts.
+
+A client is keyed by a normalized email (trimmed, lower-cased), unique in
+clients. The phone is also kept in E.164 form (phone_e164, indexed but not
+unique - a family may share one number). Tickets and users point at their
+client through client_id, so "everything from this client" is an indexed
+lookup rather than string matching on free-text columns. The free-text
+client_* columns on tickets stay as submitted.
+
+Public writes (ticket intake) never change an existing client - anyone can
+type anyone's email. A user account is linked to its client by an admin
+(PUT /admin/clients/{id}/users/{user_id}), since emails are not verified.
+
+The rules below must stay in step with the SQL in alembic 0012, which
+backfilled existing rows with the same normalization.
+"""
+import re
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models import Client
+
+NON_DIGITS = re.compile(r"[^0-9]")
+
+# E.164 allows at most 15 digits; shorter than 8 is not a reachable number
+E164_MIN_DIGITS = 8
+E164_MAX_DIGITS = 15
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """E.164 ("+972541234567") or None when the number is not plausible.
+
+    "+..." and "00..." are international already. A leading 0 is a national
+    number in CLIENT_PHONE_COUNTRY_CODE. Anything else is taken to include
+    its country code.
+    """
+    if not phone:
+        return None
+    digits = NON_DIGITS.sub("", phone)
+    if phone.strip().startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith("0"):
+        digits = settings.CLIENT_PHONE_COUNTRY_CODE + digits[1:]
+    if not E164_MIN_DIGITS <= len(digits) <= E164_MAX_DIGITS:
+        return None
+    return f"+{digits}"
+
+async def get_or_create_client(
+    db: AsyncSession,
+    email: str,
+    name: Optional[str] = None,
+    phone: Optional[str] = None
+) -> int:
+    """Id of the client with this email, created if new (caller commits).
+
+    name and phone are only stored on a new client - an existing one keeps
+    its details. Safe against concurrent requests for the same email: ON
+    CONFLICT DO NOTHING waits for the other insert, which the lookup then sees.
+    """
+    email_normalized = normalize_email(email)
+    result = await db.execute(
+        insert(Client)
+        .values(
+            name=name,
+            email=email.strip(),
+            email_normalized=email_normalized,
+            phone=phone,
+            phone_e164=normalize_phone(phone)
+        )
+        .on_conflict_do_nothing(index_elements=[Client.email_normalized])
+        .returning(Client.id)
+    )
+    client_id = result.scalar_one_or_none()
+    if client_id is None:
+        result = await db.execute(select(Client.id).where(Client.email_normalized == email_normalized))
+        client_id = result.scalar_one()
+    return client_id
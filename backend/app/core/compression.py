@@ -0,0 +1,20 @@
+"""Response compression.
+
+GZipMiddleware for everything except paths whose bodies must go out
+byte-for-byte: attachment downloads rely on Range requests, sendfile and a
+content-hash ETag, none of which survive on-the-fly gzip.
+"""
+from typing import Tuple
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    def __init__(self, app: ASGIApp, exclude_prefixes: Tuple[str, ...] = (), **kwargs) -> None:
+        super().__init__(app, **kwargs)
+        self.exclude_prefixes = exclude_prefixes
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
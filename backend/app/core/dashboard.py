@@ -0,0 +1,43 @@
+"""Admin dashboard counters.
+
+Counts come from the admin_dashboard_stats materialized view (alembic 0003),
+refreshed in the background so the dashboard endpoint never runs COUNT(*)
+over tickets or chat_messages.
+"""
+import asyncio
+import logging
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key for pg_try_advisory_xact_lock - only one worker refreshes at a time
+DASHBOARD_REFRESH_LOCK_ID = 280001
+
+async def refresh_dashboard_stats() -> bool:
+    """Refresh the materialized view unless another worker is already doing it"""
+    async with AsyncSessionLocal() as db:
+        # Transaction-scoped - released by the commit or rollback on this same
+        # connection, so it cannot leak to a pooled connection
+        result = await db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:lock_id)"),
+            {"lock_id": DASHBOARD_REFRESH_LOCK_ID}
+        )
+        if not result.scalar():
+            await db.rollback()
+            return False
+        
+        await db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY admin_dashboard_stats"))
+        await db.commit()
+    
+    return True
+
+async def dashboard_refresher() -> None:
+    """Background loop started from the app lifespan"""
+    while True:
+        try:
+            await refresh_dashboard_stats()
+        except Exception as e:
+            logger.warning("Dashboard stats refresh failed", extra={"error": str(e)})
+        await asyncio.sleep(settings.DASHBOARD_REFRESH_SECONDS)
@@ -0,0 +1,349 @@
+"""Near-duplicate ticket detection - MinHash signatures in LSH buckets.
+
+An event summary is normalized (app.core.triage.normalize) and cut into
+character 5-gram shingles, which hold up against Hebrew and Russian
+inflection and small edits. Its MinHash signature is NUM_PERM minimums of
+multiply-shift hashes over those shingles. Two summaries agree on a
+signature position with probability equal to their Jaccard similarity.
+
+The signature is split into BANDS bands of ROWS values. Tickets that share
+a band hash land in the same bucket, so a lookup only compares a handful of
+candidates, never every ticket. With 16 x 8 the candidate threshold is
+around 0.7. A candidate is a duplicate when the estimated similarity
+reaches TICKET_DEDUP_THRESHOLD and it was created within
+TICKET_DEDUP_WINDOW_DAYS.
+
+Each worker keeps the index in memory. New tickets reach every worker
+through the event bus ("dedup.indexed" carries the signature). The index
+is saved to DEDUP_INDEX_PATH (.npz) on shutdown and by
+scripts/rebuild_dedup_index.py. Tickets that leave the window are pruned
+every PRUNE_INTERVAL_SECONDS and left out of snapshots, so memory follows
+the window rather than the process lifetime. On start a worker loads the snapshot and
+catches up from the database, so the snapshot is only a cache. Until
+that finishes lookups find nothing (intake fails open).
+
+numpy is imported on first use - it is not on the app's import path.
+"""
+import asyncio
+import base64
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.events import event_bus, publish
+from app.core.triage import normalize
+from app.models import Ticket
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_CHARS = 5
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SEED = 20261019
+# Shorter summaries ("I need a lawyer") are too generic to call duplicates
+MIN_CHARS = 60
+SHINGLE_CHUNK = 4096
+SYNC_BATCH_SIZE = 2000
+PRUNE_INTERVAL_SECONDS = 3600
+
+INDEXED_EVENT = "dedup.indexed"
+SNAPSHOT_PARAMS = [SHINGLE_CHARS, NUM_PERM, BANDS, SEED, MIN_CHARS]
+
+def _window_start() -> float:
+    return time.time() - settings.TICKET_DEDUP_WINDOW_DAYS * 86400
+
+@lru_cache(maxsize=1)
+def _hash_params():
+    import numpy as np
+    
+    rng = np.random.default_rng(SEED)
+    multipliers = rng.integers(1, 2 ** 63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+    offsets = rng.integers(0, 2 ** 63, size=NUM_PERM, dtype=np.uint64)
+    band_weights = rng.integers(1, 2 ** 63, size=ROWS, dtype=np.uint64) | np.uint64(1)
+    return multipliers[:, None], offsets[:, None], band_weights
+
+def shingles(normalized: str):
+    """Distinct 64-bit rolling hashes of the text's 5-character windows"""
+    import numpy as np
+    
+    codes = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    count = len(codes) - SHINGLE_CHARS + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.uint64)
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(SHINGLE_CHARS):
+        hashes = hashes * np.uint64(1000003) + codes[offset:offset + count]
+    return np.unique(hashes)
+
+def minhash(text: str):
+    """NUM_PERM uint32 signature, or None when the summary is too short"""
+    import numpy as np
+    
+    normalized = normalize(text)
+    if len(normalized) < MIN_CHARS:
+        return None
+    values = shingles(normalized)
+    multipliers, offsets, _ = _hash_params()
+    signature = np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+    # Chunked so a 20k-character summary does not build a 128 x 20k matrix
+    for start in range(0, len(values), SHINGLE_CHUNK):
+        chunk = values[start:start + SHINGLE_CHUNK]
+        hashed = (multipliers * chunk[None, :] + offsets) >> np.uint64(32)
+        np.minimum(signature, hashed.min(axis=1), out=signature)
+    return signature.astype(np.uint32)
+
+def band_hashes(signatures):
+    """(n, BANDS) uint64 bucket keys for an (n, NUM_PERM) signature array"""
+    import numpy as np
+    
+    _, _, band_weights = _hash_params()
+    bands = signatures.reshape(len(signatures), BANDS, ROWS).astype(np.uint64)
+    return (bands * band_weights).sum(axis=2)
+
+@dataclass
+class Duplicate:
+    ticket_id: int
+    similarity: float
+
+@dataclass
+class DedupCheck:
+    signature: object  # numpy uint32 array, None for short summaries
+    duplicate: Optional[Duplicate]
+
+class DuplicateIndex:
+    def __init__(self):
+        self._ids: List[int] = []
+        self._created: List[float] = []
+        self._signatures: list = []
+        self._known: Set[int] = set()
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(BANDS)]
+        # Bulk loads run in the threadpool while intake reads on the event loop
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.ready = False
+    
+    @property
+    def enabled(self) -> bool:
+        return settings.TICKET_DEDUP_MODE in ("flag", "merge")
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    @property
+    def max_id(self) -> int:
+        return max(self._ids, default=0)
+    
+    def _add_many(self, ids, created, signatures) -> None:
+        keys = band_hashes(signatures)
+        with self._lock:
+            for ticket_id, created_at, signature, row_keys in zip(ids, created, signatures, keys):
+                ticket_id = int(ticket_id)
+                if ticket_id in self._known:
+                    continue
+                row = len(self._ids)
+                self._ids.append(ticket_id)
+                self._created.append(float(created_at))
+                self._signatures.append(signature)
+                self._known.add(ticket_id)
+                for band, key in enumerate(row_keys.tolist()):
+                    self._buckets[band].setdefault(key, []).append(row)
+    
+    def add(self, ticket_id: int, created_at: float, signature) -> None:
+        self._add_many([ticket_id], [created_at], signature[None, :])
+    
+    def prune(self) -> int:
+        """Drop tickets created before the window; returns how many.
+        
+        The kept rows are re-bucketed outside the lock and swapped in, so
+        intake lookups are not blocked; rows added meanwhile are carried over.
+        """
+        import numpy as np
+        
+        cutoff = _window_start()
+        with self._lock:
+            count = len(self._ids)
+            keep = [row for row in range(count) if self._created[row] >= cutoff]
+        if len(keep) == count:
+            return 0
+        
+        ids = [self._ids[row] for row in keep]
+        created = [self._created[row] for row in keep]
+        signatures = [self._signatures[row] for row in keep]
+        buckets: List[Dict[int, List[int]]] = [{} for _ in range(BANDS)]
+        
+        def bucket(first_row: int, rows_signatures) -> None:
+            if not rows_signatures:
+                return
+            keys = band_hashes(np.array(rows_signatures, dtype=np.uint32))
+            for row, row_keys in enumerate(keys, start=first_row):
+                for band, key in enumerate(row_keys.tolist()):
+                    buckets[band].setdefault(key, []).append(row)
+        
+        bucket(0, signatures)
+        with self._lock:
+            added = slice(count, len(self._ids))
+            bucket(len(ids), self._signatures[added])
+            ids += self._ids[added]
+            created += self._created[added]
+            signatures += self._signatures[added]
+            self._ids, self._created, self._signatures = ids, created, signatures
+            self._known = set(ids)
+            self._buckets = buckets
+        return count - len(keep)
+    
+    def find(self, signature) -> Optional[Duplicate]:
+        """Most similar indexed ticket at or above the threshold, if any"""
+        if signature is None or not self.ready:
+            return None
+        keys = band_hashes(signature[None, :])[0].tolist()
+        cutoff = _window_start()
+        best: Optional[Duplicate] = None
+        with self._lock:
+            candidates: Set[int] = set()
+            for band, key in enumerate(keys):
+                candidates.update(self._buckets[band].get(key, ()))
+            
+            for row in candidates:
+                if self._created[row] < cutoff:
+                    continue
+                similarity = float((self._signatures[row] == signature).mean())
+                if similarity >= settings.TICKET_DEDUP_THRESHOLD and (best is None or similarity > best.similarity):
+                    best = Duplicate(ticket_id=self._ids[row], similarity=similarity)
+        return best
+    
+    def check(self, event_summary: str) -> DedupCheck:
+        signature = minhash(event_summary)
+        return DedupCheck(signature=signature, duplicate=self.find(signature))
+    
+    async def publish(self, db: AsyncSession, ticket: Ticket, signature) -> None:
+        """Index a new original ticket in every worker once the transaction commits"""
+        if signature is None:
+            return
+        await publish(db, INDEXED_EVENT, {
+            "id": ticket.id,
+            "created_at": ticket.created_at.timestamp(),
+            "signature": base64.b64encode(signature.tobytes()).decode()
+        })
+    
+    def _on_indexed(self, data: dict) -> None:
+        import numpy as np
+        
+        signature = np.frombuffer(base64.b64decode(data["signature"]), dtype=np.uint32)
+        self.add(data["id"], data["created_at"], signature)
+    
+    # Persistence - snapshot is a cache; the database is the source of truth
+    def save(self, path: Optional[str] = None) -> None:
+        import numpy as np
+        
+        target = Path(path or settings.DEDUP_INDEX_PATH)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            ids = np.array(self._ids, dtype=np.int64)
+            created = np.array(self._created, dtype=np.float64)
+            signatures = np.array(self._signatures, dtype=np.uint32).reshape(len(ids), NUM_PERM)
+        keep = created >= _window_start()
+        ids, created, signatures = ids[keep], created[keep], signatures[keep]
+        
+        # Workers may save at the same time - each writes its own file and swaps it in
+        temporary = target.with_name(f".{target.name}.{os.getpid()}")
+        with open(temporary, "wb") as output:
+            np.savez(output, params=np.array(SNAPSHOT_PARAMS), ids=ids, created=created, signatures=signatures)
+        os.replace(temporary, target)
+    
+    def load(self, path: Optional[str] = None) -> bool:
+        import numpy as np
+        
+        source = Path(path or settings.DEDUP_INDEX_PATH)
+        if not source.is_file():
+            return False
+        with np.load(source) as snapshot:
+            if snapshot["params"].tolist() != SNAPSHOT_PARAMS:
+                logger.warning("Dedup snapshot built with other parameters - ignored", extra={"path": str(source)})
+                return False
+            keep = snapshot["created"] >= _window_start()
+            self._add_many(snapshot["ids"][keep], snapshot["created"][keep], snapshot["signatures"][keep])
+        return True
+    
+    async def sync_from_db(self, db: AsyncSession, after_id: int = 0) -> int:
+        """Index original tickets in the window with id > after_id; returns how many"""
+        cutoff = datetime.fromtimestamp(_window_start(), timezone.utc)
+        added = 0
+        while True:
+            result = await db.execute(
+                select(Ticket.id, Ticket.created_at, Ticket.event_summary)
+                .where(
+                    Ticket.id > after_id,
+                    Ticket.created_at >= cutoff,
+                    Ticket.duplicate_of_id.is_(None)
+                )
+                .order_by(Ticket.id)
+                .limit(SYNC_BATCH_SIZE)
+            )
+            rows = result.all()
+            if not rows:
+                return added
+            added += await run_in_threadpool(self._index_rows, rows)
+            after_id = rows[-1].id
+    
+    def _index_rows(self, rows) -> int:
+        import numpy as np
+        
+        ids, created, signatures = [], [], []
+        for row in rows:
+            signature = minhash(row.event_summary)
+            if signature is not None:
+                ids.append(row.id)
+                created.append(row.created_at.timestamp())
+                signatures.append(signature)
+        if ids:
+            self._add_many(ids, created, np.array(signatures, dtype=np.uint32))
+        return len(ids)
+    
+    async def _start(self) -> None:
+        try:
+            loaded = await run_in_threadpool(self.load)
+            async with AsyncSessionLocal() as db:
+                added = await self.sync_from_db(db, self.max_id)
+            self.ready = True
+            logger.info("Dedup index ready", extra={"tickets": len(self), "snapshot": loaded, "caught_up": added})
+        except Exception:
+            logger.exception("Dedup index failed to load - duplicate detection disabled")
+            return
+        
+        while True:
+            await asyncio.sleep(PRUNE_INTERVAL_SECONDS)
+            try:
+                pruned = await run_in_threadpool(self.prune)
+                if pruned:
+                    logger.info("Dedup index pruned", extra={"pruned": pruned, "tickets": len(self)})
+            except Exception:
+                logger.exception("Dedup index prune failed")
+    
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._start())
+    
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        if self.ready:
+            try:
+                await run_in_threadpool(self.save)
+            except Exception:
+                logger.exception("Dedup index snapshot failed")
+
+dedup_index = DuplicateIndex()
+event_bus.on(INDEXED_EVENT, dedup_index._on_indexed)
@@ -1,44 +1,65 @@
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.core.database import get_db
 from app.core.security import verify_token
-from app.models import User
+from app.core.revocation import revocations
+from app.schemas import TokenData
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
-    token = credentials.credentials
+def user_from_token(token: str) -> TokenData:
+    """Identity from a verified, unrevoked access token"""
     payload = verify_token(token)
-    email = payload.get("sub")
+    user_id = payload.get("uid")
     
-    if email is None:
+    if payload.get("type") != "access" or user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
         )
     
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
+    current_user = TokenData(
+        user_id=user_id,
+        email=payload.get("sub"),
+        role=payload.get("role", "client"),
+        token_version=payload.get("ver", 0)
+    )
     
-    if user is None:
+    if revocations.is_revoked(current_user.user_id, current_user.token_version):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
+            detail="Token has been revoked"
         )
     
-    return user
+    return current_user
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> TokenData:
+    """Get current authenticated user from the token claims (no DB query)"""
+    return user_from_token(credentials.credentials)
 
-async def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_admin_user(current_user: TokenData = Depends(get_current_user)) -> TokenData:
     """Ensure current user is admin"""
     if current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_stream_admin_user(
+    token: Optional[str] = Query(None),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> TokenData:
+    """Admin check for event streams - browsers' EventSource cannot send an
+    Authorization header, so the access token may come as ?token= instead"""
+    if credentials is not None:
+        token = credentials.credentials
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    return await get_admin_user(user_from_token(token))
@@ -1,9 +1,81 @@
+import logging
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from functools import lru_cache
 from typing import Optional
-from jinja2 import Template
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
+from app.core.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Template sources - compiled lazily (jinja2 is only imported on first use or
+# during the startup warmup, keeping it off the import path)
+TEMPLATES = {
+    "ticket_confirmation": """
+    <html>
+    <body dir="rtl" style="font-family: Arial, sans-serif;">
+        <h2>תודה על פנייתך</h2>
+        <p>שלום {{ client_name }},</p>
+        <p>קיבלנו את פנייתך ונחזור אליך בהקדם.</p>
+        
+        <h3>פרטי הפנייה:</h3>
+        <ul>
+            <li><strong>שם:</strong> {{ client_name }}</li>
+            <li><strong>אימייל:</strong> {{ client_email }}</li>
+            <li><strong>טלפון:</strong> {{ client_phone }}</li>
+            <li><strong>רמת דחיפות:</strong> {{ urgency_level }}</li>
+        </ul>
+        
+        <h3>תיאור האירוע:</h3>
+        <p>{{ event_summary }}</p>
+        
+        <p>בברכה,<br>המשרד לעניינים משפטיים</p>
+    </body>
+    </html>
+    """,
+    "ticket_notification_to_lawyer": """
+    <html>
+    <body style="font-family: Arial, sans-serif;">
+        <h2>New Ticket Submitted</h2>
+        
+        <h3>Client Information:</h3>
+        <ul>
+            <li><strong>Name:</strong> {{ client_name }}</li>
+            <li><strong>Email:</strong> {{ client_email }}</li>
+            <li><strong>Phone:</strong> {{ client_phone }}</li>
+            <li><strong>Urgency:</strong> {{ urgency_level }}</li>
+            {% if suggested_urgency %}
+            <li><strong>Suggested:</strong> {{ suggested_urgency }} ({{ category }})</li>
+            {% endif %}
+        </ul>
+        
+        <h3>Event Summary:</h3>
+        <p>{{ event_summary }}</p>
+        
+        <p><a href="http://localhost:5173/admin/tickets">View in Admin Dashboard</a></p>
+    </body>
+    </html>
+    """,
+}
+
+@lru_cache(maxsize=None)
+def _template(name: str):
+    from jinja2 import Template
+    return Template(TEMPLATES[name])
+
+def compile_templates() -> None:
+    """Compile every email template ahead of traffic"""
+    for name in TEMPLATES:
+        _template(name)
+
+def _deliver(msg: MIMEMultipart) -> None:
+    # Blocking smtplib session - runs in a worker thread, never on the event loop
+    with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS) as server:
+        server.starttls()
+        server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+        server.send_message(msg)
 
 async def send_email(
     to_email: str,
@@ -29,42 +101,19 @@ async def send_email(
         msg.attach(html_part)
         
         # Send email
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-            server.send_message(msg)
+        with span("smtp.send", host=settings.SMTP_HOST, subject=subject):
+            await run_in_threadpool(_deliver, msg)
         
         return True
     except Exception as e:
-        print(f"Email sending failed: {e}")
+        logger.error("Email sending failed", extra={"to": to_email, "subject": subject, "error": str(e)})
         return False
 
 async def send_ticket_confirmation(ticket_data: dict) -> bool:
     """Send confirmation to client after ticket submission"""
     subject = f"Ticket Confirmation - {ticket_data['client_name']}"
     
-    html_template = Template("""
-    <html>
-    <body dir="rtl" style="font-family: Arial, sans-serif;">
-        <h2>תודה על פנייתך</h2>
-        <p>שלום {{ client_name }},</p>
-        <p>קיבלנו את פנייתך ונחזור אליך בהקדם.</p>
-        
-        <h3>פרטי הפנייה:</h3>
-        <ul>
-            <li><strong>שם:</strong> {{ client_name }}</li>
-            <li><strong>אימייל:</strong> {{ client_email }}</li>
-            <li><strong>טלפון:</strong> {{ client_phone }}</li>
-            <li><strong>רמת דחיפות:</strong> {{ urgency_level }}</li>
-        </ul>
-        
-        <h3>תיאור האירוע:</h3>
-        <p>{{ event_summary }}</p>
-        
-        <p>בברכה,<br>המשרד לעניינים משפטיים</p>
-    </body>
-    </html>
-    """)
+    html_template = _template("ticket_confirmation")
     
     html_body = html_template.render(**ticket_data)
     
@@ -78,26 +127,7 @@ async def send_ticket_notification_to_lawyer(ticket_data: dict) -> bool:
     """Notify lawyer of new ticket"""
     subject = f"New Ticket Submitted - {ticket_data['client_name']}"
     
-    html_template = Template("""
-    <html>
-    <body style="font-family: Arial, sans-serif;">
-        <h2>New Ticket Submitted</h2>
-        
-        <h3>Client Information:</h3>
-        <ul>
-            <li><strong>Name:</strong> {{ client_name }}</li>
-            <li><strong>Email:</strong> {{ client_email }}</li>
-            <li><strong>Phone:</strong> {{ client_phone }}</li>
-            <li><strong>Urgency:</strong> {{ urgency_level }}</li>
-        </ul>
-        
-        <h3>Event Summary:</h3>
-        <p>{{ event_summary }}</p>
-        
-        <p><a href="http://localhost:5173/admin/tickets">View in Admin Dashboard</a></p>
-    </body>
-    </html>
-    """)
+    html_template = _template("ticket_notification_to_lawyer")
     
     html_body = html_template.render(**ticket_data)
     
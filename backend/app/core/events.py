@@ -0,0 +1,137 @@
+"""Cross-worker event bus on Postgres LISTEN/NOTIFY.
+
+Writers publish with pg_notify() inside their own transaction, so an event
+goes out only if the change commits, and in commit order. Each worker keeps
+one dedicated asyncpg connection (outside the SQLAlchemy pool) that LISTENs
+on EVENTS_CHANNEL and fans events out to in-process subscribers - SSE
+streams and local handlers such as the chat long-poll notifier. The
+connection is re-established if it drops; events sent while it is down are
+lost, so subscribers resync from the database when they (re)connect.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional, Set
+import asyncpg
+import orjson
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+
+EVENTS_CHANNEL = "app_events"
+SUBSCRIBER_QUEUE_SIZE = 256
+RECONNECT_SECONDS = 2
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD_BYTES = 7900
+
+logger = logging.getLogger(__name__)
+
+async def publish(db: AsyncSession, event_type: str, data: dict) -> None:
+    """Queue an event on the current transaction - delivered on commit"""
+    payload = orjson.dumps({"type": event_type, "data": data}).decode()
+    if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+        raise ValueError(f"Event payload too large for NOTIFY: {event_type}")
+    await db.execute(select(func.pg_notify(EVENTS_CHANNEL, payload)))
+
+class Subscription:
+    """Events of the requested types, in order. get() returns None once the
+    subscription was dropped - it fell SUBSCRIBER_QUEUE_SIZE events behind or
+    the listener reconnected - and the subscriber must resync."""
+    
+    def __init__(self, event_types: Set[str]):
+        self.event_types = event_types
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.dropped = False
+    
+    def _offer(self, event: dict) -> bool:
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.close()
+            return False
+    
+    def close(self) -> None:
+        """Discard pending events and make get() return None"""
+        self.dropped = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+    
+    async def get(self) -> Optional[dict]:
+        return await self._queue.get()
+
+class EventBus:
+    def __init__(self):
+        self._subscriptions: List[Subscription] = []
+        self._handlers: Dict[str, List[Callable[[dict], None]]] = {}
+        self._task: Optional[asyncio.Task] = None
+    
+    def on(self, event_type: str, handler: Callable[[dict], None]) -> None:
+        """Call handler(data) in this worker for every event_type event (must not block)"""
+        self._handlers.setdefault(event_type, []).append(handler)
+    
+    @asynccontextmanager
+    async def subscribe(self, *event_types: str):
+        subscription = Subscription(set(event_types))
+        self._subscriptions.append(subscription)
+        try:
+            yield subscription
+        finally:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+    
+    def _dispatch(self, payload: str) -> None:
+        event = orjson.loads(payload)
+        event_type = event.get("type")
+        
+        for handler in self._handlers.get(event_type, ()):
+            handler(event.get("data") or {})
+        
+        for subscription in list(self._subscriptions):
+            if event_type in subscription.event_types and not subscription._offer(event):
+                self._subscriptions.remove(subscription)
+    
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        try:
+            self._dispatch(payload)
+        except Exception:
+            logger.exception("Event dispatch failed")
+    
+    async def _listen(self) -> None:
+        dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            try:
+                connection = await asyncpg.connect(dsn)
+            except Exception as e:
+                logger.warning("Event bus connection failed", extra={"error": str(e)})
+                await asyncio.sleep(RECONNECT_SECONDS)
+                continue
+            
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _: closed.set())
+            try:
+                await connection.add_listener(EVENTS_CHANNEL, self._on_notification)
+                await closed.wait()
+                logger.warning("Event bus connection lost, reconnecting")
+                # Events may have been missed - make every stream resync
+                for subscription in self._subscriptions:
+                    subscription.close()
+                self._subscriptions.clear()
+            finally:
+                if not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(RECONNECT_SECONDS)
+    
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+    
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+event_bus = EventBus()
@@ -0,0 +1,243 @@
+"""Pre-rendered sitemap.xml and per-language RSS/Atom feeds for the blog.
+
+Crawlers and feed readers are served static files from FEEDS_DIR - no DB
+queries. The files are rebuilt whenever a published article changes: the
+blog router hands the changed article to publish_article_change(), which
+patches a small JSON index of published articles (also in FEEDS_DIR) and
+re-renders only the outputs that article affects. Each output is written
+atomically next to a pre-compressed .gz copy. A file lock serialises writers
+across workers.
+"""
+import asyncio
+import fcntl
+import gzip
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from email.utils import format_datetime, formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional
+from xml.sax.saxutils import escape
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models import Article
+
+SITEMAP_MAX_URLS = 50000
+FEED_MAX_ENTRIES = 50
+INDEX_FILE = "index.json"
+
+def _feeds_dir() -> Path:
+    path = Path(settings.FEEDS_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def article_url(slug: str) -> str:
+    return f"{settings.SITE_URL.rstrip('/')}/blog/{slug}"
+
+def feed_entry(article: Article) -> dict:
+    return {
+        "slug": article.slug,
+        "title": article.title,
+        "excerpt": article.excerpt or "",
+        "language": article.language,
+        "created_at": article.created_at.isoformat(),
+        "updated_at": (article.updated_at or article.created_at).isoformat(),
+    }
+
+@contextmanager
+def _locked():
+    with open(_feeds_dir() / ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _write(name: str, content: str) -> None:
+    """Atomically write name and name.gz"""
+    directory = _feeds_dir()
+    data = content.encode("utf-8")
+    for filename, payload in ((name, data), (f"{name}.gz", gzip.compress(data, compresslevel=9))):
+        target = directory / filename
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temporary = target.with_name(f".{target.name}.tmp")
+        temporary.write_bytes(payload)
+        os.replace(temporary, target)
+
+def _load_index() -> Dict[str, dict]:
+    try:
+        return json.loads((_feeds_dir() / INDEX_FILE).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+
+def _save_index(index: Dict[str, dict]) -> None:
+    target = _feeds_dir() / INDEX_FILE
+    temporary = target.with_name(f".{INDEX_FILE}.tmp")
+    temporary.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+    os.replace(temporary, target)
+
+def _render_urlset(entries: list) -> str:
+    urls = "".join(
+        f"<url><loc>{escape(article_url(entry['slug']))}</loc>"
+        f"<lastmod>{entry['updated_at'][:10]}</lastmod></url>"
+        for entry in entries
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+    )
+
+def _render_sitemaps(index: Dict[str, dict]) -> None:
+    """sitemap.xml, or a sitemap index over sitemaps/sitemap-N.xml past 50k URLs"""
+    entries = sorted(index.values(), key=lambda entry: entry["created_at"])
+    chunks = [entries[i:i + SITEMAP_MAX_URLS] for i in range(0, len(entries), SITEMAP_MAX_URLS)]
+    
+    if len(chunks) <= 1:
+        _write("sitemap.xml", _render_urlset(entries))
+        chunks = []
+    else:
+        sitemaps = ""
+        for number, chunk in enumerate(chunks, start=1):
+            _write(f"sitemaps/sitemap-{number}.xml", _render_urlset(chunk))
+            lastmod = max(entry["updated_at"] for entry in chunk)[:10]
+            location = f"{settings.API_URL.rstrip('/')}/sitemaps/sitemap-{number}.xml"
+            sitemaps += f"<sitemap><loc>{escape(location)}</loc><lastmod>{lastmod}</lastmod></sitemap>"
+        _write(
+            "sitemap.xml",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{sitemaps}</sitemapindex>'
+        )
+    
+    # Drop part files left over from a larger corpus
+    for stale in (_feeds_dir() / "sitemaps").glob("sitemap-*.xml*"):
+        number = int(stale.name.split("-")[1].split(".")[0])
+        if number > len(chunks):
+            stale.unlink(missing_ok=True)
+
+def _render_feeds(index: Dict[str, dict], language: str) -> None:
+    """RSS 2.0 and Atom feeds with the latest articles of one language"""
+    entries = sorted(
+        (entry for entry in index.values() if entry["language"] == language),
+        key=lambda entry: entry["created_at"],
+        reverse=True
+    )[:FEED_MAX_ENTRIES]
+    
+    site = settings.SITE_URL.rstrip("/")
+    title = escape(settings.APP_NAME)
+    updated = max((entry["updated_at"] for entry in entries), default=datetime.now().astimezone().isoformat())
+    
+    items = "".join(
+        f"<item><title>{escape(entry['title'])}</title>"
+        f"<link>{escape(article_url(entry['slug']))}</link>"
+        f"<guid>{escape(article_url(entry['slug']))}</guid>"
+        f"<pubDate>{format_datetime(datetime.fromisoformat(entry['created_at']))}</pubDate>"
+        f"<description>{escape(entry['excerpt'])}</description></item>"
+        for entry in entries
+    )
+    _write(
+        f"feeds/{language}/rss.xml",
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>{title}</title><link>{escape(site)}/blog</link>"
+        f"<description>{title}</description><language>{language}</language>"
+        f"{items}</channel></rss>"
+    )
+    
+    atom_entries = "".join(
+        f"<entry><title>{escape(entry['title'])}</title>"
+        f'<link href="{escape(article_url(entry["slug"]))}"/>'
+        f"<id>{escape(article_url(entry['slug']))}</id>"
+        f"<published>{entry['created_at']}</published><updated>{entry['updated_at']}</updated>"
+        f"<summary>{escape(entry['excerpt'])}</summary></entry>"
+        for entry in entries
+    )
+    _write(
+        f"feeds/{language}/atom.xml",
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<feed xmlns="http://www.w3.org/2005/Atom" xml:lang="{language}">'
+        f"<title>{title}</title><id>{escape(site)}/blog?lang={language}</id>"
+        f'<link href="{escape(site)}/blog"/><updated>{updated}</updated>'
+        f"{atom_entries}</feed>"
+    )
+
+def _apply_change(slug: str, entry: Optional[dict]) -> None:
+    with _locked():
+        index = _load_index()
+        previous = index.pop(slug, None)
+        if entry is not None:
+            index[slug] = entry
+        
+        if previous is None and entry is None:
+            return  # an unpublished article changed - nothing public is affected
+        
+        _save_index(index)
+        _render_sitemaps(index)
+        for language in {item["language"] for item in (previous, entry) if item}:
+            _render_feeds(index, language)
+
+async def publish_article_change(article: Article) -> None:
+    """Reflect a created/updated article in the sitemap and its language feeds"""
+    entry = feed_entry(article) if article.is_published else None
+    await asyncio.to_thread(_apply_change, article.slug, entry)
+
+async def remove_article(slug: str) -> None:
+    """Drop a deleted article from the sitemap and feeds"""
+    await asyncio.to_thread(_apply_change, slug, None)
+
+def _rebuild(entries: list) -> None:
+    with _locked():
+        index = {entry["slug"]: entry for entry in entries}
+        _save_index(index)
+        _render_sitemaps(index)
+        for language in {entry["language"] for entry in entries} | {"he", "ru", "en"}:
+            _render_feeds(index, language)
+
+async def rebuild_feeds(db: AsyncSession) -> int:
+    """Full rebuild from the database - first start and manual recovery only"""
+    result = await db.execute(select(Article).where(Article.is_published == True))
+    entries = [feed_entry(article) for article in result.scalars().all()]
+    await asyncio.to_thread(_rebuild, entries)
+    return len(entries)
+
+def feeds_built() -> bool:
+    return (_feeds_dir() / INDEX_FILE).exists()
+
+def feed_response(request: Request, name: str, media_type: str) -> Response:
+    """Serve a pre-rendered file with ETag/Last-Modified and pre-compressed gzip"""
+    path = _feeds_dir() / name
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    
+    compressed = path.with_name(f"{path.name}.gz")
+    gzipped = "gzip" in request.headers.get("accept-encoding", "") and compressed.exists()
+    
+    # Strong validators differ per representation
+    tag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}{'-gz' if gzipped else ''}"
+    headers = {
+        "ETag": f'"{tag}"',
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": "public, max-age=300",
+        "Vary": "Accept-Encoding",
+    }
+    
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        if headers["ETag"] in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    elif if_modified_since:
+        try:
+            if int(stat.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp():
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        except (TypeError, ValueError):
+            pass
+    
+    if gzipped:
+        return FileResponse(compressed, media_type=media_type, headers={**headers, "Content-Encoding": "gzip"})
+    
+    return FileResponse(path, media_type=media_type, headers=headers)
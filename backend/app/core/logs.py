@@ -0,0 +1,243 @@
+"""Structured, non-blocking logging.
+
+Code logs through the standard logging module. The root logger has a single
+QueueHandler: the calling coroutine only copies the record onto a bounded
+queue, and a QueueListener thread formats it (JSON by default) and writes it
+to stdout. When the queue is full, records are dropped and counted instead
+of blocking the event loop. The listener thread reports the count as a
+warning every DROP_REPORT_SECONDS while records are being dropped, and once
+more on shutdown.
+
+RequestContextMiddleware gives every request an id (the incoming X-Request-ID
+or a fresh one) that is carried in a contextvar, stamped on every record
+logged while the request runs, and returned as a response header. It also
+writes one access record per request, sampled at LOG_ACCESS_SAMPLE_RATE;
+errors and slow requests are always kept. Any other record can be sampled
+the same way with extra={"sample_rate": ...}.
+"""
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import parse_qs
+import orjson
+from app.core.config import settings
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has - anything else came in through extra=
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+
+DROP_REPORT_SECONDS = 60
+
+access_logger = logging.getLogger("app.access")
+logger = logging.getLogger(__name__)
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, request_id, extras"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and key != "sample_rate":
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+class ContextFilter(logging.Filter):
+    """Stamp the current request id on the record (runs in the caller's context)"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Keep a record with extra={"sample_rate": r} with probability r"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, "sample_rate", None)
+        return rate is None or random.random() < rate
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves all formatting to the listener thread and drops
+    records instead of raising when the queue is full"""
+    
+    dropped = 0
+    
+    def __init__(self, log_queue: queue.SimpleQueue, max_size: int):
+        super().__init__(log_queue)
+        self.max_size = max_size
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock prepare() formats the message here, on the event loop. The
+        # record is not copied either - this is the root logger's only handler.
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # SimpleQueue is unbounded but lock-free; qsize() is a cheap bound check
+        if self.queue.qsize() >= self.max_size:
+            NonBlockingQueueHandler.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+class DropReportingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that logs how many records the queue handler dropped.
+    
+    The warning is handed straight to the output handler - the queue it
+    reports on may be full.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._reported = NonBlockingQueueHandler.dropped
+        self._report_at = time.monotonic() + DROP_REPORT_SECONDS
+    
+    def dequeue(self, block):
+        while True:
+            try:
+                # The stop sentinel is None, so it is returned like any record
+                record = self.queue.get(timeout=max(self._report_at - time.monotonic(), 0.001))
+                received = True
+            except queue.Empty:
+                received = False
+            if time.monotonic() >= self._report_at:
+                self._report_at = time.monotonic() + DROP_REPORT_SECONDS
+                self.report_dropped()
+            if received:
+                return record
+    
+    def report_dropped(self) -> None:
+        dropped = NonBlockingQueueHandler.dropped
+        if dropped == self._reported:
+            return
+        record = logger.makeRecord(
+            logger.name, logging.WARNING, __file__, 0,
+            "Log records dropped - queue full", None, None,
+            extra={
+                "dropped": dropped - self._reported,
+                "dropped_total": dropped,
+                "queue_size": settings.LOG_QUEUE_SIZE,
+                "request_id": None,
+            }
+        )
+        self._reported = dropped
+        self.handle(record)
+    
+    def stop(self) -> None:
+        super().stop()
+        self.report_dropped()
+
+def build_output_handler() -> logging.Handler:
+    handler = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+    return handler
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """Route the root logger through the queue; returns the started listener"""
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = NonBlockingQueueHandler(log_queue, settings.LOG_QUEUE_SIZE)
+    queue_handler.addFilter(SamplingFilter())
+    queue_handler.addFilter(ContextFilter())
+    
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+    
+    listener = DropReportingQueueListener(log_queue, build_output_handler(), respect_handler_level=True)
+    listener.start()
+    return listener
+
+LONG_POLL_PATH = "/chat/messages"
+
+def is_long_poll(scope) -> bool:
+    """GET /chat/messages with since and a positive wait - the only request
+    held open on purpose (app.routers.chat.get_messages)"""
+    if scope["method"] != "GET" or scope["path"].rstrip("/") != LONG_POLL_PATH:
+        return False
+    params = parse_qs(scope["query_string"].decode("latin-1"))
+    try:
+        return "since" in params and int(params.get("wait", ["0"])[-1]) > 0
+    except ValueError:
+        return False
+
+def held_open(scope, response_headers) -> bool:
+    """Chat long-polls and event streams are slow by design, not slow requests"""
+    if is_long_poll(scope):
+        return True
+    return any(
+        name.lower() == b"content-type" and value.startswith(b"text/event-stream")
+        for name, value in response_headers
+    )
+
+class RequestContextMiddleware:
+    """Pure ASGI middleware - request id contextvar, X-Request-ID header, access log"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        incoming = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                incoming = value.decode("latin-1")
+                break
+        request_id = incoming if incoming and _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        
+        started = time.perf_counter()
+        status_code = 500
+        streaming = False
+        
+        async def send_with_request_id(message):
+            nonlocal status_code, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                streaming = held_open(scope, headers)
+                message["headers"] = headers + [(b"x-request-id", request_id.encode())]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            # Sampled here rather than by SamplingFilter - skipped records are never built
+            keep = (
+                status_code >= 500
+                or (duration_ms >= settings.LOG_SLOW_REQUEST_MS and not streaming)
+                or random.random() < settings.LOG_ACCESS_SAMPLE_RATE
+            )
+            if keep:
+                access_logger.info(
+                    "request",
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status_code,
+                        "duration_ms": round(duration_ms, 2),
+                    }
+                )
+            request_id_var.reset(token)
@@ -0,0 +1,19 @@
+"""Rate limiting (fastapi-limiter) with each Redis check traced as a span.
+
+Without Redis (FastAPILimiter.redis is None - the lifespan clears it when
+Redis is unreachable at startup) limited routes are served unlimited.
+"""
+from fastapi import Request, Response
+from fastapi_limiter import FastAPILimiter
+from fastapi_limiter.depends import RateLimiter as BaseRateLimiter
+from app.core.tracing import span
+
+class RateLimiter(BaseRateLimiter):
+    async def __call__(self, request: Request, response: Response):
+        if FastAPILimiter.redis is None:
+            return
+        return await super().__call__(request, response)
+    
+    async def _check(self, key):
+        with span("ratelimit.check"):
+            return await super()._check(key)
@@ -0,0 +1,517 @@
+"""Related-articles recommendations - hashed TF-IDF vectors, precomputed neighbours.
+
+An article is a sparse vector over FEATURES hashed words of its normalized
+title (weighted), excerpt and content (app.core.triage.normalize), with
+sublinear term frequency (1 + log count). Articles are only compared
+within their language, so each language has its own corpus and document
+frequencies. Words in more than MAX_DF of a language's articles get no
+weight - they say nothing about the topic.
+
+The RELATED_ARTICLES_TOP_K nearest published articles by cosine similarity
+are stored in article_related, so GET /blog/articles/{slug}/related is one
+indexed lookup. A write to one article only recomputes the lists it can
+change, each with a single sparse matrix-vector product over the corpus:
+- the article's own list,
+- the lists that contained it (its score to them may have dropped),
+- the lists whose last neighbour it now beats.
+Document frequencies move with every write, so other stored scores drift
+slightly until scripts/rebuild_related_articles.py recomputes everything.
+
+Each worker loads a language's corpus on its first write to that language.
+The blog router publishes "article.changed" so every worker re-reads the
+changed articles before its next recomputation. Recomputation runs in the
+background once the write has committed.
+
+numpy and scipy are imported on first use - they are not on the app's import path.
+"""
+import asyncio
+import logging
+import re
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.events import event_bus
+from app.core.triage import normalize
+from app.models import Article, ArticleRelated
+
+logger = logging.getLogger(__name__)
+
+FEATURES = 2 ** 18
+TITLE_WEIGHT = 3
+MAX_DF = 0.5
+# Rows per block when every article's neighbours are computed at once
+BLOCK_ROWS = 256
+# Query columns per pass over the corpus - bounds the dense (FEATURES, queries)
+# operand and (rows, queries) scores however many lists an article appears in
+QUERY_BLOCK = 16
+LOAD_BATCH_SIZE = 2000
+CHUNK_ROWS = 4096
+# Removed rows stay in the matrix until they are this share of it
+COMPACT_RATIO = 0.25
+
+CHANGED_EVENT = "article.changed"
+
+WORD = re.compile(r"\w{2,}")
+
+Neighbours = List[Tuple[int, float]]
+
+@lru_cache(maxsize=2 ** 18)
+def _feature(word: str) -> int:
+    # crc32, not hash() - str hashes differ between worker processes
+    return zlib.crc32(word.encode("utf-8")) % FEATURES
+
+def article_text(title: str, excerpt: Optional[str], content: str) -> str:
+    return " ".join([title] * TITLE_WEIGHT + [excerpt or "", content])
+
+def term_vector(text: str):
+    """(sorted feature indices, 1 + log tf weights) of the text"""
+    import numpy as np
+    
+    counts = Counter(_feature(word) for word in WORD.findall(normalize(text)))
+    indices = np.array(sorted(counts), dtype=np.int32)
+    weights = 1 + np.log(np.array([counts[index] for index in indices.tolist()], dtype=np.float32))
+    return indices, weights
+
+def _top(scores, ids: List[int]) -> Neighbours:
+    """Highest-scoring ids at or above RELATED_ARTICLES_MIN_SCORE, best first"""
+    import numpy as np
+    
+    count = min(settings.RELATED_ARTICLES_TOP_K, len(scores))
+    if count == 0:
+        return []
+    best = np.argpartition(-scores, count - 1)[:count]
+    best = best[np.argsort(-scores[best], kind="stable")]
+    return [
+        (ids[position], float(scores[position]))
+        for position in best.tolist()
+        if scores[position] >= settings.RELATED_ARTICLES_MIN_SCORE
+    ]
+
+class LanguageCorpus:
+    """Term vectors of one language's published articles, one matrix row each"""
+    
+    def __init__(self):
+        import numpy as np
+        
+        self.ids: List[int] = []
+        self.positions: Dict[int, int] = {}
+        # Per-row arrays, grown by doubling - alive and floor are views of the used part
+        self._alive = np.zeros(0, dtype=bool)
+        # Score of each row's last stored neighbour - 0 while its list is short
+        self._floor = np.zeros(0, dtype=np.float32)
+        self.df = np.zeros(FEATURES, dtype=np.float32)
+        # Rows live in CSR chunks of CHUNK_ROWS, so adding a row rebuilds only the last chunk
+        self._chunks: list = []
+        self._squared: list = []
+        self._pending: list = []
+        self._norms = None
+    
+    def __len__(self) -> int:
+        return len(self.positions)
+    
+    @property
+    def alive(self):
+        return self._alive[:len(self.ids)]
+    
+    @property
+    def floor(self):
+        return self._floor[:len(self.ids)]
+    
+    def add(self, article_id: int, indices, weights) -> None:
+        """Add or replace an article's vector"""
+        import numpy as np
+        
+        self.remove(article_id)
+        self.positions[article_id] = len(self.ids)
+        self.ids.append(article_id)
+        if len(self.ids) > len(self._alive):
+            grow = max(1024, len(self._alive))
+            self._alive = np.concatenate([self._alive, np.zeros(grow, dtype=bool)])
+            self._floor = np.concatenate([self._floor, np.zeros(grow, dtype=np.float32)])
+        self.alive[-1] = True
+        self.floor[-1] = 0
+        self.df[indices] += 1
+        self._pending.append((indices, weights))
+        self._norms = None
+    
+    def add_rows(self, rows) -> None:
+        """Add (id, title, excerpt, content) rows"""
+        for row in rows:
+            self.add(row.id, *term_vector(article_text(row.title, row.excerpt, row.content)))
+    
+    def remove(self, article_id: int) -> None:
+        position = self.positions.pop(article_id, None)
+        if position is None:
+            return
+        indices, _ = self.row(position)
+        self.df[indices] -= 1
+        self.alive[position] = False
+        self._norms = None
+        if len(self.ids) - len(self.positions) > COMPACT_RATIO * len(self.ids):
+            self._compact()
+    
+    def _flush(self) -> None:
+        """Move pending rows into the chunks"""
+        import numpy as np
+        from scipy import sparse
+        
+        if not self._pending:
+            return
+        indptr = np.cumsum([0] + [len(indices) for indices, _ in self._pending])
+        rows = sparse.csr_matrix(
+            (
+                np.concatenate([weights for _, weights in self._pending]),
+                np.concatenate([indices for indices, _ in self._pending]),
+                indptr
+            ),
+            shape=(len(self._pending), FEATURES)
+        )
+        self._pending = []
+        if self._chunks and self._chunks[-1].shape[0] < CHUNK_ROWS:
+            rows = sparse.vstack([self._chunks.pop(), rows], format="csr")
+            self._squared.pop()
+        for start in range(0, rows.shape[0], CHUNK_ROWS):
+            self._set_chunk(len(self._chunks), rows[start:start + CHUNK_ROWS])
+    
+    def _set_chunk(self, number: int, chunk) -> None:
+        from scipy import sparse
+        
+        squared = sparse.csr_matrix((chunk.data * chunk.data, chunk.indices, chunk.indptr), shape=chunk.shape)
+        if number == len(self._chunks):
+            self._chunks.append(chunk)
+            self._squared.append(squared)
+        else:
+            self._chunks[number] = chunk
+            self._squared[number] = squared
+    
+    def matrix(self):
+        """All rows as one CSR matrix"""
+        import numpy as np
+        from scipy import sparse
+        
+        self._flush()
+        if not self._chunks:
+            return sparse.csr_matrix((0, FEATURES), dtype=np.float32)
+        return sparse.vstack(self._chunks, format="csr")
+    
+    def row(self, position: int):
+        """(indices, weights) of a row"""
+        self._flush()
+        chunk = self._chunks[position // CHUNK_ROWS]
+        local = position % CHUNK_ROWS
+        start, end = chunk.indptr[local], chunk.indptr[local + 1]
+        return chunk.indices[start:end], chunk.data[start:end]
+    
+    def _compact(self) -> None:
+        import numpy as np
+        
+        keep = np.flatnonzero(self.alive)
+        matrix = self.matrix()[keep]
+        self._chunks, self._squared = [], []
+        for start in range(0, matrix.shape[0], CHUNK_ROWS):
+            self._set_chunk(len(self._chunks), matrix[start:start + CHUNK_ROWS])
+        self._alive = self.alive[keep]
+        self._floor = self.floor[keep]
+        self.ids = [self.ids[position] for position in keep.tolist()]
+        self.positions = {article_id: position for position, article_id in enumerate(self.ids)}
+        self._norms = None
+    
+    def idf(self):
+        import numpy as np
+        
+        documents = len(self)
+        idf = (np.log((1 + documents) / (1 + self.df)) + 1).astype(np.float32)
+        idf[self.df > MAX_DF * documents] = 0
+        return idf
+    
+    def scores(self, queries):
+        """Cosine similarity of each (indices, weights) term vector to every
+        row - a (rows, queries) array, 0 for removed rows. One pass over the
+        matrix per QUERY_BLOCK queries."""
+        import numpy as np
+        from scipy import sparse
+        
+        self._flush()
+        idf = self.idf()
+        if self._norms is None:
+            squared_idf = idf * idf
+            self._norms = np.concatenate(
+                [squared @ squared_idf for squared in self._squared] or [np.zeros(0, dtype=np.float32)]
+            )
+            np.sqrt(self._norms, out=self._norms)
+        
+        # Queries as a sparse (FEATURES, queries) CSC matrix - one column per query
+        columns, query_norms = [], np.zeros(len(queries), dtype=np.float32)
+        for column, (indices, weights) in enumerate(queries):
+            weighted = weights * idf[indices]
+            columns.append(weighted * idf[indices])
+            query_norms[column] = np.sqrt(np.dot(weighted, weighted))
+        indptr = np.cumsum([0] + [len(indices) for indices, _ in queries])
+        query_matrix = sparse.csc_matrix(
+            (
+                np.concatenate(columns or [np.zeros(0, dtype=np.float32)]).astype(np.float32, copy=False),
+                np.concatenate([indices for indices, _ in queries] or [np.zeros(0, dtype=np.int32)]),
+                indptr
+            ),
+            shape=(FEATURES, len(queries))
+        )
+        
+        # Sparse x sparse products come out dense here, at several times the
+        # cost - each block is expanded for a sparse x dense product instead
+        dots = np.zeros((len(self.ids), len(queries)), dtype=np.float32)
+        for start in range(0, len(queries), QUERY_BLOCK):
+            block = query_matrix[:, start:start + QUERY_BLOCK].toarray(order="C")
+            offset = 0
+            for chunk in self._chunks:
+                dots[offset:offset + chunk.shape[0], start:start + QUERY_BLOCK] = chunk @ block
+                offset += chunk.shape[0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = dots / (self._norms[:, None] * query_norms[None, :])
+        scores[~self.alive] = 0
+        scores[~np.isfinite(scores)] = 0
+        return scores.astype(np.float32, copy=False)
+    
+    def neighbours(self, article_ids: List[int]) -> Tuple[Dict[int, Neighbours], object]:
+        """Lists of these articles, and the first one's scores to every row.
+        
+        Articles are scored QUERY_BLOCK at a time, so memory stays bounded for
+        an article listed by thousands of others.
+        """
+        lists, first = {}, None
+        for start in range(0, len(article_ids), QUERY_BLOCK):
+            block = article_ids[start:start + QUERY_BLOCK]
+            positions = [self.positions[article_id] for article_id in block]
+            scores = self.scores([self.row(position) for position in positions])
+            for column, (article_id, position) in enumerate(zip(block, positions)):
+                scores[position, column] = 0
+                lists[article_id] = _top(scores[:, column], self.ids)
+            if first is None:
+                first = scores[:, 0].copy()
+        return lists, first
+    
+    def all_neighbours(self) -> Dict[int, Neighbours]:
+        """Every article's list - blocked sparse matrix products, for rebuilds"""
+        import numpy as np
+        from scipy import sparse
+        
+        matrix = self.matrix()
+        idf = self.idf()
+        weighted = matrix.multiply(idf[None, :]).tocsr()
+        norms = np.sqrt(weighted.multiply(weighted).sum(axis=1)).A1
+        with np.errstate(divide="ignore"):
+            inverse = np.where(norms > 0, 1 / norms, 0).astype(np.float32)
+        weighted = (sparse.diags(inverse * self.alive) @ weighted).tocsr()
+        transposed = weighted.T.tocsr()
+        
+        lists = {}
+        for start in range(0, weighted.shape[0], BLOCK_ROWS):
+            block = (weighted[start:start + BLOCK_ROWS] @ transposed).toarray()
+            for offset, scores in enumerate(block):
+                position = start + offset
+                if self.alive[position]:
+                    scores[position] = 0
+                    lists[self.ids[position]] = _top(scores, self.ids)
+        return lists
+    
+    def set_floors(self, lists: Dict[int, Neighbours]) -> None:
+        for article_id, neighbours in lists.items():
+            position = self.positions.get(article_id)
+            if position is not None:
+                self.floor[position] = _floor(neighbours)
+
+def _floor(neighbours: Neighbours) -> float:
+    return neighbours[-1][1] if len(neighbours) >= settings.RELATED_ARTICLES_TOP_K else 0.0
+
+async def store(db: AsyncSession, lists: Dict[int, Neighbours]) -> None:
+    """Replace the stored lists of these articles (caller commits)"""
+    if not lists:
+        return
+    await db.execute(delete(ArticleRelated).where(ArticleRelated.article_id.in_(list(lists))))
+    rows = [
+        {"article_id": article_id, "rank": rank, "related_id": related_id, "score": score}
+        for article_id, neighbours in lists.items()
+        for rank, (related_id, score) in enumerate(neighbours)
+    ]
+    if rows:
+        await db.execute(insert(ArticleRelated), rows)
+
+class RelatedArticles:
+    def __init__(self):
+        self._corpora: Dict[str, LanguageCorpus] = {}
+        # Articles changed by any worker since this worker last caught up
+        self._changed: Set[int] = set()
+        self._lock = asyncio.Lock()
+        self._tasks: Set[asyncio.Task] = set()
+    
+    def _on_changed(self, data: dict) -> None:
+        # Also while a corpus is loading - the load reads in batches and can miss a change
+        if self._corpora or self._lock.locked():
+            self._changed.add(data["id"])
+    
+    async def corpus(self, db: AsyncSession, language: str) -> LanguageCorpus:
+        """The language's corpus, loaded from the database on first use"""
+        corpus = self._corpora.get(language)
+        if corpus is not None:
+            return corpus
+        
+        corpus = LanguageCorpus()
+        after_id = 0
+        while True:
+            result = await db.execute(
+                select(Article.id, Article.title, Article.excerpt, Article.content)
+                .where(Article.language == language, Article.is_published == True, Article.id > after_id)
+                .order_by(Article.id)
+                .limit(LOAD_BATCH_SIZE)
+            )
+            rows = result.all()
+            if not rows:
+                break
+            await run_in_threadpool(corpus.add_rows, rows)
+            after_id = rows[-1].id
+        
+        result = await db.execute(
+            select(ArticleRelated.article_id, func.count(), func.min(ArticleRelated.score))
+            .join(Article, Article.id == ArticleRelated.article_id)
+            .where(Article.language == language)
+            .group_by(ArticleRelated.article_id)
+        )
+        for article_id, count, lowest in result.all():
+            position = corpus.positions.get(article_id)
+            if position is not None and count >= settings.RELATED_ARTICLES_TOP_K:
+                corpus.floor[position] = lowest
+        
+        self._corpora[language] = corpus
+        logger.info("Related-articles corpus loaded", extra={"language": language, "articles": len(corpus)})
+        return corpus
+    
+    async def _catch_up(self, db: AsyncSession) -> None:
+        """Re-read articles changed since the last catch-up into the loaded corpora"""
+        changed, self._changed = self._changed, set()
+        if not changed:
+            return
+        result = await db.execute(
+            select(Article.id, Article.language, Article.is_published, Article.title, Article.excerpt, Article.content)
+            .where(Article.id.in_(changed))
+        )
+        rows = {row.id: row for row in result.all()}
+        
+        def apply() -> None:
+            for article_id in changed:
+                row = rows.get(article_id)
+                for language, corpus in self._corpora.items():
+                    if row is not None and row.is_published and row.language == language:
+                        corpus.add(article_id, *term_vector(article_text(row.title, row.excerpt, row.content)))
+                    else:
+                        corpus.remove(article_id)
+        
+        await run_in_threadpool(apply)
+    
+    async def refresh(self, db: AsyncSession, article_id: int, language: str) -> int:
+        """Recompute the lists one article's change can affect; returns how many"""
+        corpus = await self.corpus(db, language)
+        self._changed.add(article_id)
+        await self._catch_up(db)
+        
+        result = await db.execute(select(ArticleRelated.article_id).where(ArticleRelated.related_id == article_id))
+        listed_by = set(result.scalars().all())
+        lists, gains = await run_in_threadpool(self._plan, corpus, article_id, listed_by)
+        
+        if gains:
+            # Insert the article into lists it now beats the last entry of
+            result = await db.execute(
+                select(ArticleRelated.article_id, ArticleRelated.related_id, ArticleRelated.score)
+                .where(ArticleRelated.article_id.in_(list(gains)))
+                .order_by(ArticleRelated.article_id, ArticleRelated.rank)
+            )
+            current: Dict[int, Neighbours] = {other: [] for other in gains}
+            for other, related_id, score in result.all():
+                if related_id != article_id:
+                    current[other].append((related_id, score))
+            for other, score in gains.items():
+                merged = sorted(current[other] + [(article_id, score)], key=lambda entry: -entry[1])
+                lists[other] = merged[:settings.RELATED_ARTICLES_TOP_K]
+        
+        await store(db, lists)
+        await db.commit()
+        corpus.set_floors(lists)
+        return len(lists)
+    
+    async def rebuild(self, db: AsyncSession, language: str) -> int:
+        """Recompute every list of the language from scratch; returns how many"""
+        self._corpora.pop(language, None)
+        corpus = await self.corpus(db, language)
+        lists = await run_in_threadpool(corpus.all_neighbours)
+        
+        await db.execute(
+            delete(ArticleRelated)
+            .where(ArticleRelated.article_id.in_(select(Article.id).where(Article.language == language)))
+        )
+        batch: Dict[int, Neighbours] = {}
+        for article_id, neighbours in lists.items():
+            batch[article_id] = neighbours
+            if len(batch) >= LOAD_BATCH_SIZE:
+                await store(db, batch)
+                batch = {}
+        await store(db, batch)
+        await db.commit()
+        corpus.set_floors(lists)
+        return len(lists)
+    
+    @staticmethod
+    def _plan(corpus: LanguageCorpus, article_id: int, listed_by: Set[int]):
+        """(lists recomputed in full, {article id: score} of lists the article joins)"""
+        import numpy as np
+        
+        lists: Dict[int, Neighbours] = {article_id: []}
+        gains: Dict[int, float] = {}
+        present = article_id in corpus.positions
+        recompute = ([article_id] if present else []) + [
+            other for other in listed_by if other in corpus.positions and other != article_id
+        ]
+        if not recompute:
+            return lists, gains
+        
+        computed, own = corpus.neighbours(recompute)
+        lists.update(computed)
+        if present:
+            joins = np.flatnonzero((own > corpus.floor) & (own >= settings.RELATED_ARTICLES_MIN_SCORE))
+            gains = {
+                corpus.ids[position]: float(own[position])
+                for position in joins.tolist()
+                if corpus.ids[position] not in lists
+            }
+        return lists, gains
+    
+    async def _run(self, article_id: int, languages: List[str]) -> None:
+        try:
+            async with self._lock:
+                async with AsyncSessionLocal() as db:
+                    for language in languages:
+                        await self.refresh(db, article_id, language)
+        except Exception:
+            logger.exception("Related-articles update failed", extra={"article_id": article_id})
+    
+    def schedule(self, article_id: int, language: str, previous_language: Optional[str] = None) -> None:
+        """Recompute after a committed article write, in the background.
+        
+        An article moved from previous_language is first dropped from that
+        language's lists, then placed in the new language's.
+        """
+        languages = [previous_language, language] if previous_language not in (None, language) else [language]
+        task = asyncio.create_task(self._run(article_id, languages))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def stop(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+related_articles = RelatedArticles()
+event_bus.on(CHANGED_EVENT, related_articles._on_changed)
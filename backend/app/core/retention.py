@@ -0,0 +1,143 @@
+"""Retention - moves closed tickets and old chat messages into the archive tables.
+
+The archive tables are range-partitioned by month on created_at (alembic 0002),
+so the hot tables stay small and every default query only touches hot rows.
+Archived rows are read back only when a caller asks for them explicitly.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import List
+from sqlalchemy import select, union_all, text
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models import Ticket, ChatMessage, ArchivedTicket, ArchivedChatMessage
+
+CLOSED_STATUS = "Closed"
+
+def _hot_columns(model) -> List[str]:
+    # Generated columns (chat search_vector) are not archived
+    return [column.name for column in model.__table__.columns if column.computed is None]
+
+def _with_archive(model, archive_model, name: str):
+    """ORM entity over hot UNION ALL archive, exposing only the hot columns"""
+    columns = _hot_columns(model)
+    combined = union_all(
+        select(*[model.__table__.c[column] for column in columns]),
+        select(*[archive_model.__table__.c[column] for column in columns])
+    ).subquery(name)
+    return aliased(model, combined)
+
+def ticket_source(include_archived: bool = False):
+    """Ticket entity to query - the hot table unless archived rows are requested"""
+    if not include_archived:
+        return Ticket
+    return _with_archive(Ticket, ArchivedTicket, "tickets_all")
+
+def chat_message_source(include_archived: bool = False):
+    """ChatMessage entity to query - the hot table unless archived rows are requested"""
+    if not include_archived:
+        return ChatMessage
+    return _with_archive(ChatMessage, ArchivedChatMessage, "chat_messages_all")
+
+async def _ensure_monthly_partitions(
+    db: AsyncSession,
+    hot_table: str,
+    archive_table: str,
+    condition: str,
+    params: dict
+) -> None:
+    """Create the monthly archive partitions needed for the rows about to move"""
+    result = await db.execute(
+        text(f"""
+            SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')
+            FROM {hot_table}
+            WHERE {condition}
+        """),
+        params
+    )
+    for (month_start,) in result.fetchall():
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        partition = f"{archive_table}_y{month_start:%Y}m{month_start:%m}"
+        await db.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {partition}
+            PARTITION OF {archive_table}
+            FOR VALUES FROM ('{month_start:%Y-%m-%d} 00:00:00+00')
+            TO ('{next_month:%Y-%m-%d} 00:00:00+00')
+        """))
+    await db.commit()
+
+async def _move_rows(
+    db: AsyncSession,
+    model,
+    archive_table: str,
+    condition: str,
+    params: dict,
+    batch_size: int
+) -> int:
+    """Move matching rows in batches; each batch is one DELETE ... INSERT statement"""
+    hot_table = model.__tablename__
+    column_list = ", ".join(_hot_columns(model))
+    
+    await _ensure_monthly_partitions(db, hot_table, archive_table, condition, params)
+    
+    total = 0
+    while True:
+        result = await db.execute(
+            text(f"""
+                WITH moved AS (
+                    DELETE FROM {hot_table}
+                    WHERE id IN (
+                        SELECT id FROM {hot_table}
+                        WHERE {condition}
+                        ORDER BY id
+                        LIMIT :batch_size
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING {column_list}
+                )
+                INSERT INTO {archive_table} ({column_list})
+                SELECT {column_list} FROM moved
+                RETURNING id
+            """),
+            {**params, "batch_size": batch_size}
+        )
+        moved = len(result.fetchall())
+        await db.commit()
+        
+        total += moved
+        if moved < batch_size:
+            return total
+
+async def archive_closed_tickets(db: AsyncSession, older_than_days: int, batch_size: int) -> int:
+    """Archive closed tickets that have not been touched for older_than_days"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    return await _move_rows(
+        db,
+        Ticket,
+        ArchivedTicket.__tablename__,
+        "status = :closed AND updated_at < :cutoff",
+        {"closed": CLOSED_STATUS, "cutoff": cutoff},
+        batch_size
+    )
+
+async def archive_old_messages(db: AsyncSession, older_than_days: int, batch_size: int) -> int:
+    """Archive chat messages older than older_than_days"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    return await _move_rows(
+        db,
+        ChatMessage,
+        ArchivedChatMessage.__tablename__,
+        "created_at < :cutoff",
+        {"cutoff": cutoff},
+        batch_size
+    )
+
+async def run_retention(db: AsyncSession) -> dict:
+    """Run the full retention pass using the configured windows"""
+    tickets = await archive_closed_tickets(
+        db, settings.TICKET_RETENTION_DAYS, settings.RETENTION_BATCH_SIZE
+    )
+    messages = await archive_old_messages(
+        db, settings.CHAT_RETENTION_DAYS, settings.RETENTION_BATCH_SIZE
+    )
+    return {"tickets": tickets, "chat_messages": messages}
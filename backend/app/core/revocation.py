@@ -0,0 +1,112 @@
+"""Access token revocation.
+
+Access tokens are trusted without a DB lookup. To revoke them before they
+expire, each worker keeps the minimum valid token version per user in memory.
+Revocations are written to a Redis hash (so new workers can bootstrap) and
+broadcast on a pub/sub channel (so running workers apply them within seconds).
+Without Redis the list still works, but only inside the current worker.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import User, RefreshToken
+
+REVOCATION_CHANNEL = "auth:revocations"
+MIN_TOKEN_VERSIONS_KEY = "auth:min_token_versions"
+RECONNECT_SECONDS = 2
+
+logger = logging.getLogger(__name__)
+
+class RevocationList:
+    def __init__(self):
+        self._min_versions: Dict[int, int] = {}
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+    
+    def is_revoked(self, user_id: int, token_version: int) -> bool:
+        return token_version < self._min_versions.get(user_id, 0)
+    
+    def _apply(self, user_id: int, min_version: int) -> None:
+        if min_version > self._min_versions.get(user_id, 0):
+            self._min_versions[user_id] = min_version
+    
+    async def revoke(self, user_id: int, min_version: int) -> None:
+        """Reject tokens of user_id with a version below min_version, on every worker"""
+        self._apply(user_id, min_version)
+        
+        if self._redis is not None:
+            try:
+                await self._redis.hset(MIN_TOKEN_VERSIONS_KEY, str(user_id), str(min_version))
+                await self._redis.publish(REVOCATION_CHANNEL, f"{user_id}:{min_version}")
+            except Exception as e:
+                logger.error("Revocation broadcast failed", extra={"user_id": user_id, "error": str(e)})
+    
+    async def _subscribe(self, redis_client):
+        """Subscribe first, then load the hash, so no revocation is missed in between"""
+        pubsub = redis_client.pubsub()
+        await pubsub.subscribe(REVOCATION_CHANNEL)
+        
+        for user_id, min_version in (await redis_client.hgetall(MIN_TOKEN_VERSIONS_KEY)).items():
+            self._apply(int(user_id), int(min_version))
+        return pubsub
+    
+    async def start(self, redis_client) -> None:
+        pubsub = await self._subscribe(redis_client)
+        self._redis = redis_client
+        self._listener = asyncio.create_task(self._listen(redis_client, pubsub))
+    
+    async def _listen(self, redis_client, pubsub) -> None:
+        while True:
+            try:
+                if pubsub is None:
+                    pubsub = await self._subscribe(redis_client)
+                    logger.info("Revocation listener resubscribed")
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    user_id, min_version = message["data"].split(":")
+                    self._apply(int(user_id), int(min_version))
+                # The stream ended without an error - still resubscribe
+                logger.warning("Revocation listener stopped, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Revocations published meanwhile are in the hash, reloaded on resubscribe
+                logger.warning("Revocation listener connection lost, reconnecting", extra={"error": str(e)})
+            if pubsub is not None:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+                pubsub = None
+            await asyncio.sleep(RECONNECT_SECONDS)
+    
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        self._redis = None
+
+revocations = RevocationList()
+
+async def revoke_user_tokens(db: AsyncSession, user_id: int) -> None:
+    """Invalidate every access and refresh token issued to a user"""
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(token_version=User.token_version + 1)
+        .returning(User.token_version)
+    )
+    new_version = result.scalar_one()
+    
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+    )
+    await db.commit()
+    
+    await revocations.revoke(user_id, new_version)
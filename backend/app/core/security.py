@@ -1,26 +1,87 @@
 # backend/app/core/security.py
 from datetime import datetime, timedelta, timezone
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from typing import Optional, Tuple
+import math
+import statistics
+import time
+import uuid
+from functools import lru_cache
 from fastapi import HTTPException, status
 from app.core.config import settings
+from app.core.tracing import span
 import re
 
-# Password hashing - Fixed for Python 3.13 + bcrypt compatibility
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def time_bcrypt(rounds: int, samples: int = 3) -> float:
+    """Median seconds for one bcrypt hash at the given cost on this host"""
+    import bcrypt
+    
+    salt = bcrypt.gensalt(rounds)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", salt)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+def calibrate_bcrypt_rounds(
+    target_ms: Optional[int] = None,
+    min_rounds: Optional[int] = None,
+    max_rounds: Optional[int] = None
+) -> int:
+    """Highest bcrypt cost whose hash time stays within target_ms on this host.
+    Each extra round doubles the work, so one measurement at min_rounds is
+    enough to extrapolate."""
+    target = (target_ms or settings.PASSWORD_HASH_TARGET_MS) / 1000
+    min_rounds = min_rounds or settings.BCRYPT_MIN_ROUNDS
+    max_rounds = max_rounds or settings.BCRYPT_MAX_ROUNDS
+    
+    base = time_bcrypt(min_rounds)
+    extra = int(math.floor(math.log2(target / base))) if base < target else 0
+    return max(min_rounds, min(max_rounds, min_rounds + extra))
+
+@lru_cache(maxsize=None)
+def bcrypt_rounds() -> int:
+    """Cost for new hashes: BCRYPT_ROUNDS, or calibrated once per process.
+    app.server calibrates in the supervisor and passes the result to every
+    worker, so all workers share one policy."""
+    return settings.BCRYPT_ROUNDS or calibrate_bcrypt_rounds()
+
+# Password hashing - Fixed for Python 3.13 + bcrypt compatibility.
+# Built on first use: passlib/bcrypt are only needed by login and registration.
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+    
+    # Weaker hashes are flagged by needs_update and rehashed on login. No
+    # max_rounds: a stronger hash from a faster host must never be downgraded
+    rounds = bcrypt_rounds()
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds
+    )
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     # Truncate to 72 bytes to match bcrypt's limit
     password_bytes = plain_password.encode('utf-8')[:72]
-    return pwd_context.verify(password_bytes, hashed_password)
+    with span("bcrypt.verify"):
+        return get_pwd_context().verify(password_bytes, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; when its hash predates the current cost policy also
+    return a fresh hash to store - (valid, new_hash or None)"""
+    password_bytes = plain_password.encode('utf-8')[:72]
+    with span("bcrypt.verify"):
+        return get_pwd_context().verify_and_update(password_bytes, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Hash a password - truncates to 72 bytes for bcrypt compatibility"""
     # Truncate to 72 bytes to match bcrypt's limit
     password_bytes = password.encode('utf-8')[:72]
-    return pwd_context.hash(password_bytes)
+    with span("bcrypt.hash", rounds=bcrypt_rounds()):
+        return get_pwd_context().hash(password_bytes)
 
 def validate_password_strength(password: str) -> tuple[bool, str]:
     """
@@ -54,6 +115,8 @@ def validate_password_strength(password: str) -> tuple[bool, str]:
     return True, ""
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    from jose import jwt
+    
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
@@ -64,7 +127,45 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def create_user_access_token(user_id: int, email: str, role: str, token_version: int) -> str:
+    """Short-lived access token carrying everything authorization needs"""
+    return create_access_token(
+        data={
+            "sub": email,
+            "uid": user_id,
+            "role": role,
+            "ver": token_version,
+            "type": "access"
+        },
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+
+def create_refresh_token(user_id: int, token_version: int) -> Tuple[str, str, datetime]:
+    """Long-lived refresh token - returns (token, jti, expires_at)"""
+    jti = uuid.uuid4().hex
+    expires_at = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    return encode_refresh_token(user_id, token_version, jti, expires_at), jti, expires_at
+
+def encode_refresh_token(user_id: int, token_version: int, jti: str, expires_at: datetime) -> str:
+    """The refresh token for a stored jti - the same claims always give the same token"""
+    from jose import jwt
+    
+    return jwt.encode(
+        {
+            "uid": user_id,
+            "ver": token_version,
+            "jti": jti,
+            "type": "refresh",
+            "exp": expires_at
+        },
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM
+    )
+
 def verify_token(token: str) -> dict:
+    # Deferred like passlib - loaded by warmup, not at import time
+    from jose import JWTError, jwt
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload
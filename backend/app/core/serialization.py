@@ -0,0 +1,34 @@
+"""Fast-path serialization for list endpoints.
+
+List endpoints select plain columns instead of ORM entities and hand the
+row mappings straight to orjson, skipping per-row Pydantic validation.
+The response_model on the route still documents the shape in OpenAPI.
+"""
+from typing import List, Optional, Type
+from fastapi import HTTPException, status
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from sqlalchemy.engine import Result
+
+def columns_for(entity, schema: Type[BaseModel], fields: Optional[List[str]] = None) -> List:
+    """Columns of entity (model or aliased model) matching the schema fields"""
+    return [getattr(entity, name) for name in (fields or schema.model_fields)]
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[List[str]]:
+    """Parse a sparse fieldset (?fields=id,title,slug) against the schema"""
+    if not fields:
+        return None
+    
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in schema.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    
+    return list(dict.fromkeys(requested))
+
+def rows_response(result: Result) -> ORJSONResponse:
+    """Serialize column-selected rows directly to a JSON array"""
+    return ORJSONResponse([dict(row) for row in result.mappings()])
@@ -0,0 +1,236 @@
+"""Bulk ticket import from CSV or NDJSON files.
+
+Rows are read and validated against TicketImportRow one batch at a time in a
+worker thread, so memory stays bounded by the batch size. Valid rows are
+loaded into a temporary staging table with asyncpg COPY and merged into
+tickets with a single INSERT ... SELECT that skips duplicates - within the
+file and against tickets already stored (hot and archived). A row is a
+duplicate when client_email, event_summary and created_at match; rows
+without created_at match on email and summary alone, so re-running an
+import never creates copies. Rows are triaged (suggested urgency and
+category) as they are validated. Each imported ticket is linked to its
+client registry entry (app.core.clients), created for new emails - stored
+client details win over imported ones, since imports are usually older.
+No emails are sent and no per-row events are published.
+"""
+import csv
+from datetime import timezone
+from typing import Iterator, List, Tuple
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.core.clients import normalize_email, normalize_phone
+from app.core.config import settings
+from app.core.events import publish
+from app.core.triage import triage_ticket
+from app.schemas import TicketImportError, TicketImportResult, TicketImportRow
+
+MAX_REPORTED_ERRORS = 1000
+
+STAGING_TABLE = "ticket_import_staging"
+STAGING_COLUMNS = (
+    "line",
+    "client_name",
+    "client_email",
+    "client_phone",
+    "email_normalized",
+    "phone_e164",
+    "event_summary",
+    "urgency_level",
+    "suggested_urgency",
+    "category",
+    "status",
+    "created_at",
+)
+
+Batch = Tuple[List[tuple], List[TicketImportError], int]
+
+# Accepted upload content types and file extensions
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+def format_for(filename: str) -> str:
+    """Import format from a file extension (.csv, .ndjson/.jsonl)"""
+    if filename.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+def _read_rows(path: str, fmt: str) -> Iterator[Tuple[int, object]]:
+    """(line number, raw row) pairs; raw row is a dict or a parse error message"""
+    with open(path, newline="", encoding="utf-8-sig") as source:
+        if fmt == "csv":
+            reader = csv.DictReader(source)
+            for row in reader:
+                # Empty cells mean "use the default", as absent NDJSON keys do
+                yield reader.line_num, {key: value for key, value in row.items() if key and value not in ("", None)}
+        else:
+            for line_number, line in enumerate(source, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = orjson.loads(line)
+                except orjson.JSONDecodeError as e:
+                    yield line_number, f"Invalid JSON: {e}"
+                    continue
+                yield line_number, row if isinstance(row, dict) else "Expected a JSON object"
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+def _record(line_number: int, row: TicketImportRow) -> tuple:
+    created_at = row.created_at
+    if created_at is not None and created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    triage = triage_ticket(row.event_summary)
+    return (
+        line_number,
+        row.client_name,
+        row.client_email,
+        row.client_phone,
+        normalize_email(row.client_email),
+        normalize_phone(row.client_phone),
+        row.event_summary,
+        row.urgency_level,
+        triage.urgency,
+        triage.category,
+        row.status,
+        created_at,
+    )
+
+def read_batches(path: str, fmt: str, batch_size: int) -> Iterator[Batch]:
+    """Validated COPY records, row errors and rows read - batch_size rows at a time"""
+    records: List[tuple] = []
+    errors: List[TicketImportError] = []
+    received = 0
+    
+    for line_number, raw in _read_rows(path, fmt):
+        received += 1
+        if isinstance(raw, str):
+            errors.append(TicketImportError(line=line_number, error=raw))
+        else:
+            try:
+                records.append(_record(line_number, TicketImportRow.model_validate(raw)))
+            except ValidationError as e:
+                errors.append(TicketImportError(line=line_number, error=_describe(e)))
+        
+        if received % batch_size == 0:
+            yield records, errors, received
+            records, errors, received = [], [], 0
+    
+    if received:
+        yield records, errors, received
+
+# Duplicate check shared by the hot and archive tables
+_NOT_STORED = """
+    NOT EXISTS (
+        SELECT 1 FROM {table} t
+        WHERE t.client_email = s.client_email
+          AND (s.created_at IS NULL OR t.created_at = s.created_at)
+          AND md5(t.event_summary) = md5(s.event_summary)
+    )
+"""
+
+# One registry entry per staged email - the newest row with a phone supplies the details
+CLIENTS_SQL = f"""
+    INSERT INTO clients (name, email, email_normalized, phone, phone_e164)
+    SELECT DISTINCT ON (s.email_normalized)
+        s.client_name, btrim(s.client_email), s.email_normalized, s.client_phone, s.phone_e164
+    FROM {STAGING_TABLE} s
+    ORDER BY s.email_normalized, s.phone_e164 IS NULL, s.created_at DESC NULLS FIRST, s.line DESC
+    ON CONFLICT (email_normalized) DO UPDATE SET
+        name = coalesce(clients.name, excluded.name),
+        phone = coalesce(clients.phone, excluded.phone),
+        phone_e164 = coalesce(clients.phone_e164, excluded.phone_e164)
+"""
+
+MERGE_SQL = f"""
+    WITH merged AS (
+        INSERT INTO tickets (
+            client_name, client_email, client_phone, client_id, event_summary,
+            urgency_level, suggested_urgency, category, status, created_at, updated_at
+        )
+        SELECT DISTINCT ON (s.client_email, md5(s.event_summary), s.created_at)
+            s.client_name, s.client_email, s.client_phone, c.id, s.event_summary,
+            s.urgency_level, s.suggested_urgency, s.category, s.status,
+            coalesce(s.created_at, now()), coalesce(s.created_at, now())
+        FROM {STAGING_TABLE} s
+        JOIN clients c ON c.email_normalized = s.email_normalized
+        WHERE {_NOT_STORED.format(table="tickets")}
+          AND {_NOT_STORED.format(table="tickets_archive")}
+        ORDER BY s.client_email, md5(s.event_summary), s.created_at, s.line
+        RETURNING 1
+    )
+    SELECT count(*) FROM merged
+"""
+
+async def import_tickets(db: AsyncSession, path: str, fmt: str) -> TicketImportResult:
+    """Import a CSV/NDJSON file of tickets in one transaction"""
+    connection = await db.connection()
+    driver_connection = (await connection.get_raw_connection()).driver_connection
+    
+    await db.execute(text(f"""
+        CREATE TEMP TABLE {STAGING_TABLE} (
+            line integer NOT NULL,
+            client_name text NOT NULL,
+            client_email text NOT NULL,
+            client_phone text NOT NULL,
+            email_normalized text NOT NULL,
+            phone_e164 text,
+            event_summary text NOT NULL,
+            urgency_level text NOT NULL,
+            suggested_urgency text NOT NULL,
+            category text NOT NULL,
+            status text NOT NULL,
+            created_at timestamptz
+        ) ON COMMIT DROP
+    """))
+    
+    received = staged = invalid = 0
+    reported: List[TicketImportError] = []
+    batches = read_batches(path, fmt, settings.TICKET_IMPORT_BATCH_SIZE)
+    
+    try:
+        while True:
+            # Parsing and validation run off the event loop
+            batch = await run_in_threadpool(next, batches, None)
+            if batch is None:
+                break
+            records, errors, rows_read = batch
+            
+            if records:
+                await driver_connection.copy_records_to_table(
+                    STAGING_TABLE,
+                    records=records,
+                    columns=STAGING_COLUMNS
+                )
+            received += rows_read
+            staged += len(records)
+            invalid += len(errors)
+            reported.extend(errors[:MAX_REPORTED_ERRORS - len(reported)])
+    finally:
+        batches.close()
+    
+    inserted = 0
+    if staged:
+        await db.execute(text(f"ANALYZE {STAGING_TABLE}"))
+        await db.execute(text(CLIENTS_SQL))
+        inserted = (await db.execute(text(MERGE_SQL))).scalar_one()
+    if inserted:
+        await publish(db, "tickets.bulk_changed", {"affected": inserted})
+    await db.commit()
+    
+    return TicketImportResult(
+        received=received,
+        inserted=inserted,
+        duplicates=staged - inserted,
+        invalid=invalid,
+        errors=reported
+    )
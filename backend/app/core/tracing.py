@@ -0,0 +1,334 @@
+"""Request tracing - spans for DB statements, SMTP, Turnstile, bcrypt and Redis.
+
+TracingMiddleware opens a trace per request (continuing an incoming W3C
+traceparent) and span() / @traced record child spans through contextvars,
+so nested calls - including ones in threadpool workers and SQLAlchemy's
+greenlets - attach to the right parent. SQL statements are captured with
+engine events (instrument_engine).
+
+Sampling is decided twice. Head: a trace is kept up front with probability
+TRACE_HEAD_SAMPLE_RATE. The caller's traceparent sampled flag is ignored
+unless TRACE_TRUST_REMOTE_SAMPLED - any client can send one, and honouring
+it would let anyone have every request traced and written out. Tail:
+every other trace is still recorded and kept at the end if it was slow
+(TRACE_TAIL_SLOW_MS) or failed. Kept traces are handed to a background
+thread that appends them as JSON lines to TRACE_FILE or POSTs batches to
+TRACE_COLLECTOR_URL. With TRACE_EXPORTER empty, tracing is off and span()
+is a no-op.
+"""
+import functools
+import inspect
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+import orjson
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.logs import held_open, request_id_var
+
+logger = logging.getLogger(__name__)
+
+MAX_SPANS_PER_TRACE = 500
+MAX_STATEMENT_CHARS = 300
+EXPORT_BATCH_SIZE = 50
+EXPORT_INTERVAL_SECONDS = 2
+# version-trace id-parent span id-flags, lowercase hex (W3C Trace Context)
+TRACEPARENT = re.compile(r"([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+
+@dataclass
+class Span:
+    name: str
+    span_id: str
+    parent_id: Optional[str]
+    start: float
+    duration_ms: float = 0.0
+    error: Optional[str] = None
+    attributes: dict = field(default_factory=dict)
+
+@dataclass
+class Trace:
+    trace_id: str
+    head_sampled: bool
+    spans: List[Span] = field(default_factory=list)
+    dropped_spans: int = 0
+    
+    def add(self, span: Span) -> None:
+        # list.append is atomic - spans may finish in threadpool workers
+        if len(self.spans) < MAX_SPANS_PER_TRACE:
+            self.spans.append(span)
+        else:
+            self.dropped_spans += 1
+
+_trace_var: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_span_var: ContextVar[Optional[Span]] = ContextVar("span", default=None)
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+def tracing_enabled() -> bool:
+    return settings.TRACE_EXPORTER in ("file", "http")
+
+def current_trace_id() -> Optional[str]:
+    trace = _trace_var.get()
+    return trace.trace_id if trace else None
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time the block as a child of the current span; no-op outside a trace"""
+    trace = _trace_var.get()
+    if trace is None:
+        yield None
+        return
+    
+    parent = _span_var.get()
+    current = Span(
+        name=name,
+        span_id=_new_id(8),
+        parent_id=parent.span_id if parent else None,
+        start=time.time(),
+        attributes=attributes
+    )
+    token = _span_var.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration_ms = (time.perf_counter() - started) * 1000
+        _span_var.reset(token)
+        trace.add(current)
+
+def traced(name: str):
+    """Decorator form of span() for sync and async functions"""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# SQLAlchemy statements - timed between the cursor events of the sync engine
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _trace_var.get() is not None:
+        context._trace_started = (time.time(), time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_trace_started", None)
+    trace = _trace_var.get()
+    if started is None or trace is None:
+        return
+    parent = _span_var.get()
+    trace.add(Span(
+        name="db.query",
+        span_id=_new_id(8),
+        parent_id=parent.span_id if parent else None,
+        start=started[0],
+        duration_ms=(time.perf_counter() - started[1]) * 1000,
+        attributes={"statement": " ".join(statement.split())[:MAX_STATEMENT_CHARS]}
+    ))
+
+def instrument_engine(engine) -> None:
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+class TraceExporter:
+    """Background thread writing kept traces to a JSONL file or a collector"""
+    
+    def __init__(self):
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+    
+    def submit(self, record: dict) -> None:
+        if self._queue.qsize() >= settings.TRACE_QUEUE_SIZE:
+            self.dropped += 1
+            return
+        self._queue.put_nowait(record)
+    
+    def _write_file(self, batch: List[dict]) -> None:
+        path = Path(settings.TRACE_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Keep one rotated file so the trace log cannot grow without bound
+        if path.exists() and path.stat().st_size > settings.TRACE_FILE_MAX_MB * 1024 * 1024:
+            os.replace(path, path.with_name(path.name + ".1"))
+        with open(path, "ab") as output:
+            for record in batch:
+                output.write(orjson.dumps(record) + b"\n")
+    
+    def _post(self, batch: List[dict]) -> None:
+        import urllib.request
+        
+        request = urllib.request.Request(
+            settings.TRACE_COLLECTOR_URL,
+            data=orjson.dumps(batch),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=5):
+            pass
+    
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            if batch[0] is None:
+                return
+            deadline = time.monotonic() + EXPORT_INTERVAL_SECONDS
+            stop = False
+            while len(batch) < EXPORT_BATCH_SIZE and time.monotonic() < deadline:
+                try:
+                    record = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if record is None:
+                    stop = True
+                    break
+                batch.append(record)
+            try:
+                if settings.TRACE_EXPORTER == "http":
+                    self._post(batch)
+                else:
+                    self._write_file(batch)
+            except Exception as e:
+                logger.warning("Trace export failed", extra={"traces": len(batch), "error": str(e)})
+            if stop:
+                return
+    
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+            self._thread.start()
+    
+    def stop(self) -> None:
+        """Flush what is queued, then stop"""
+        if self._thread is not None:
+            self._queue.put_nowait(None)
+            self._thread.join(timeout=10)
+            self._thread = None
+
+exporter = TraceExporter()
+
+def _parse_traceparent(value: str):
+    """(trace_id, parent span id, sampled) from a W3C traceparent header;
+    None unless it is a well-formed version 00 header"""
+    match = TRACEPARENT.fullmatch(value.strip())
+    if match is None:
+        return None
+    version, trace_id, parent_id, flags = match.groups()
+    if version != "00" or trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, int(flags, 16) & 1 == 1
+
+class TracingMiddleware:
+    """Pure ASGI middleware - one trace per HTTP request, root span = the route"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        incoming = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                incoming = _parse_traceparent(value.decode("latin-1"))
+                break
+        
+        head_sampled = random.random() < settings.TRACE_HEAD_SAMPLE_RATE
+        if incoming:
+            trace_id, remote_parent, remote_sampled = incoming
+            head_sampled = head_sampled or (remote_sampled and settings.TRACE_TRUST_REMOTE_SAMPLED)
+        else:
+            trace_id, remote_parent = _new_id(16), None
+        
+        trace = Trace(trace_id=trace_id, head_sampled=head_sampled)
+        root = Span(name="http.request", span_id=_new_id(8), parent_id=remote_parent, start=time.time())
+        trace_token = _trace_var.set(trace)
+        span_token = _span_var.set(root)
+        status_code = 500
+        streaming = False
+        started = time.perf_counter()
+        
+        async def send_with_trace_id(message):
+            nonlocal status_code, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                streaming = held_open(scope, headers)
+                message["headers"] = headers + [(b"x-trace-id", trace_id.encode())]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            root.duration_ms = (time.perf_counter() - started) * 1000
+            _span_var.reset(span_token)
+            _trace_var.reset(trace_token)
+            
+            route = scope.get("route")
+            root.attributes = {
+                "method": scope["method"],
+                "route": getattr(route, "path", scope["path"]),
+                "status": status_code,
+            }
+            failed = status_code >= 500 or root.error is not None
+            slow = root.duration_ms >= settings.TRACE_TAIL_SLOW_MS and not streaming
+            if trace.head_sampled or failed or slow:
+                exporter.submit({
+                    "trace_id": trace_id,
+                    "request_id": request_id_var.get(),
+                    "name": f"{scope['method']} {root.attributes['route']}",
+                    "duration_ms": round(root.duration_ms, 3),
+                    "status": status_code,
+                    "sampled_by": "head" if trace.head_sampled else ("error" if failed else "slow"),
+                    "dropped_spans": trace.dropped_spans,
+                    "spans": [
+                        {
+                            "name": item.name,
+                            "span_id": item.span_id,
+                            "parent_id": item.parent_id,
+                            "start": item.start,
+                            "duration_ms": round(item.duration_ms, 3),
+                            "error": item.error,
+                            "attributes": item.attributes,
+                        }
+                        for item in [root, *trace.spans]
+                    ],
+                })
+
+def init_sentry() -> None:
+    """Report errors (and head-sampled transactions) to Sentry when SENTRY_DSN is set"""
+    if not settings.SENTRY_DSN:
+        return
+    import sentry_sdk  # deferred - only deployments with a DSN pay for the import
+    
+    sentry_sdk.init(
+        dsn=settings.SENTRY_DSN,
+        environment=settings.SENTRY_ENVIRONMENT,
+        traces_sample_rate=settings.TRACE_HEAD_SAMPLE_RATE,
+        send_default_pii=False
+    )
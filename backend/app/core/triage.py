@@ -0,0 +1,383 @@
+"""Intake triage - suggested urgency and category for a ticket's event summary.
+
+The Hebrew, Russian and English term lists below are compiled once into an
+Aho-Corasick automaton, so one pass over the text finds every term,
+whatever the dictionary size. Terms are stems and match at the start of a
+word. Hebrew terms may also follow one to three attached prefix letters
+(ו, ה, ב, ל, מ, ש, כ). Each distinct term found adds its urgency points and
+one point to its category. The category with the most points wins, and
+the urgency points map to Low / Medium / High.
+
+This is a suggestion for the lawyer's triage - urgency_level remains what
+the client chose.
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+# Only the start of very long summaries is read - triage stays O(1) per ticket
+MAX_TEXT_CHARS = 20000
+
+HIGH_SCORE = 5
+MEDIUM_SCORE = 2
+DEFAULT_CATEGORY = "general"
+
+HEBREW_PREFIXES = set("והבלמשכ")
+MAX_HEBREW_PREFIX = 3
+
+# (term, category or None for pure urgency cues, urgency points)
+TERMS: List[Tuple[str, Optional[str], int]] = [
+    # Hebrew
+    ("מעצר", "criminal", 5),
+    ("נעצר", "criminal", 5),
+    ("עצור", "criminal", 5),
+    ("חקירה", "criminal", 3),
+    ("זימון לחקירה", "criminal", 3),
+    ("משטרה", "criminal", 2),
+    ("כתב אישום", "criminal", 3),
+    ("חשוד", "criminal", 2),
+    ("פלילי", "criminal", 2),
+    ("אלימות", "criminal", 3),
+    ("צו הרחקה", "family", 5),
+    ("גירושין", "family", 0),
+    ("גירושים", "family", 0),
+    ("גט", "family", 0),
+    ("משמורת", "family", 1),
+    ("מזונות", "family", 0),
+    ("הסכם ממון", "family", 0),
+    ("ירושה", "family", 0),
+    ("צוואה", "family", 0),
+    ("אפוטרופס", "family", 1),
+    ("פיטורים", "labor", 1),
+    ("פוטרתי", "labor", 1),
+    ("פיטרו", "labor", 1),
+    ("שימוע", "labor", 2),
+    ("משכורת", "labor", 0),
+    ("שכר", "labor", 0),
+    ("פיצויי פיטורים", "labor", 0),
+    ("מעסיק", "labor", 0),
+    ("מעביד", "labor", 0),
+    ("שכירות", "real_estate", 0),
+    ("משכיר", "real_estate", 0),
+    ("שוכר", "real_estate", 0),
+    ("פינוי", "real_estate", 5),
+    ("טאבו", "real_estate", 0),
+    ("קבלן", "real_estate", 0),
+    ("ליקויי בנייה", "real_estate", 0),
+    ("חוב", "debt", 0),
+    ("הוצאה לפועל", "debt", 2),
+    ("עיקול", "debt", 3),
+    ("פשיטת רגל", "debt", 2),
+    ("חדלות פירעון", "debt", 2),
+    ("הלוואה", "debt", 0),
+    ("תאונה", "injury", 1),
+    ("תאונת דרכים", "injury", 1),
+    ("פציעה", "injury", 1),
+    ("נזקי גוף", "injury", 0),
+    ("ביטוח", "injury", 0),
+    ("רשלנות רפואית", "injury", 0),
+    ("גירוש", "immigration", 5),
+    ("ויזה", "immigration", 0),
+    ("אשרה", "immigration", 0),
+    ("משרד הפנים", "immigration", 0),
+    ("אזרחות", "immigration", 0),
+    ("דחוף", None, 3),
+    ("בדחיפות", None, 3),
+    ("מיידי", None, 3),
+    ("מחר", None, 2),
+    ("היום", None, 2),
+    ("דיון", None, 2),
+    ("מועד אחרון", None, 3),
+    ("איום", None, 3),
+    ("מאיים", None, 3),
+    # Russian
+    ("арест", "criminal", 5),
+    ("задерж", "criminal", 5),
+    ("допрос", "criminal", 3),
+    ("полиц", "criminal", 2),
+    ("обвинени", "criminal", 2),
+    ("уголовн", "criminal", 2),
+    ("подозрева", "criminal", 2),
+    ("насили", "criminal", 3),
+    ("запретительн", "family", 5),
+    ("развод", "family", 0),
+    ("опек", "family", 1),
+    ("алимент", "family", 0),
+    ("наследств", "family", 0),
+    ("завещани", "family", 0),
+    ("брачн", "family", 0),
+    ("уволи", "labor", 1),
+    ("увольнени", "labor", 1),
+    ("зарплат", "labor", 0),
+    ("заработн", "labor", 0),
+    ("работодател", "labor", 0),
+    ("выходное пособие", "labor", 0),
+    ("аренд", "real_estate", 0),
+    ("арендодател", "real_estate", 0),
+    ("выселени", "real_estate", 5),
+    ("выселя", "real_estate", 5),
+    ("застройщик", "real_estate", 0),
+    ("долг", "debt", 0),
+    ("взыскани", "debt", 2),
+    ("судебный исполнител", "debt", 3),
+    ("банкротств", "debt", 2),
+    ("кредит", "debt", 0),
+    ("авари", "injury", 1),
+    ("дтп", "injury", 1),
+    ("травм", "injury", 1),
+    ("страхов", "injury", 0),
+    ("халатност", "injury", 0),
+    ("депортац", "immigration", 5),
+    ("виза", "immigration", 0),
+    ("гражданств", "immigration", 0),
+    ("срочно", None, 3),
+    ("немедленно", None, 3),
+    ("завтра", None, 2),
+    ("сегодня", None, 2),
+    ("заседани", None, 2),
+    ("крайний срок", None, 3),
+    ("угрож", None, 3),
+    ("угроз", None, 3),
+    # English
+    ("arrest", "criminal", 5),
+    ("detained", "criminal", 5),
+    ("detention", "criminal", 5),
+    ("in custody", "criminal", 5),
+    ("interrogat", "criminal", 3),
+    ("police", "criminal", 2),
+    ("charged with", "criminal", 2),
+    ("indictment", "criminal", 3),
+    ("criminal", "criminal", 2),
+    ("suspect", "criminal", 2),
+    ("violence", "criminal", 3),
+    ("assault", "criminal", 3),
+    ("restraining order", "family", 5),
+    ("protective order", "family", 5),
+    ("divorce", "family", 0),
+    ("custody", "family", 1),
+    ("alimony", "family", 0),
+    ("child support", "family", 0),
+    ("prenup", "family", 0),
+    ("inherit", "family", 0),
+    ("probate", "family", 0),
+    ("guardianship", "family", 1),
+    ("fired", "labor", 1),
+    ("dismiss", "labor", 1),
+    ("laid off", "labor", 1),
+    ("wrongful termination", "labor", 1),
+    ("salary", "labor", 0),
+    ("wage", "labor", 0),
+    ("severance", "labor", 0),
+    ("employer", "labor", 0),
+    ("lease", "real_estate", 0),
+    ("landlord", "real_estate", 0),
+    ("tenant", "real_estate", 0),
+    ("rent", "real_estate", 0),
+    ("evict", "real_estate", 5),
+    ("contractor", "real_estate", 0),
+    ("mortgage", "real_estate", 0),
+    ("debt", "debt", 0),
+    ("collection agenc", "debt", 1),
+    ("bankrupt", "debt", 2),
+    ("insolven", "debt", 2),
+    ("garnish", "debt", 3),
+    ("lien", "debt", 2),
+    ("foreclos", "debt", 3),
+    ("loan", "debt", 0),
+    ("accident", "injury", 1),
+    ("injur", "injury", 1),
+    ("insurance", "injury", 0),
+    ("malpractice", "injury", 0),
+    ("negligen", "injury", 0),
+    ("deport", "immigration", 5),
+    ("visa", "immigration", 0),
+    ("citizenship", "immigration", 0),
+    ("residency", "immigration", 0),
+    ("urgent", None, 3),
+    ("asap", None, 3),
+    ("immediately", None, 3),
+    ("emergency", None, 3),
+    ("tomorrow", None, 2),
+    ("today", None, 2),
+    ("hearing", None, 2),
+    ("court date", None, 2),
+    ("deadline", None, 3),
+    ("threat", None, 3),
+]
+
+def normalize(value: str) -> str:
+    """Casefold, fold ё to е and collapse whitespace so multi-word terms match"""
+    return " ".join(value[:MAX_TEXT_CHARS].casefold().replace("ё", "е").split())
+
+class KeywordMatcher:
+    """Aho-Corasick automaton - finds all terms in one pass over the text"""
+    
+    def __init__(self, terms: Iterable[str]):
+        self.terms: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+        
+        for term in terms:
+            self._insert(normalize(term))
+        self._link()
+    
+    def _insert(self, term: str) -> None:
+        state = 0
+        for char in term:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] += (len(self.terms),)
+        self.terms.append(term)
+    
+    def _link(self) -> None:
+        # Breadth-first, so a state's failure target is linked before it
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, next_state in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+                pending.append(next_state)
+    
+    @property
+    def states(self) -> int:
+        return len(self._goto)
+    
+    def find(self, text: str) -> Iterator[Tuple[int, int]]:
+        """(start offset, term index) for every occurrence in normalized text"""
+        goto, fail, output, terms = self._goto, self._fail, self._output, self.terms
+        state = 0
+        for position, char in enumerate(text):
+            next_state = goto[state].get(char)
+            while next_state is None:
+                if not state:
+                    next_state = 0
+                    break
+                state = fail[state]
+                next_state = goto[state].get(char)
+            state = next_state
+            if output[state]:
+                for index in output[state]:
+                    yield position - len(terms[index]) + 1, index
+
+def _at_word_start(text: str, start: int) -> bool:
+    if start == 0 or not text[start - 1].isalnum():
+        return True
+    # Hebrew attaches prepositions and conjunctions to the word: ובמעצר, שהמשטרה
+    prefix_start = start
+    while prefix_start > 0 and start - prefix_start < MAX_HEBREW_PREFIX and text[prefix_start - 1] in HEBREW_PREFIXES:
+        prefix_start -= 1
+    return prefix_start < start and (prefix_start == 0 or not text[prefix_start - 1].isalnum())
+
+@dataclass
+class Triage:
+    urgency: str
+    category: str
+    score: int
+    terms: List[str] = field(default_factory=list)
+
+class TicketTriage:
+    def __init__(self, terms: List[Tuple[str, Optional[str], int]]):
+        self.matcher = KeywordMatcher(term for term, _, _ in terms)
+        self.rules = [(category, points) for _, category, points in terms]
+    
+    def classify(self, text: str) -> Triage:
+        text = normalize(text)
+        found = {index for start, index in self.matcher.find(text) if _at_word_start(text, start)}
+        
+        score = 0
+        categories: Dict[str, int] = {}
+        for index in sorted(found):
+            category, points = self.rules[index]
+            score += points
+            if category:
+                categories[category] = categories.get(category, 0) + 1
+        
+        if score >= HIGH_SCORE:
+            urgency = "High"
+        elif score >= MEDIUM_SCORE:
+            urgency = "Medium"
+        else:
+            urgency = "Low"
+        # Ties go to the category whose term comes first in TERMS
+        category = max(categories, key=categories.get) if categories else DEFAULT_CATEGORY
+        
+        return Triage(
+            urgency=urgency,
+            category=category,
+            score=score,
+            terms=sorted(self.matcher.terms[index] for index in found)
+        )
+
+@lru_cache(maxsize=1)
+def get_triage() -> TicketTriage:
+    """Compiled once per process (and ahead of traffic by the startup warmup)"""
+    return TicketTriage(TERMS)
+
+def triage_ticket(event_summary: str) -> Triage:
+    return get_triage().classify(event_summary)
+
+def _classify_batch(rows) -> list:
+    results = []
+    for row in rows:
+        triage = triage_ticket(row.event_summary)
+        results.append((row.id, triage.urgency, triage.category))
+    return results
+
+async def reclassify_tickets(db: AsyncSession, table: str, batch_size: int, only_missing: bool = False) -> Tuple[int, int]:
+    """Re-run triage over a ticket table in id order; returns (scanned, changed).
+    Each batch is one UPDATE ... FROM unnest() and its own transaction;
+    updated_at is left alone so retention is not affected."""
+    missing = "AND suggested_urgency IS NULL" if only_missing else ""
+    scanned = changed = 0
+    after = 0
+    while True:
+        result = await db.execute(
+            text(f"""
+                SELECT id, event_summary FROM {table}
+                WHERE id > :after {missing}
+                ORDER BY id
+                LIMIT :batch_size
+            """),
+            {"after": after, "batch_size": batch_size}
+        )
+        rows = result.fetchall()
+        if not rows:
+            return scanned, changed
+        
+        classified = await run_in_threadpool(_classify_batch, rows)
+        result = await db.execute(
+            text(f"""
+                UPDATE {table} t
+                SET suggested_urgency = v.urgency, category = v.category
+                FROM unnest(
+                    CAST(:ids AS integer[]), CAST(:urgencies AS text[]), CAST(:categories AS text[])
+                ) AS v(id, urgency, category)
+                WHERE t.id = v.id
+                  AND (t.suggested_urgency IS DISTINCT FROM v.urgency OR t.category IS DISTINCT FROM v.category)
+            """),
+            {
+                "ids": [item[0] for item in classified],
+                "urgencies": [item[1] for item in classified],
+                "categories": [item[2] for item in classified],
+            }
+        )
+        await db.commit()
+        
+        scanned += len(rows)
+        changed += result.rowcount
+        after = rows[-1].id
@@ -0,0 +1,86 @@
+"""Pre-traffic warmup, started in the background by the app lifespan.
+
+Everything the first requests would otherwise pay for - opening DB
+connections (and asyncpg's per-connection type introspection), compiling
+and preparing the hot statements, compiling email templates and the triage
+matcher, loading the bcrypt backend and the JWT library - happens here, before /ready starts
+returning 200. The server already accepts connections meanwhile, so /ready
+answers 503 while warmup runs. A failed warmup (say the DB is unreachable)
+is retried every RETRY_SECONDS, and /ready stays 503 until one succeeds.
+"""
+import asyncio
+import logging
+import time
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+from app.core.database import engine, AsyncSessionLocal
+from app.core.feeds import feeds_built, rebuild_feeds
+from app.core.config import settings
+from app.models import User, Ticket, ChatMessage, Article
+
+RETRY_SECONDS = 5
+
+logger = logging.getLogger(__name__)
+
+def _hot_statements() -> list:
+    """Representative lookups for the busiest endpoints (match no rows)"""
+    return [
+        select(User).where(User.email == ""),
+        select(User).where(User.id == -1),
+        select(Ticket).where(Ticket.id == -1),
+        select(Ticket).order_by(Ticket.created_at.desc()).limit(0),
+        select(ChatMessage).where(ChatMessage.conversation_id == -1).order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc()).limit(0),
+        select(Article).where(Article.slug == ""),
+    ]
+
+async def _warm_connection() -> None:
+    async with engine.connect() as connection:
+        for statement in _hot_statements():
+            await connection.execute(statement)
+
+async def warm_db_pool() -> None:
+    """Open pool_size connections concurrently and prepare hot statements on each"""
+    await asyncio.gather(*[_warm_connection() for _ in range(settings.DB_POOL_SIZE)])
+
+def warm_cpu_paths() -> None:
+    """Compile templates and the triage matcher, load the bcrypt backend and
+    the JWT library, and settle the hashing cost (calibrates here unless
+    BCRYPT_ROUNDS is set)"""
+    import jose.jwt
+    from app.core.email import compile_templates
+    from app.core.security import get_pwd_context
+    from app.core.triage import get_triage
+    
+    compile_templates()
+    get_triage()
+    get_pwd_context().handler("bcrypt").get_backend()
+
+async def ensure_feeds() -> None:
+    """Build the blog sitemap/feeds on first start; afterwards they are incremental"""
+    if not feeds_built():
+        async with AsyncSessionLocal() as db:
+            await rebuild_feeds(db)
+
+async def warmup() -> float:
+    """Run the full warmup; returns the elapsed seconds"""
+    started = time.perf_counter()
+    # In a thread - bcrypt calibration would otherwise stall the probes
+    await run_in_threadpool(warm_cpu_paths)
+    await warm_db_pool()
+    await ensure_feeds()
+    return time.perf_counter() - started
+
+async def warm_until_ready(state) -> None:
+    """Run warmup until it succeeds, then mark state ready"""
+    attempt = 1
+    while True:
+        try:
+            elapsed = await warmup()
+        except Exception:
+            logger.exception("Warmup failed, retrying", extra={"attempt": attempt, "retry_in_s": RETRY_SECONDS})
+            attempt += 1
+            await asyncio.sleep(RETRY_SECONDS)
+            continue
+        state.ready = True
+        logger.info("Warmup completed", extra={"elapsed_s": round(elapsed, 2), "attempt": attempt})
+        return
@@ -1,36 +1,96 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi_limiter import FastAPILimiter
-from fastapi_limiter.depends import RateLimiter
 import redis.asyncio as redis
 from contextlib import asynccontextmanager
+import asyncio
+import logging
 
+from app.core.admission import AdmissionControlMiddleware
+from app.core.compression import SelectiveGZipMiddleware
 from app.core.config import settings
-from app.routers import tickets, auth, chat, blog
+from app.core.dashboard import dashboard_refresher
+from app.core.database import engine
+from app.core.dedup import dedup_index
+from app.core.events import event_bus
+from app.core.logs import RequestContextMiddleware, setup_logging
+from app.core.ratelimit import RateLimiter
+from app.core.related import related_articles
+from app.core.revocation import revocations
+from app.core.tracing import TracingMiddleware, exporter, init_sentry, instrument_engine, tracing_enabled
+from app.core.warmup import warm_until_ready
+from app.routers import tickets, auth, chat, blog, admin, feeds, attachments
+
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
+    # Startup - logging first, so every later failure is reported
+    log_listener = setup_logging()
+    init_sentry()
+    if tracing_enabled():
+        exporter.start()
+    
     try:
         # Initialize Redis for rate limiting
-        redis_client = redis.from_url("redis://localhost:6379", encoding="utf-8", decode_responses=True)
+        redis_client = redis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
         await FastAPILimiter.init(redis_client)
+        # Share token revocations across workers
+        await revocations.start(redis_client)
     except Exception as e:
-        print(f"Redis connection failed: {e}")
-        print("Rate limiting disabled")
+        # init stores the client before it fails - clear it so limited routes skip the check
+        FastAPILimiter.redis = None
+        logger.warning(
+            "Redis connection failed - rate limiting and cross-worker token revocation disabled",
+            extra={"error": str(e)}
+        )
+    
+    # Cross-worker change notifications (live ticket feed, chat wake-ups)
+    event_bus.start()
+    
+    # Near-duplicate ticket index - loads its snapshot and catches up in the background
+    dedup_index.start()
+    
+    # Keep the admin dashboard counters fresh in the background
+    dashboard_task = asyncio.create_task(dashboard_refresher())
+    
+    # Warm DB connections, hot statements and templates in the background -
+    # /ready reports 503 until it succeeds
+    app.state.ready = False
+    warmup_task = asyncio.create_task(warm_until_ready(app.state))
     
     yield
     
-    # Shutdown
-    await FastAPILimiter.close()
+    # Shutdown - stop receiving traffic from the load balancer first
+    app.state.ready = False
+    for task in (warmup_task, dashboard_task):
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    await event_bus.stop()
+    await dedup_index.stop()
+    await related_articles.stop()
+    await revocations.stop()
+    if FastAPILimiter.redis is not None:
+        await FastAPILimiter.close()
+    exporter.stop()
+    log_listener.stop()
 
 app = FastAPI(
     title=settings.APP_NAME,
     description="Legal Office System MVP - Ticket submission, chat, and blog management",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
+# Admission control - innermost, so shed 503s still get CORS headers and request ids
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -38,13 +98,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Chat-Cursor", "X-Request-ID", "X-Trace-Id", "Retry-After"],
 )
 
+# Compress larger responses (article and ticket listings) - not attachment files
+app.add_middleware(SelectiveGZipMiddleware, exclude_prefixes=("/attachments/",), minimum_size=1024, compresslevel=5)
+
+# Traces with spans for SQL, SMTP, Turnstile, bcrypt and rate-limit checks
+if tracing_enabled():
+    instrument_engine(engine)
+    app.add_middleware(TracingMiddleware)
+
+# Request ids and sampled access log - outermost, so it times the whole request
+app.add_middleware(RequestContextMiddleware)
+
 # Include routers
 app.include_router(tickets.router)
 app.include_router(auth.router)
 app.include_router(chat.router)
 app.include_router(blog.router)
+app.include_router(admin.router)
+app.include_router(feeds.router)
+app.include_router(attachments.router)
 
 @app.get("/")
 async def root():
@@ -56,11 +131,20 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    """Liveness - the process is up"""
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """Readiness - warmup finished and the worker is not shutting down"""
+    if not getattr(app.state, "ready", False):
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "starting"}
+    return {"status": "ready"}
+
 # Rate limited endpoint example
-@app.get("/api/limited")
-async def limited_endpoint(ratelimit: dict = RateLimiter(times=10, seconds=60)):
+@app.get("/api/limited", dependencies=[Depends(RateLimiter(times=10, seconds=60))])
+async def limited_endpoint():
     return {"message": "This endpoint is rate limited"}
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import Integer, String, DateTime, Boolean, Text, ForeignKey, func
+from sqlalchemy import BigInteger, Computed, Integer, SmallInteger, String, DateTime, Boolean, Float, Text, ForeignKey, Index, func, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.database import Base
 
@@ -15,28 +16,95 @@ class User(Base):
     full_name: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     role: Mapped[str] = mapped_column(String, default="client", nullable=False)  # "client" or "admin"
     
+    # Bumped to invalidate every token issued to this user (logout-all, demotion, deletion)
+    token_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    
+    # Client registry entry (app.core.clients) - client accounts only
+    client_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("clients.id"), index=True, nullable=True)
+    
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     messages: Mapped[List["ChatMessage"]] = relationship("ChatMessage", back_populates="user")
 
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    
+    jti: Mapped[str] = mapped_column(String, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    revoked_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    replaced_by: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # jti of the rotated token
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+class Client(Base):
+    """One person across tickets and chat accounts (app.core.clients)"""
+    __tablename__ = "clients"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    
+    # As last submitted, and the normalized lookup keys
+    email: Mapped[str] = mapped_column(String, nullable=False)
+    email_normalized: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
+    phone: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    phone_e164: Mapped[Optional[str]] = mapped_column(String, index=True, nullable=True)
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class Ticket(Base):
     __tablename__ = "tickets"
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     
-    # Client info
+    # Client info - as submitted; client_id is the registry entry
     client_name: Mapped[str] = mapped_column(String, nullable=False)
     client_email: Mapped[str] = mapped_column(String, nullable=False)
     client_phone: Mapped[str] = mapped_column(String, nullable=False)
+    client_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("clients.id"), nullable=True)
     
     # Ticket content
     event_summary: Mapped[str] = mapped_column(Text, nullable=False)
     urgency_level: Mapped[str] = mapped_column(String, default="Low")
     status: Mapped[str] = mapped_column(String, default="New")  # New, Reviewed, Closed
     
+    # Intake triage (app.core.triage) - suggestions from the summary's wording
+    suggested_urgency: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    category: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    
+    # Near-duplicate of an earlier ticket (app.core.dedup) - no FK, originals get archived
+    duplicate_of_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("ix_tickets_status_updated_at", "status", "updated_at"),
+        Index("ix_tickets_created_at", "created_at"),
+        Index("ix_tickets_client_email_created_at", "client_email", "created_at"),
+        Index("ix_tickets_duplicate_of_id", "duplicate_of_id", postgresql_where=text("duplicate_of_id IS NOT NULL")),
+        Index("ix_tickets_client_id_created_at", "client_id", "created_at"),
+    )
+
+class Conversation(Base):
+    __tablename__ = "conversations"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    
+    # One conversation per client; admin replies go into the client's conversation
+    client_user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), unique=True, index=True, nullable=False)
+    
+    # Maintained on every message so the inbox never aggregates chat_messages
+    message_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    last_message_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), index=True, nullable=True)
+    
+    # Bumped on every new message or status change - the delta sync cursor
+    version: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
@@ -46,6 +114,17 @@ class ChatMessage(Base):
     # Message content
     message: Mapped[str] = mapped_column(Text, nullable=False)
     
+    # Full-text search (GET /chat/search) - 'simple' config: no stemming, messages mix he/ru/en.
+    # Generated by Postgres, hot table only; deferred so normal loads skip it.
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed("to_tsvector('simple', message)", persisted=True),
+        deferred=True
+    )
+    
+    # Conversation (client thread) the message belongs to
+    conversation_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=True)
+    
     # Sender identification
     user_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("users.id"), nullable=True)
     is_from_admin: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
@@ -53,10 +132,91 @@ class ChatMessage(Base):
     # Status
     status: Mapped[str] = mapped_column(String, default="sent", nullable=False)  # sent, read
     
+    # Conversation version at which this message was created or last changed
+    version: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     user: Mapped[Optional["User"]] = relationship("User", back_populates="messages")
+    
+    __table_args__ = (
+        Index("ix_chat_messages_created_at", "created_at"),
+        Index("ix_chat_messages_conversation_created", "conversation_id", "created_at", "id"),
+        Index("ix_chat_messages_conversation_version", "conversation_id", "version"),
+        # btree_gin - one index serves searches within a conversation and across all of them
+        Index("ix_chat_messages_search", "conversation_id", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_chat_messages_unread",
+            "user_id",
+            postgresql_where=text("status = 'sent' AND is_from_admin = false")
+        ),
+    )
+
+class Attachment(Base):
+    __tablename__ = "attachments"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    
+    # Owner - a ticket or a chat message. No foreign keys: retention moves both
+    # to archive tables under the same id and attachments stay reachable.
+    ticket_id: Mapped[Optional[int]] = mapped_column(Integer, index=True, nullable=True)
+    message_id: Mapped[Optional[int]] = mapped_column(Integer, index=True, nullable=True)
+    uploaded_by: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    
+    # Blob key - identical files share one file on disk (see app.core.attachments)
+    sha256: Mapped[str] = mapped_column(String(64), index=True, nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    filename: Mapped[str] = mapped_column(String, nullable=False)
+    content_type: Mapped[str] = mapped_column(String, nullable=False)
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+# Archive tables - range-partitioned by created_at (see alembic 0002).
+# Rows are moved here by app.core.retention and are read-only afterwards.
+class ArchivedTicket(Base):
+    __tablename__ = "tickets_archive"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    
+    client_name: Mapped[str] = mapped_column(String, nullable=False)
+    client_email: Mapped[str] = mapped_column(String, nullable=False)
+    client_phone: Mapped[str] = mapped_column(String, nullable=False)
+    client_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    
+    event_summary: Mapped[str] = mapped_column(Text, nullable=False)
+    urgency_level: Mapped[str] = mapped_column(String)
+    status: Mapped[str] = mapped_column(String)
+    suggested_urgency: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    category: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    duplicate_of_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_tickets_archive_client_email_created_at", "client_email", "created_at"),
+        Index("ix_tickets_archive_client_id_created_at", "client_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+class ArchivedChatMessage(Base):
+    __tablename__ = "chat_messages_archive"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    
+    message: Mapped[str] = mapped_column(Text, nullable=False)
+    conversation_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    user_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    is_from_admin: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False)
+    version: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
+    
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
 class Article(Base):
     __tablename__ = "articles"
@@ -77,4 +237,14 @@ class Article(Base):
     meta_description: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
\ No newline at end of file
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class ArticleRelated(Base):
+    """Precomputed related-article neighbours (app.core.related), rank 0 is the closest"""
+    __tablename__ = "article_related"
+    
+    article_id: Mapped[int] = mapped_column(Integer, ForeignKey("articles.id", ondelete="CASCADE"), primary_key=True)
+    rank: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    # No foreign key - rows pointing at a deleted article are replaced when its neighbours are recomputed
+    related_id: Mapped[int] = mapped_column(Integer, index=True, nullable=False)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
@@ -0,0 +1,186 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text, update
+from app.core.clients import normalize_email, normalize_phone
+from app.core.database import get_db
+from app.core.dependencies import get_admin_user
+from app.core.retention import ticket_source
+from app.core.serialization import columns_for, rows_response
+from app.models import Client, Conversation, Ticket, ChatMessage, User
+from app.schemas import (
+    ArticlePublishStats,
+    ClientHistoryResponse,
+    ClientResponse,
+    DashboardResponse,
+    TicketResponse,
+    TokenData,
+    UserResponse
+)
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+RECENT_ITEMS_LIMIT = 5
+
+@router.get("/dashboard", response_model=DashboardResponse)
+async def get_dashboard(
+    current_user: TokenData = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Admin only - Dashboard counters and recent items in one round trip"""
+    # Counters are read from the periodically refreshed materialized view
+    result = await db.execute(
+        text("SELECT metric, key, value, refreshed_at FROM admin_dashboard_stats")
+    )
+    
+    dashboard = {
+        "tickets_by_status": {},
+        "tickets_by_urgency": {},
+        "unread_messages": 0,
+        "unread_conversations": 0,
+        "total_clients": 0,
+        "articles_by_language": {},
+        "refreshed_at": None
+    }
+    for metric, key, value, refreshed_at in result.fetchall():
+        dashboard["refreshed_at"] = refreshed_at
+        if metric == "ticket_status":
+            dashboard["tickets_by_status"][key] = value
+        elif metric == "ticket_urgency":
+            dashboard["tickets_by_urgency"][key] = value
+        elif metric == "chat_unread":
+            dashboard[f"unread_{key}"] = value
+        elif metric == "clients":
+            dashboard["total_clients"] = value
+        elif metric in ("articles_published", "articles_draft"):
+            stats = dashboard["articles_by_language"].setdefault(key, ArticlePublishStats())
+            setattr(stats, metric.removeprefix("articles_"), value)
+    
+    # Recent items are small index scans on created_at
+    recent_tickets = await db.execute(
+        select(Ticket).order_by(Ticket.created_at.desc()).limit(RECENT_ITEMS_LIMIT)
+    )
+    recent_messages = await db.execute(
+        select(ChatMessage).order_by(ChatMessage.created_at.desc()).limit(RECENT_ITEMS_LIMIT)
+    )
+    dashboard["recent_tickets"] = recent_tickets.scalars().all()
+    dashboard["recent_messages"] = recent_messages.scalars().all()
+    
+    return dashboard
+
+@router.get("/clients", response_model=List[ClientResponse])
+async def find_clients(
+    email: Optional[str] = None,
+    phone: Optional[str] = None,
+    limit: int = 50,
+    offset: int = 0,
+    current_user: TokenData = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Admin only - Clients by email or current phone (any format), newest first"""
+    query = select(*columns_for(Client, ClientResponse))
+    
+    if email:
+        query = query.where(Client.email_normalized == normalize_email(email))
+    if phone:
+        phone_e164 = normalize_phone(phone)
+        if phone_e164 is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid phone number"
+            )
+        query = query.where(Client.phone_e164 == phone_e164)
+    
+    query = query.order_by(Client.id.desc()).offset(offset).limit(limit)
+    
+    result = await db.execute(query)
+    
+    return rows_response(result)
+
+@router.get("/clients/{client_id}", response_model=ClientHistoryResponse)
+async def get_client_history(
+    client_id: int,
+    limit: int = 100,
+    include_archived: bool = False,
+    current_user: TokenData = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Admin only - A client's accounts, tickets (newest `limit`) and conversations.
+    
+    Every part is an index lookup on client_id - no matching on names or emails.
+    """
+    client = await db.get(Client, client_id)
+    
+    if not client:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client not found"
+        )
+    
+    source = ticket_source(include_archived)
+    tickets = await db.execute(
+        select(*columns_for(source, TicketResponse))
+        .where(source.client_id == client_id)
+        .order_by(source.created_at.desc())
+        .limit(limit)
+    )
+    users = await db.execute(
+        select(User).where(User.client_id == client_id).order_by(User.created_at.desc())
+    )
+    conversations = await db.execute(
+        select(
+            User.id,
+            Conversation.id.label("conversation_id"),
+            User.full_name,
+            User.email,
+            Conversation.message_count,
+            Conversation.last_message_at
+        )
+        .join(User, User.id == Conversation.client_user_id)
+        .where(User.client_id == client_id)
+        .order_by(Conversation.last_message_at.desc().nulls_last())
+    )
+    
+    return {
+        "client": client,
+        "users": users.scalars().all(),
+        "tickets": [dict(row) for row in tickets.mappings()],
+        "conversations": [dict(row) for row in conversations.mappings()]
+    }
+
+@router.put("/clients/{client_id}/users/{user_id}", response_model=UserResponse)
+async def link_client_user(
+    client_id: int,
+    user_id: int,
+    current_user: TokenData = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Admin only - Link a client account to a registry entry once the admin has confirmed who it belongs to.
+    
+    The link grants the account access to the client's ticket attachments.
+    """
+    client = await db.get(Client, client_id)
+    
+    if not client:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client not found"
+        )
+    
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id, User.role == "client")
+        .values(client_id=client_id)
+        .returning(User)
+    )
+    user = result.scalar_one_or_none()
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client account not found"
+        )
+    
+    await db.commit()
+    
+    return user
@@ -0,0 +1,219 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, exists
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.core.attachments import blob_path, lock_blobs, receive_upload, remove_blob
+from app.core.database import get_db
+from app.core.dependencies import get_current_user, get_admin_user
+from app.core.retention import chat_message_source, ticket_source
+from app.core.serialization import columns_for, rows_response
+from app.models import Attachment, Conversation, User
+from app.schemas import AttachmentResponse, TokenData
+
+router = APIRouter(prefix="/attachments", tags=["Attachments"])
+
+async def check_ticket_access(db: AsyncSession, ticket_id: int, current_user: TokenData) -> None:
+    """Admins, or a client account an admin linked to the ticket's client.
+    
+    Not the ticket's email: registration does not verify that the person owns it.
+    """
+    source = ticket_source(include_archived=True)
+    result = await db.execute(select(source.id, source.client_id).where(source.id == ticket_id))
+    ticket = result.one_or_none()
+    
+    if ticket is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ticket not found"
+        )
+    
+    if current_user.role == "admin":
+        return
+    
+    result = await db.execute(select(User.client_id).where(User.id == current_user.user_id))
+    client_id = result.scalar_one_or_none()
+    if client_id is None or client_id != ticket.client_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Permission denied"
+        )
+
+async def check_message_access(db: AsyncSession, message_id: int, current_user: TokenData) -> None:
+    """Admins, or the client whose conversation holds the message"""
+    source = chat_message_source(include_archived=True)
+    result = await db.execute(
+        select(source.id, Conversation.client_user_id)
+        .outerjoin(Conversation, Conversation.id == source.conversation_id)
+        .where(source.id == message_id)
+    )
+    row = result.one_or_none()
+    
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Message not found"
+        )
+    
+    if current_user.role != "admin" and row.client_user_id != current_user.user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Permission denied"
+        )
+
+async def _store(request: Request, db: AsyncSession, current_user: TokenData, **owner):
+    # Release the pooled connection while the body streams to disk
+    await db.commit()
+    files = await receive_upload(request)
+    
+    # A concurrent delete may have removed a blob this upload deduplicated
+    # against - checked under the same per-blob lock the delete holds
+    await lock_blobs(db, [stored.sha256 for stored in files])
+    if not all(blob_path(stored.sha256).is_file() for stored in files):
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A file was removed while uploading - please retry"
+        )
+    
+    result = await db.execute(
+        pg_insert(Attachment)
+        .values([
+            {
+                **owner,
+                "uploaded_by": current_user.user_id,
+                "sha256": stored.sha256,
+                "size": stored.size,
+                "filename": stored.filename,
+                "content_type": stored.content_type
+            }
+            for stored in files
+        ])
+        .returning(*columns_for(Attachment, AttachmentResponse))
+    )
+    response = rows_response(result)
+    await db.commit()
+    
+    return response
+
+def _listing_query(*where):
+    return (
+        select(*columns_for(Attachment, AttachmentResponse))
+        .where(*where)
+        .order_by(Attachment.created_at.asc(), Attachment.id.asc())
+    )
+
+@router.post("/tickets/{ticket_id}", response_model=List[AttachmentResponse])
+async def upload_ticket_attachments(
+    ticket_id: int,
+    request: Request,
+    current_user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Attach files to a ticket (multipart/form-data, one or more "file" parts)"""
+    await check_ticket_access(db, ticket_id, current_user)
+    return await _store(request, db, current_user, ticket_id=ticket_id)
+
+@router.get("/tickets/{ticket_id}", response_model=List[AttachmentResponse])
+async def list_ticket_attachments(
+    ticket_id: int,
+    current_user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """List a ticket's attachments"""
+    await check_ticket_access(db, ticket_id, current_user)
+    result = await db.execute(_listing_query(Attachment.ticket_id == ticket_id))
+    return rows_response(result)
+
+@router.post("/messages/{message_id}", response_model=List[AttachmentResponse])
+async def upload_message_attachments(
+    message_id: int,
+    request: Request,
+    current_user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Attach files to a chat message (multipart/form-data, one or more "file" parts)"""
+    await check_message_access(db, message_id, current_user)
+    return await _store(request, db, current_user, message_id=message_id)
+
+@router.get("/messages/{message_id}", response_model=List[AttachmentResponse])
+async def list_message_attachments(
+    message_id: int,
+    current_user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """List a chat message's attachments"""
+    await check_message_access(db, message_id, current_user)
+    result = await db.execute(_listing_query(Attachment.message_id == message_id))
+    return rows_response(result)
+
+@router.get("/{attachment_id}")
+async def download_attachment(
+    attachment_id: int,
+    current_user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Download an attachment - supports Range requests for resumable downloads"""
+    attachment = await db.get(Attachment, attachment_id)
+    
+    if not attachment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment not found"
+        )
+    
+    if attachment.ticket_id is not None:
+        await check_ticket_access(db, attachment.ticket_id, current_user)
+    else:
+        await check_message_access(db, attachment.message_id, current_user)
+    
+    path = blob_path(attachment.sha256)
+    if not path.is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment file missing"
+        )
+    
+    # The file goes out as-is (/attachments/ is excluded from gzip in main) and
+    # the content hash is a strong validator that never changes
+    return FileResponse(
+        path,
+        media_type=attachment.content_type,
+        filename=attachment.filename,
+        headers={
+            "ETag": f'"{attachment.sha256}"',
+            "Cache-Control": "private, max-age=31536000, immutable",
+            "X-Content-Type-Options": "nosniff"
+        }
+    )
+
+@router.delete("/{attachment_id}")
+async def delete_attachment(
+    attachment_id: int,
+    current_user: TokenData = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Admin only - Delete an attachment (the file goes once nothing else uses it)"""
+    result = await db.execute(
+        delete(Attachment)
+        .where(Attachment.id == attachment_id)
+        .returning(Attachment.sha256)
+    )
+    sha256 = result.scalar_one_or_none()
+    
+    if sha256 is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment not found"
+        )
+    
+    # Checked and unlinked under the blob lock, so an upload reusing the blob
+    # either lands its row first (the blob stays) or sees it gone
+    await lock_blobs(db, [sha256])
+    result = await db.execute(select(exists().where(Attachment.sha256 == sha256)))
+    if not result.scalar():
+        remove_blob(sha256)
+    await db.commit()
+    
+    return {"message": "Attachment deleted successfully"}
@@ -1,21 +1,58 @@
 # backend/app/routers/auth.py
-from datetime import timedelta
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
 from app.core.database import get_db
 from app.core.security import (
-    verify_password, 
+    verify_and_update_password,
     get_password_hash, 
-    create_access_token,
+    create_user_access_token,
+    create_refresh_token,
+    encode_refresh_token,
+    verify_token,
     validate_password_strength
 )
 from app.core.dependencies import get_current_user
+from app.core.revocation import revoke_user_tokens
 from app.core.config import settings
-from app.models import User
-from app.schemas import UserCreate, UserResponse, UserLogin, Token
+from app.models import User, RefreshToken
+from app.schemas import UserCreate, UserResponse, UserLogin, Token, TokenData, RefreshRequest
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
+logger = logging.getLogger(__name__)
+
+async def issue_tokens(
+    db: AsyncSession,
+    user: User,
+    replaces: Optional[RefreshToken] = None
+) -> dict:
+    """Create an access token and a new refresh token row for user"""
+    access_token = create_user_access_token(user.id, user.email, user.role, user.token_version)
+    refresh_token, jti, expires_at = create_refresh_token(user.id, user.token_version)
+    
+    db.add(RefreshToken(jti=jti, user_id=user.id, expires_at=expires_at))
+    if replaces is not None:
+        replaces.revoked_at = datetime.now(timezone.utc)
+        replaces.replaced_by = jti
+    await db.commit()
+    
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    }
+
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
 
 @router.post("/register", response_model=UserResponse)
 async def register(
@@ -42,7 +79,9 @@ async def register(
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await run_in_threadpool(get_password_hash, user_data.password)
+    # Not linked to a client yet - the email is unverified, so an admin links
+    # the account (PUT /admin/clients/{id}/users/{user_id})
     user = User(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -62,7 +101,7 @@ async def register(
             "full_name": user.full_name or "Client"
         })
     except Exception as e:
-        print(f"Welcome email failed: {e}")  # Log but don't block registration
+        logger.warning("Welcome email failed", extra={"user_id": user.id, "error": str(e)})  # Log but don't block registration
     
     return user
 
@@ -76,28 +115,124 @@ async def login(
     result = await db.execute(select(User).where(User.email == user_credentials.email))
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    # bcrypt runs in a worker thread (it releases the GIL) so the event loop keeps serving
+    valid, new_hash = (
+        await run_in_threadpool(verify_and_update_password, user_credentials.password, user.hashed_password)
+        if user else (False, None)
+    )
+    
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Create access token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email, "role": user.role},
-        expires_delta=access_token_expires
+    # Hash made under an older cost policy - store the rehash (committed with the tokens)
+    if new_hash:
+        user.hashed_password = new_hash
+    
+    return await issue_tokens(db, user)
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    refresh_data: RefreshRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Exchange a refresh token for a new access/refresh token pair (rotation).
+    
+    Tabs share one token pair, so several of them can refresh with the same
+    token at once. A token rotated within REFRESH_REUSE_GRACE_SECONDS gets its
+    successor back instead of counting as reuse.
+    """
+    payload = verify_token(refresh_data.refresh_token)
+    if payload.get("type") != "refresh" or not payload.get("jti"):
+        raise _invalid_refresh_token()
+    
+    result = await db.execute(
+        select(RefreshToken)
+        .where(RefreshToken.jti == payload["jti"])
+        .with_for_update()
     )
+    stored = result.scalar_one_or_none()
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    if not stored or stored.expires_at < datetime.now(timezone.utc):
+        raise _invalid_refresh_token()
+    
+    if stored.revoked_at is not None:
+        grace = timedelta(seconds=settings.REFRESH_REUSE_GRACE_SECONDS)
+        if stored.replaced_by and datetime.now(timezone.utc) - stored.revoked_at <= grace:
+            return await _successor_tokens(db, stored)
+        # A rotated token was presented again - assume it leaked and revoke everything
+        await revoke_user_tokens(db, stored.user_id)
+        raise _invalid_refresh_token()
+    
+    user = await db.get(User, stored.user_id)
+    if not user or user.token_version != payload.get("ver"):
+        raise _invalid_refresh_token()
+    
+    return await issue_tokens(db, user, replaces=stored)
+
+async def _successor_tokens(db: AsyncSession, stored: RefreshToken) -> dict:
+    """A fresh access token with the refresh token that replaced stored, while it is still live"""
+    successor = await db.get(RefreshToken, stored.replaced_by)
+    user = await db.get(User, stored.user_id)
+    
+    if (
+        not successor
+        or successor.revoked_at is not None
+        or successor.expires_at < datetime.now(timezone.utc)
+        or not user
+    ):
+        # Rotated again or logged out meanwhile - refuse, but this is no sign of theft
+        raise _invalid_refresh_token()
+    
+    return {
+        "access_token": create_user_access_token(user.id, user.email, user.role, user.token_version),
+        "token_type": "bearer",
+        "refresh_token": encode_refresh_token(user.id, user.token_version, successor.jti, successor.expires_at),
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    }
+
+@router.post("/logout")
+async def logout(
+    refresh_data: RefreshRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Revoke a single refresh token (the access token simply expires)"""
+    payload = verify_token(refresh_data.refresh_token)
+    stored = await db.get(RefreshToken, payload.get("jti") or "")
+    
+    if stored and stored.revoked_at is None:
+        stored.revoked_at = datetime.now(timezone.utc)
+        await db.commit()
+    
+    return {"message": "Logged out"}
+
+@router.post("/logout-all")
+async def logout_all(
+    current_user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Revoke every token of the current user on all devices"""
+    await revoke_user_tokens(db, current_user.user_id)
+    return {"message": "All sessions revoked"}
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user)
+    current_user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Get current user information"""
-    return current_user
+    user = await db.get(User, current_user.user_id)
+    
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    
+    return user
 
 @router.post("/create-admin")
 async def create_admin_user(
@@ -124,7 +259,7 @@ async def create_admin_user(
         )
     
     # Create admin user
-    hashed_password = get_password_hash(admin_data.password)
+    hashed_password = await run_in_threadpool(get_password_hash, admin_data.password)
     admin_user = User(
         email=admin_data.email,
         hashed_password=hashed_password,
@@ -1,24 +1,40 @@
+import logging
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
+from sqlalchemy.orm import aliased
 from app.core.database import get_db
 from app.core.dependencies import get_admin_user
-from app.models import Article, User
-from app.schemas import ArticleCreate, ArticleResponse, ArticleUpdate
+from app.core.events import publish
+from app.core.feeds import publish_article_change, remove_article
+from app.core.related import CHANGED_EVENT, related_articles
+from app.core.serialization import columns_for, parse_fields, rows_response
+from app.models import Article, ArticleRelated
+from app.schemas import ArticleCreate, ArticleResponse, ArticleUpdate, ArticleListItem, TokenData
 
 router = APIRouter(prefix="/blog", tags=["Blog"])
+logger = logging.getLogger(__name__)
 
-@router.get("/articles", response_model=List[ArticleResponse])
+async def _update_feeds(change) -> None:
+    """Apply a sitemap/feed update without failing the article write"""
+    try:
+        await change
+    except Exception:
+        logger.exception("Feed update failed")
+
+@router.get("/articles", response_model=List[ArticleListItem])
 async def get_published_articles(
     language: str = "he",
     category: Optional[str] = None,
     limit: int = 10,
     offset: int = 0,
+    fields: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """Public endpoint - get published articles"""
-    query = select(Article).where(
+    """Public endpoint - get published articles (without content; use ?fields= for a subset)"""
+    selected = parse_fields(fields, ArticleListItem)
+    query = select(*columns_for(Article, ArticleListItem, selected)).where(
         Article.is_published == True,
         Article.language == language
     )
@@ -29,9 +45,8 @@ async def get_published_articles(
     query = query.offset(offset).limit(limit).order_by(Article.created_at.desc())
     
     result = await db.execute(query)
-    articles = result.scalars().all()
     
-    return articles
+    return rows_response(result)
 
 @router.get("/articles/{slug}", response_model=ArticleResponse)
 async def get_article_by_slug(
@@ -55,6 +70,29 @@ async def get_article_by_slug(
     
     return article
 
+@router.get("/articles/{slug}/related", response_model=List[ArticleListItem])
+async def get_related_articles(
+    slug: str,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Public endpoint - precomputed related articles, closest first (empty for unknown slugs)"""
+    selected = parse_fields(fields, ArticleListItem)
+    source = aliased(Article)
+    result = await db.execute(
+        select(*columns_for(Article, ArticleListItem, selected))
+        .join(ArticleRelated, ArticleRelated.related_id == Article.id)
+        .join(source, source.id == ArticleRelated.article_id)
+        .where(
+            source.slug == slug,
+            source.is_published == True,
+            Article.is_published == True
+        )
+        .order_by(ArticleRelated.rank)
+    )
+    
+    return rows_response(result)
+
 @router.get("/categories")
 async def get_categories(
     language: str = "he",
@@ -75,17 +113,19 @@ async def get_categories(
     return {"categories": categories}
 
 # Admin endpoints
-@router.get("/admin/articles", response_model=List[ArticleResponse])
+@router.get("/admin/articles", response_model=List[ArticleListItem])
 async def get_all_articles_admin(
     language: Optional[str] = None,
     is_published: Optional[bool] = None,
     limit: int = 50,
     offset: int = 0,
-    current_user: User = Depends(get_admin_user),
+    fields: Optional[str] = None,
+    current_user: TokenData = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Admin only - get all articles (including unpublished)"""
-    query = select(Article)
+    """Admin only - get all articles (including unpublished, without content)"""
+    selected = parse_fields(fields, ArticleListItem)
+    query = select(*columns_for(Article, ArticleListItem, selected))
     
     if language:
         query = query.where(Article.language == language)
@@ -96,14 +136,13 @@ async def get_all_articles_admin(
     query = query.offset(offset).limit(limit).order_by(Article.created_at.desc())
     
     result = await db.execute(query)
-    articles = result.scalars().all()
     
-    return articles
+    return rows_response(result)
 
 @router.post("/admin/articles", response_model=ArticleResponse)
 async def create_article(
     article_data: ArticleCreate,
-    current_user: User = Depends(get_admin_user),
+    current_user: TokenData = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Admin only - create article"""
@@ -120,15 +159,21 @@ async def create_article(
     article = Article(**article_data.model_dump())
     
     db.add(article)
+    await db.flush()
+    await publish(db, CHANGED_EVENT, {"id": article.id, "language": article.language})
     await db.commit()
     await db.refresh(article)
     
+    await _update_feeds(publish_article_change(article))
+    if article.is_published:
+        related_articles.schedule(article.id, article.language)
+    
     return article
 
 @router.get("/admin/articles/{article_id}", response_model=ArticleResponse)
 async def get_article_admin(
     article_id: int,
-    current_user: User = Depends(get_admin_user),
+    current_user: TokenData = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Admin only - get specific article"""
@@ -147,7 +192,7 @@ async def get_article_admin(
 async def update_article(
     article_id: int,
     article_data: ArticleUpdate,
-    current_user: User = Depends(get_admin_user),
+    current_user: TokenData = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Admin only - update article"""
@@ -164,20 +209,25 @@ async def update_article(
     # Update article
     update_data = article_data.model_dump(exclude_unset=True)
     if update_data:
+        previous_language = article.language
         await db.execute(
             update(Article)
             .where(Article.id == article_id)
             .values(**update_data)
         )
+        await publish(db, CHANGED_EVENT, {"id": article_id, "language": article.language})
         await db.commit()
         await db.refresh(article)
+        
+        await _update_feeds(publish_article_change(article))
+        related_articles.schedule(article_id, article.language, previous_language)
     
     return article
 
 @router.delete("/admin/articles/{article_id}")
 async def delete_article(
     article_id: int,
-    current_user: User = Depends(get_admin_user),
+    current_user: TokenData = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Admin only - delete article"""
@@ -190,7 +240,12 @@ async def delete_article(
             detail="Article not found"
         )
     
+    slug, language = article.slug, article.language
     await db.delete(article)
+    await publish(db, CHANGED_EVENT, {"id": article_id, "language": language})
     await db.commit()
     
+    await _update_feeds(remove_article(slug))
+    related_articles.schedule(article_id, language)
+    
     return {"message": "Article deleted successfully"}
\ No newline at end of file
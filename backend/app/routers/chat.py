@@ -1,69 +1,205 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.dependencies import get_current_user, get_admin_user
-from app.models import ChatMessage, User
-from app.schemas import ChatMessageCreate, ChatMessageResponse
-from sqlalchemy import select, update, text
+from app.core.chat_notify import notifier
+from app.core.chat_search import decode_cursor, search_messages, tsquery_text
+from app.core.events import event_bus, publish
+from app.core.retention import chat_message_source
+from app.core.serialization import columns_for, rows_response
+from app.models import ChatMessage, Conversation, User
+from app.schemas import ChatMessageCreate, ChatMessageResponse, ChatSearchResponse, ChatUserResponse, TokenData
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
+# Wake long-polls in every worker, not only the one that took the write
+event_bus.on("chat.changed", lambda data: notifier.notify(data["conversation_id"]))
+
+async def touch_conversation(db: AsyncSession, client_user_id: int) -> Tuple[int, int]:
+    """Get-or-create the client's conversation, count one new message and bump
+    its version (single upsert); returns (conversation_id, version)"""
+    result = await db.execute(
+        pg_insert(Conversation)
+        .values(client_user_id=client_user_id, message_count=1, last_message_at=func.now(), version=1)
+        .on_conflict_do_update(
+            index_elements=[Conversation.client_user_id],
+            set_={
+                "message_count": Conversation.message_count + 1,
+                "last_message_at": func.now(),
+                "version": Conversation.version + 1
+            }
+        )
+        .returning(Conversation.id, Conversation.version)
+    )
+    return tuple(result.one())
+
+async def load_conversation(db: AsyncSession, client_user_id: int) -> Tuple[Optional[int], int]:
+    """(conversation_id, version) of a client's conversation, or (None, 0)"""
+    result = await db.execute(
+        select(Conversation.id, Conversation.version)
+        .where(Conversation.client_user_id == client_user_id)
+    )
+    row = result.one_or_none()
+    return tuple(row) if row else (None, 0)
+
+async def _wait_for_change(
+    db: AsyncSession,
+    client_user_id: int,
+    since: int,
+    timeout: float
+) -> Tuple[Optional[int], int]:
+    """Long-poll until the conversation version passes since or timeout expires.
+    Each check is its own short transaction, so no pooled connection is held."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    
+    while True:
+        conversation_id, version = await load_conversation(db, client_user_id)
+        await db.commit()
+        
+        remaining = deadline - loop.time()
+        if version > since or remaining <= 0:
+            return conversation_id, version
+        
+        recheck = min(remaining, settings.CHAT_LONG_POLL_RECHECK_SECONDS)
+        if conversation_id is None:
+            await asyncio.sleep(recheck)
+        else:
+            await notifier.wait(conversation_id, recheck)
+
+def _etag(conversation_id: Optional[int], cursor: int, *query) -> str:
+    """Covers the query too - a tag from one since/limit/offset must not
+    validate another request's rows"""
+    return f'W/"{conversation_id or 0}-{cursor}-{"-".join("" if value is None else str(value) for value in query)}"'
+
+def conversation_page_query(source, conversation_id, limit: int, offset: int):
+    """One conversation page - a range scan on (conversation_id, created_at, id)"""
+    return (
+        select(*columns_for(source, ChatMessageResponse))
+        .where(source.conversation_id == conversation_id)
+        .order_by(source.created_at.asc(), source.id.asc())
+        .offset(offset)
+        .limit(limit)
+    )
+
 @router.post("/messages", response_model=ChatMessageResponse)
 async def send_message(
     message_data: ChatMessageCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: TokenData = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Send a chat message (registered users only)"""
+    """Send a chat message (registered users only; admins must name the client)"""
+    is_from_admin = current_user.role == "admin"
+    client_user_id = current_user.user_id
+    
+    if is_from_admin:
+        if message_data.user_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="user_id of the recipient client is required"
+            )
+        result = await db.execute(select(User.role).where(User.id == message_data.user_id))
+        if result.scalar_one_or_none() != "client":
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Client not found"
+            )
+        client_user_id = message_data.user_id
+    
+    conversation_id, version = await touch_conversation(db, client_user_id)
     message = ChatMessage(
         message=message_data.message,
-        user_id=current_user.id,
-        is_from_admin=(current_user.role == "admin")
+        conversation_id=conversation_id,
+        user_id=current_user.user_id,
+        is_from_admin=is_from_admin,
+        version=version
     )
     
     db.add(message)
+    await publish(db, "chat.changed", {"conversation_id": conversation_id})
     await db.commit()
     await db.refresh(message)
     
+    notifier.notify(conversation_id)
+    
     return message
 
 @router.get("/messages", response_model=List[ChatMessageResponse])
 async def get_messages(
-    user_id: int = None,
+    request: Request,
+    user_id: Optional[int] = None,
     limit: int = 50,
     offset: int = 0,
-    current_user: User = Depends(get_current_user),
+    since: Optional[int] = None,
+    wait: int = 0,
+    include_archived: bool = False,
+    current_user: TokenData = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get chat messages"""
-    query = select(ChatMessage)
+    """Get one conversation's messages.
     
-    # If regular user, only show their messages
+    Without since: a page of history (hot table only unless include_archived).
+    With since (the X-Chat-Cursor of the previous response): only messages
+    created or changed after that cursor. With wait > 0 the request is held
+    until something changes or wait seconds pass. A matching If-None-Match
+    gets an empty 304.
+    """
+    # Clients always read their own conversation; admins pick one by client user_id
     if current_user.role == "client":
-        query = query.where(
-            (ChatMessage.user_id == current_user.id) | 
-            (ChatMessage.is_from_admin == True)
+        user_id = current_user.user_id
+    elif user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="user_id is required"
         )
-    # If admin and user_id specified, show messages for that user
-    elif current_user.role == "admin" and user_id:
-        query = query.where(
-            (ChatMessage.user_id == user_id) | 
-            (ChatMessage.is_from_admin == True)
+    
+    conversation_id, version = await load_conversation(db, user_id)
+    
+    if since is not None and version <= since and wait > 0:
+        # Release the pooled connection for the duration of the long-poll
+        await db.commit()
+        conversation_id, version = await _wait_for_change(
+            db, user_id, since, min(wait, settings.CHAT_LONG_POLL_MAX_SECONDS)
         )
     
-    query = query.offset(offset).limit(limit).order_by(ChatMessage.created_at.asc())
+    if conversation_id is None or (since is not None and version <= since):
+        rows = []
+    else:
+        if since is None:
+            source = chat_message_source(include_archived)
+            query = conversation_page_query(source, conversation_id, limit, offset)
+        else:
+            query = (
+                select(*columns_for(ChatMessage, ChatMessageResponse))
+                .where(ChatMessage.conversation_id == conversation_id, ChatMessage.version > since)
+                .order_by(ChatMessage.version.asc())
+                .limit(limit)
+            )
+        result = await db.execute(query)
+        rows = [dict(row) for row in result.mappings()]
     
-    result = await db.execute(query)
-    messages = result.scalars().all()
+    # A truncated delta only advances the cursor to what was actually sent
+    cursor = rows[-1]["version"] if since is not None and len(rows) == limit else version
+    headers = {
+        "ETag": _etag(conversation_id, cursor, since, limit, offset, int(include_archived)),
+        "X-Chat-Cursor": str(cursor)
+    }
+    
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
     
-    return messages
+    return ORJSONResponse(rows, headers=headers)
 
 @router.put("/messages/{message_id}/read")
 async def mark_message_as_read(
     message_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: TokenData = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Mark message as read"""
@@ -77,50 +213,101 @@ async def mark_message_as_read(
             detail="Message not found"
         )
     
-    # Only allow marking own messages or admin can mark any
-    if current_user.role != "admin" and message.user_id != current_user.id:
+    # Clients may only mark messages in their own conversation; admins any
+    if current_user.role != "admin":
+        conversation = await db.get(Conversation, message.conversation_id) if message.conversation_id else None
+        is_own = conversation is not None and conversation.client_user_id == current_user.user_id
+    else:
+        is_own = True
+    
+    if not is_own:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Permission denied"
         )
     
-    # Update message status
+    # Update message status - a status change is a new conversation version
+    values = {"status": "read"}
+    if message.conversation_id is not None:
+        result = await db.execute(
+            update(Conversation)
+            .where(Conversation.id == message.conversation_id)
+            .values(version=Conversation.version + 1)
+            .returning(Conversation.version)
+        )
+        values["version"] = result.scalar_one()
+        await publish(db, "chat.changed", {"conversation_id": message.conversation_id})
+    
     await db.execute(
         update(ChatMessage)
         .where(ChatMessage.id == message_id)
-        .values(status="read")
+        .values(**values)
     )
     await db.commit()
     
+    if message.conversation_id is not None:
+        notifier.notify(message.conversation_id)
+    
     return {"message": "Message marked as read"}
 
-@router.get("/users", response_model=List[dict])
+@router.get("/search", response_model=ChatSearchResponse)
+async def search_chat(
+    q: str,
+    user_id: Optional[int] = None,
+    limit: int = 20,
+    context: int = 1,
+    cursor: Optional[str] = None,
+    current_user: TokenData = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Admin only - Search messages, best match first, in one client's conversation (user_id) or all of them.
+    
+    Only the newest CHAT_SEARCH_MAX_CANDIDATES matches are ranked; later pages list the older ones newest first.
+    """
+    query_text = tsquery_text(q)
+    if query_text is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search query has no words"
+        )
+    
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    
+    conversation_id = None
+    if user_id is not None:
+        conversation_id, _ = await load_conversation(db, user_id)
+        if conversation_id is None:
+            return {"hits": [], "next_cursor": None}
+    
+    hits, next_cursor = await search_messages(db, query_text, conversation_id, limit, context, after)
+    
+    return {"hits": hits, "next_cursor": next_cursor}
+
+@router.get("/users", response_model=List[ChatUserResponse])
 async def get_chat_users(
-    current_user: User = Depends(get_admin_user),
+    current_user: TokenData = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Admin only - Get list of users who have sent messages"""
-    query = text("""
-        SELECT DISTINCT u.id, u.full_name, u.email,
-               COUNT(cm.id) as message_count,
-               MAX(cm.created_at) as last_message_at
-        FROM users u
-        JOIN chat_messages cm ON u.id = cm.user_id
-        WHERE u.role = 'client'
-        GROUP BY u.id, u.full_name, u.email
-        ORDER BY last_message_at DESC
-    """)
+    """Admin only - Get list of clients with a conversation, most recent first"""
+    query = (
+        select(
+            User.id,
+            Conversation.id.label("conversation_id"),
+            User.full_name,
+            User.email,
+            Conversation.message_count,
+            Conversation.last_message_at
+        )
+        .join(User, User.id == Conversation.client_user_id)
+        .order_by(Conversation.last_message_at.desc().nulls_last())
+    )
     
     result = await db.execute(query)
-    users = [
-        {
-            "id": row[0],
-            "full_name": row[1],
-            "email": row[2],
-            "message_count": row[3],
-            "last_message_at": row[4]
-        }
-        for row in result.fetchall()
-    ]
-    
-    return users
\ No newline at end of file
+    
+    return rows_response(result)
\ No newline at end of file
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Path, Request
+from app.core.feeds import feed_response
+
+router = APIRouter(tags=["Feeds"])
+
+LANGUAGE_PATTERN = "^[a-z]{2}$"
+
+@router.get("/sitemap.xml")
+async def get_sitemap(request: Request):
+    """Public - sitemap (or sitemap index past 50k URLs), pre-rendered"""
+    return feed_response(request, "sitemap.xml", "application/xml")
+
+@router.get("/sitemaps/sitemap-{number}.xml")
+async def get_sitemap_part(request: Request, number: int):
+    """Public - one part of a split sitemap"""
+    return feed_response(request, f"sitemaps/sitemap-{number}.xml", "application/xml")
+
+@router.get("/blog/feeds/{language}/rss.xml")
+async def get_rss_feed(request: Request, language: str = Path(pattern=LANGUAGE_PATTERN)):
+    """Public - RSS 2.0 feed of the latest articles in a language"""
+    return feed_response(request, f"feeds/{language}/rss.xml", "application/rss+xml")
+
+@router.get("/blog/feeds/{language}/atom.xml")
+async def get_atom_feed(request: Request, language: str = Path(pattern=LANGUAGE_PATTERN)):
+    """Public - Atom feed of the latest articles in a language"""
+    return feed_response(request, f"feeds/{language}/atom.xml", "application/atom+xml")
@@ -1,37 +1,91 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import logging
+import tempfile
+from typing import List, Union
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import select, update, delete
+from app.core.clients import get_or_create_client, normalize_email
 from app.core.database import get_db
-from app.core.dependencies import get_admin_user
+from app.core.dedup import dedup_index
+from app.core.dependencies import get_admin_user, get_stream_admin_user
+from app.core.events import event_bus, publish
+from app.core.retention import ticket_source
+from app.core.serialization import columns_for, rows_response
+from app.core.ticket_import import CONTENT_TYPES, import_tickets
+from app.core.tracing import span
+from app.core.triage import triage_ticket
 from app.core.email import send_ticket_confirmation, send_ticket_notification_to_lawyer
-from app.models import Ticket, User
-from app.schemas import TicketCreate, TicketResponse, TicketUpdate
-import httpx
+from app.models import Ticket
+from app.schemas import (
+    TicketCreate,
+    TicketResponse,
+    TicketReceived,
+    TicketUpdate,
+    TicketBulkSelection,
+    TicketBulkStatusUpdate,
+    TicketBulkUrgencyUpdate,
+    TicketBulkItemResult,
+    TicketBulkResult,
+    TicketImportResult,
+    TokenData
+)
 from app.core.config import settings
 
 router = APIRouter(prefix="/tickets", tags=["Tickets"])
 
+logger = logging.getLogger(__name__)
+
+# Upper bound on explicit id lists accepted by the bulk endpoints
+MAX_BULK_IDS = 10000
+
+# Live admin feed (GET /tickets/admin/events)
+TICKET_EVENTS = ("ticket.created", "ticket.updated", "ticket.deleted", "tickets.bulk_changed")
+
+def ticket_event(ticket: Ticket) -> dict:
+    """Compact ticket summary for the live feed - NOTIFY payloads are capped"""
+    return {
+        "id": ticket.id,
+        "client_name": ticket.client_name[:200],
+        "client_email": ticket.client_email,
+        "event_summary": ticket.event_summary[:200],
+        "urgency_level": ticket.urgency_level,
+        "suggested_urgency": ticket.suggested_urgency,
+        "category": ticket.category,
+        "duplicate_of_id": ticket.duplicate_of_id,
+        "status": ticket.status,
+        "created_at": ticket.created_at.isoformat(),
+        "updated_at": ticket.updated_at.isoformat()
+    }
+
 async def verify_turnstile_token(token: str) -> bool:
     """Verify Cloudflare Turnstile token"""
     if not settings.TURNSTILE_SECRET_KEY:
         return True  # Skip verification if no secret key configured
     
+    import httpx  # deferred - only the public intake path needs it
+    
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://challenges.cloudflare.com/turnstile/v0/siteverify",
-                data={
-                    "secret": settings.TURNSTILE_SECRET_KEY,
-                    "response": token
-                }
-            )
-            result = response.json()
+        with span("turnstile.verify") as turnstile_span:
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    "https://challenges.cloudflare.com/turnstile/v0/siteverify",
+                    data={
+                        "secret": settings.TURNSTILE_SECRET_KEY,
+                        "response": token
+                    }
+                )
+                result = response.json()
+            if turnstile_span is not None:
+                turnstile_span.attributes["success"] = result.get("success", False)
             return result.get("success", False)
     except Exception:
         return False
 
-@router.post("/", response_model=TicketResponse)
+@router.post("/", response_model=Union[TicketResponse, TicketReceived])
 async def create_ticket(
     ticket_data: TicketCreate,
     db: AsyncSession = Depends(get_db)
@@ -45,18 +99,66 @@ async def create_ticket(
             detail="Captcha verification failed"
         )
     
-    # Create ticket
+    # Near-duplicate of a recent ticket (resubmission or spam)?
+    dedup = dedup_index.check(ticket_data.event_summary) if dedup_index.enabled else None
+    duplicate = dedup.duplicate if dedup else None
+    same_client = False
+    
+    if duplicate:
+        original = await db.get(Ticket, duplicate.ticket_id)
+        same_client = original is not None and (
+            normalize_email(original.client_email) == normalize_email(ticket_data.client_email)
+        )
+        # Anyone can type anyone's email - the stored ticket is never echoed
+        # back, only its id
+        if same_client and settings.TICKET_DEDUP_MODE == "merge":
+            logger.info(
+                "Duplicate ticket merged",
+                extra={"ticket_id": original.id, "similarity": round(duplicate.similarity, 3)}
+            )
+            return {"id": original.id, "message": "Ticket already received"}
+    
+    client_id = await get_or_create_client(
+        db,
+        ticket_data.client_email,
+        name=ticket_data.client_name,
+        phone=ticket_data.client_phone
+    )
+    
+    # Create ticket, with a suggested urgency and category from the summary
+    triage = triage_ticket(ticket_data.event_summary)
     ticket = Ticket(
         client_name=ticket_data.client_name,
         client_email=ticket_data.client_email,
         client_phone=ticket_data.client_phone,
+        client_id=client_id,
         event_summary=ticket_data.event_summary,
-        urgency_level=ticket_data.urgency_level
+        urgency_level=ticket_data.urgency_level,
+        suggested_urgency=triage.urgency,
+        category=triage.category,
+        duplicate_of_id=duplicate.ticket_id if duplicate else None
     )
     
     db.add(ticket)
-    await db.commit()
+    await db.flush()
     await db.refresh(ticket)
+    await publish(db, "ticket.created", ticket_event(ticket))
+    if dedup and not duplicate:
+        await dedup_index.publish(db, ticket, dedup.signature)
+    await db.commit()
+    
+    if same_client:
+        # The original already reached this client and the lawyer. A second
+        # person reporting the same event is flagged but still emailed
+        logger.info(
+            "Duplicate ticket flagged - emails skipped",
+            extra={
+                "ticket_id": ticket.id,
+                "duplicate_of_id": duplicate.ticket_id,
+                "similarity": round(duplicate.similarity, 3)
+            }
+        )
+        return ticket
     
     # Send emails
     ticket_dict = {
@@ -64,7 +166,9 @@ async def create_ticket(
         "client_email": ticket.client_email,
         "client_phone": ticket.client_phone,
         "event_summary": ticket.event_summary,
-        "urgency_level": ticket.urgency_level
+        "urgency_level": ticket.urgency_level,
+        "suggested_urgency": ticket.suggested_urgency,
+        "category": ticket.category
     }
     
     # Send confirmation to client
@@ -78,32 +182,75 @@ async def create_ticket(
 @router.get("/admin", response_model=List[TicketResponse])
 async def get_all_tickets(
     status: str = None,
+    category: str = None,
+    suggested_urgency: str = None,
+    hide_duplicates: bool = False,
     limit: int = 50,
     offset: int = 0,
-    current_user: User = Depends(get_admin_user),
+    include_archived: bool = False,
+    current_user: TokenData = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Admin only - Get all tickets"""
-    query = select(Ticket)
+    """Admin only - Get all tickets (hot table only unless include_archived)"""
+    source = ticket_source(include_archived)
+    query = select(*columns_for(source, TicketResponse))
     
     if status:
-        query = query.where(Ticket.status == status)
+        query = query.where(source.status == status)
+    if category:
+        query = query.where(source.category == category)
+    if suggested_urgency:
+        query = query.where(source.suggested_urgency == suggested_urgency)
+    if hide_duplicates:
+        query = query.where(source.duplicate_of_id.is_(None))
     
-    query = query.offset(offset).limit(limit).order_by(Ticket.created_at.desc())
+    query = query.offset(offset).limit(limit).order_by(source.created_at.desc())
     
     result = await db.execute(query)
-    tickets = result.scalars().all()
     
-    return tickets
+    return rows_response(result)
+
+@router.get("/admin/events")
+async def stream_ticket_events(
+    request: Request,
+    current_user: TokenData = Depends(get_stream_admin_user)
+):
+    """Admin only - Server-Sent Events feed of ticket changes from every worker.
+    
+    Event names: ticket.created, ticket.updated, ticket.deleted (data is a
+    ticket summary or {"id"}) and tickets.bulk_changed ({"affected"}). The
+    stream ends when events may have been missed; EventSource reconnects and
+    the dashboard reloads the list on every (re)connect.
+    """
+    async def stream():
+        async with event_bus.subscribe(*TICKET_EVENTS) as subscription:
+            yield f"retry: {settings.SSE_RETRY_MS}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.get(), settings.SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    break
+                yield f"event: {event['type']}\ndata: {orjson.dumps(event['data']).decode()}\n\n"
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/admin/{ticket_id}", response_model=TicketResponse)
 async def get_ticket(
     ticket_id: int,
-    current_user: User = Depends(get_admin_user),
+    include_archived: bool = False,
+    current_user: TokenData = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Admin only - Get specific ticket"""
-    result = await db.execute(select(Ticket).where(Ticket.id == ticket_id))
+    source = ticket_source(include_archived)
+    result = await db.execute(select(source).where(source.id == ticket_id))
     ticket = result.scalar_one_or_none()
     
     if not ticket:
@@ -118,7 +265,7 @@ async def get_ticket(
 async def update_ticket(
     ticket_id: int,
     ticket_update: TicketUpdate,
-    current_user: User = Depends(get_admin_user),
+    current_user: TokenData = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Admin only - Update ticket"""
@@ -140,15 +287,16 @@ async def update_ticket(
             .where(Ticket.id == ticket_id)
             .values(**update_data)
         )
-        await db.commit()
         await db.refresh(ticket)
+        await publish(db, "ticket.updated", ticket_event(ticket))
+        await db.commit()
     
     return ticket
 
 @router.delete("/admin/{ticket_id}")
 async def delete_ticket(
     ticket_id: int,
-    current_user: User = Depends(get_admin_user),
+    current_user: TokenData = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Admin only - Delete ticket"""
@@ -162,6 +310,146 @@ async def delete_ticket(
         )
     
     await db.delete(ticket)
+    await publish(db, "ticket.deleted", {"id": ticket_id})
     await db.commit()
     
-    return {"message": "Ticket deleted successfully"}
\ No newline at end of file
+    return {"message": "Ticket deleted successfully"}
+
+def _bulk_conditions(selection: TicketBulkSelection) -> list:
+    """Build the WHERE clause shared by the bulk ticket endpoints"""
+    conditions = []
+    
+    if selection.ids:
+        if len(selection.ids) > MAX_BULK_IDS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Too many ids (max {MAX_BULK_IDS})"
+            )
+        conditions.append(Ticket.id.in_(selection.ids))
+    
+    if selection.filter:
+        ticket_filter = selection.filter
+        if ticket_filter.status:
+            conditions.append(Ticket.status == ticket_filter.status)
+        if ticket_filter.urgency_level:
+            conditions.append(Ticket.urgency_level == ticket_filter.urgency_level)
+        if ticket_filter.created_before:
+            conditions.append(Ticket.created_at < ticket_filter.created_before)
+        if ticket_filter.created_after:
+            conditions.append(Ticket.created_at >= ticket_filter.created_after)
+    
+    # Never let an empty selection turn into a whole-table operation
+    if not conditions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Bulk operations require ids or a non-empty filter"
+        )
+    
+    return conditions
+
+async def _run_bulk(
+    db: AsyncSession,
+    statement,
+    selection: TicketBulkSelection
+) -> TicketBulkResult:
+    """Execute a set-based UPDATE/DELETE ... RETURNING id and report per-id results"""
+    result = await db.execute(
+        statement
+        .returning(Ticket.id)
+        .execution_options(synchronize_session=False)
+    )
+    affected_ids = result.scalars().all()
+    if affected_ids:
+        await publish(db, "tickets.bulk_changed", {"affected": len(affected_ids)})
+    await db.commit()
+    
+    if not selection.ids:
+        results = [TicketBulkItemResult(id=ticket_id, success=True) for ticket_id in affected_ids]
+    else:
+        affected = set(affected_ids)
+        error = "Ticket not found" if not selection.filter else "Ticket not found or does not match filter"
+        results = [
+            TicketBulkItemResult(
+                id=ticket_id,
+                success=ticket_id in affected,
+                error=None if ticket_id in affected else error
+            )
+            for ticket_id in dict.fromkeys(selection.ids)
+        ]
+    
+    return TicketBulkResult(affected=len(affected_ids), results=results)
+
+@router.post("/admin/bulk/status", response_model=TicketBulkResult)
+async def bulk_update_ticket_status(
+    bulk_update: TicketBulkStatusUpdate,
+    current_user: TokenData = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Admin only - Set status on many tickets in a single statement"""
+    statement = (
+        update(Ticket)
+        .where(*_bulk_conditions(bulk_update))
+        .values(status=bulk_update.status)
+    )
+    return await _run_bulk(db, statement, bulk_update)
+
+@router.post("/admin/bulk/urgency", response_model=TicketBulkResult)
+async def bulk_update_ticket_urgency(
+    bulk_update: TicketBulkUrgencyUpdate,
+    current_user: TokenData = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Admin only - Set urgency level on many tickets in a single statement"""
+    statement = (
+        update(Ticket)
+        .where(*_bulk_conditions(bulk_update))
+        .values(urgency_level=bulk_update.urgency_level)
+    )
+    return await _run_bulk(db, statement, bulk_update)
+
+@router.post("/admin/bulk/delete", response_model=TicketBulkResult)
+async def bulk_delete_tickets(
+    selection: TicketBulkSelection,
+    current_user: TokenData = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Admin only - Delete many tickets in a single statement"""
+    statement = delete(Ticket).where(*_bulk_conditions(selection))
+    return await _run_bulk(db, statement, selection)
+
+@router.post("/admin/import", response_model=TicketImportResult)
+async def import_tickets_file(
+    request: Request,
+    current_user: TokenData = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Admin only - Bulk import tickets from a CSV or NDJSON request body.
+    
+    Send the file as the raw body with Content-Type text/csv or
+    application/x-ndjson. Columns/keys are those of a ticket plus optional
+    status and created_at. Duplicates are skipped, invalid rows are reported
+    by line, and no emails are sent.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = CONTENT_TYPES.get(content_type)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Content-Type must be one of: {', '.join(CONTENT_TYPES)}"
+        )
+    
+    # Spool the body to disk - imports can be far larger than memory
+    max_bytes = settings.TICKET_IMPORT_MAX_MB * 1024 * 1024
+    with tempfile.NamedTemporaryFile(suffix=f".{fmt}") as spool:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Imports are limited to {settings.TICKET_IMPORT_MAX_MB} MB"
+                )
+            await run_in_threadpool(spool.write, chunk)
+        await run_in_threadpool(spool.flush)
+        
+        return await import_tickets(db, spool.name, fmt)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 from pydantic import BaseModel, EmailStr
 
 # User Schemas
@@ -13,6 +13,7 @@ class UserCreate(UserBase):
 class UserResponse(UserBase):
     id: int
     role: str
+    client_id: Optional[int] = None
     created_at: datetime
     
     class Config:
@@ -26,9 +27,18 @@ class UserLogin(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
+    """Identity carried by a verified access token - no DB lookup needed"""
+    user_id: int
     email: Optional[str] = None
+    role: str = "client"
+    token_version: int = 0
 
 # Ticket Schemas
 class TicketBase(BaseModel):
@@ -43,34 +53,127 @@ class TicketCreate(TicketBase):
 
 class TicketResponse(TicketBase):
     id: int
+    client_id: Optional[int] = None
     status: str
+    suggested_urgency: Optional[str] = None
+    category: Optional[str] = None
+    duplicate_of_id: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     
     class Config:
         from_attributes = True
 
+class TicketReceived(BaseModel):
+    """Public answer to a resubmission merged into an earlier ticket - no stored details"""
+    id: int
+    message: str
+
 class TicketUpdate(BaseModel):
     status: Optional[str] = None
     urgency_level: Optional[str] = None
 
+# Bulk Ticket Schemas
+class TicketBulkFilter(BaseModel):
+    status: Optional[str] = None
+    urgency_level: Optional[str] = None
+    created_before: Optional[datetime] = None
+    created_after: Optional[datetime] = None
+
+class TicketBulkSelection(BaseModel):
+    ids: Optional[List[int]] = None
+    filter: Optional[TicketBulkFilter] = None
+
+class TicketBulkStatusUpdate(TicketBulkSelection):
+    status: str
+
+class TicketBulkUrgencyUpdate(TicketBulkSelection):
+    urgency_level: str
+
+class TicketBulkItemResult(BaseModel):
+    id: int
+    success: bool
+    error: Optional[str] = None
+
+class TicketBulkResult(BaseModel):
+    affected: int
+    results: List[TicketBulkItemResult]
+
+# Ticket Import Schemas
+class TicketImportRow(TicketBase):
+    """One CSV/NDJSON import row - historical tickets keep their status and date"""
+    status: str = "New"
+    created_at: Optional[datetime] = None
+
+class TicketImportError(BaseModel):
+    line: int
+    error: str
+
+class TicketImportResult(BaseModel):
+    received: int
+    inserted: int
+    duplicates: int
+    invalid: int
+    errors: List[TicketImportError]  # first MAX_REPORTED_ERRORS only
+
 # Chat Schemas
 class ChatMessageBase(BaseModel):
     message: str
 
 class ChatMessageCreate(ChatMessageBase):
-    pass
+    user_id: Optional[int] = None  # recipient client - required for admins
 
 class ChatMessageResponse(ChatMessageBase):
     id: int
+    conversation_id: Optional[int]
     user_id: Optional[int]
     is_from_admin: bool
     status: str
+    version: int
     created_at: datetime
     
     class Config:
         from_attributes = True
 
+class ChatUserResponse(BaseModel):
+    id: int
+    conversation_id: int
+    full_name: Optional[str]
+    email: str
+    message_count: int
+    last_message_at: Optional[datetime]
+
+class ChatSearchHit(BaseModel):
+    message: ChatMessageResponse
+    rank: float
+    snippet: str
+    before: List[ChatMessageResponse]
+    after: List[ChatMessageResponse]
+
+class ChatSearchResponse(BaseModel):
+    hits: List[ChatSearchHit]
+    next_cursor: Optional[str] = None
+
+# Client Registry Schemas
+class ClientResponse(BaseModel):
+    id: int
+    name: Optional[str] = None
+    email: str
+    phone: Optional[str] = None
+    phone_e164: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class ClientHistoryResponse(BaseModel):
+    """Everything from one client - newest first"""
+    client: ClientResponse
+    users: List[UserResponse]
+    tickets: List[TicketResponse]
+    conversations: List[ChatUserResponse]
+
 # Article Schemas
 class ArticleBase(BaseModel):
     title: str
@@ -94,6 +197,18 @@ class ArticleUpdate(BaseModel):
     meta_title: Optional[str] = None
     meta_description: Optional[str] = None
 
+class ArticleListItem(BaseModel):
+    """List projection - everything a listing page shows, without content"""
+    id: int
+    title: str
+    slug: str
+    excerpt: Optional[str] = None
+    language: str
+    category: Optional[str] = None
+    is_published: bool
+    created_at: datetime
+    updated_at: datetime
+
 class ArticleResponse(ArticleBase):
     id: int
     slug: str
@@ -102,4 +217,34 @@ class ArticleResponse(ArticleBase):
     updated_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Admin Dashboard Schemas
+class ArticlePublishStats(BaseModel):
+    published: int = 0
+    draft: int = 0
+
+class DashboardResponse(BaseModel):
+    tickets_by_status: Dict[str, int]
+    tickets_by_urgency: Dict[str, int]
+    unread_messages: int
+    unread_conversations: int
+    total_clients: int
+    articles_by_language: Dict[str, ArticlePublishStats]
+    recent_tickets: List[TicketResponse]
+    recent_messages: List[ChatMessageResponse]
+    refreshed_at: Optional[datetime] = None
+
+# Attachment Schemas
+class AttachmentResponse(BaseModel):
+    id: int
+    ticket_id: Optional[int] = None
+    message_id: Optional[int] = None
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,81 @@
+"""Production entry point - pre-fork multi-worker uvicorn.
+
+    python -m app.server
+
+The supervisor binds the listening socket once and spawns WEB_CONCURRENCY
+workers that share it. Send SIGHUP to the supervisor for a rolling restart:
+workers are replaced one at a time, each draining in-flight requests for up
+to GRACEFUL_SHUTDOWN_SECONDS, while the others keep serving. SIGTTIN/SIGTTOU
+add or remove a worker. `python -m app.main` remains the development server.
+"""
+import logging
+import os
+import resource
+import uvicorn
+from app.core.config import settings
+from app.core.logs import build_output_handler
+
+logger = logging.getLogger(__name__)
+
+def setup_supervisor_logging() -> None:
+    """Same output format as the workers, written directly - the supervisor
+    logs a few lines and needs no queue thread"""
+    root = logging.getLogger()
+    root.addHandler(build_output_handler())
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+def default_workers() -> int:
+    """One event loop per core - the app is I/O bound, bcrypt aside"""
+    return os.cpu_count() or 1
+
+def apply_worker_limits() -> None:
+    """Set resource limits in the supervisor; every worker inherits them per process"""
+    # Plenty of file descriptors for keep-alive connections and the DB pool
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    
+    # Cap each worker's address space so a runaway worker dies instead of the host
+    if settings.WORKER_MEMORY_LIMIT_MB > 0:
+        limit = settings.WORKER_MEMORY_LIMIT_MB * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def pin_password_hash_cost() -> None:
+    """Calibrate bcrypt once in the supervisor and hand the cost to every worker
+    through the environment - workers calibrating concurrently would compete
+    for the CPU and could settle on different costs"""
+    if not settings.BCRYPT_ROUNDS:
+        from app.core.security import calibrate_bcrypt_rounds
+        
+        rounds = calibrate_bcrypt_rounds()
+        os.environ["BCRYPT_ROUNDS"] = str(rounds)
+        logger.info(
+            "bcrypt cost calibrated",
+            extra={"rounds": rounds, "target_ms": settings.PASSWORD_HASH_TARGET_MS}
+        )
+
+def main() -> None:
+    setup_supervisor_logging()
+    apply_worker_limits()
+    pin_password_hash_cost()
+    
+    uvicorn.run(
+        "app.main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=settings.WEB_CONCURRENCY or default_workers(),
+        loop="uvloop",
+        http="httptools",
+        backlog=settings.SOCKET_BACKLOG,
+        timeout_keep_alive=settings.KEEP_ALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_SECONDS,
+        # Recycle workers periodically to bound slow memory growth
+        limit_max_requests=settings.WORKER_MAX_REQUESTS or None,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+        access_log=False,
+        reload=False
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Payload size and encode latency of article listings, with and without content.
+
+Compares the old full-article list (ArticleResponse, content included) with
+the ArticleListItem projection, raw and gzip-compressed as GZipMiddleware
+would send it.
+
+Usage (from backend/):
+    python -m scripts.bench_article_payload
+"""
+import gzip
+import timeit
+
+import orjson
+
+from app.schemas import ArticleListItem
+from scripts.bench_serialization import make_articles
+
+REPEAT = 100
+PAGE_SIZES = (10, 50, 500)
+
+def encode(rows) -> bytes:
+    return orjson.dumps(rows)
+
+def report(label: str, rows) -> None:
+    body = encode(rows)
+    compressed = gzip.compress(body, compresslevel=5)
+    encode_ms = timeit.timeit(lambda: gzip.compress(encode(rows), compresslevel=5), number=REPEAT) / REPEAT * 1000
+    print(f"{label:<28} raw {len(body) / 1024:9.1f} KiB   gzip {len(compressed) / 1024:8.1f} KiB   encode+gzip {encode_ms:7.2f} ms")
+
+if __name__ == "__main__":
+    list_fields = list(ArticleListItem.model_fields)
+    for size in PAGE_SIZES:
+        full = make_articles(size)
+        lean = [{name: row[name] for name in list_fields} for row in full]
+        report(f"{size} articles (full)", full)
+        report(f"{size} articles (list item)", lean)
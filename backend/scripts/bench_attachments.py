@@ -0,0 +1,74 @@
+"""Benchmark: peak memory while streaming large attachment uploads.
+
+Posts a multipart body with FILE_MB-sized file parts to a minimal app that
+runs app.core.attachments.receive_upload - the same code path the upload
+endpoints use - and reports throughput and the growth of the process's peak
+RSS. Growth should stay around the chunk size, not the file size. The second
+part repeats the first, so it also checks that the blob is deduplicated.
+
+No database needed; blobs go to a temporary ATTACHMENTS_DIR. Usage (from backend/):
+    python -m scripts.bench_attachments [FILE_MB]
+"""
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import time
+
+os.environ["ATTACHMENTS_DIR"] = tempfile.mkdtemp(prefix="bench-attachments-")
+
+import httpx
+from fastapi import FastAPI, Request
+
+from app.core.attachments import receive_upload
+
+CHUNK = 64 * 1024
+BOUNDARY = b"bench-boundary"
+
+app = FastAPI()
+
+@app.post("/upload")
+async def upload(request: Request):
+    return [stored.__dict__ for stored in await receive_upload(request)]
+
+async def multipart_body(file_mb: int, parts: int):
+    chunk = os.urandom(CHUNK)
+    for n in range(parts):
+        yield (
+            b"--" + BOUNDARY + b"\r\n"
+            b'Content-Disposition: form-data; name="file"; filename="document.pdf"\r\n'
+            b"Content-Type: application/pdf\r\n\r\n"
+        )
+        for _ in range(file_mb * 1024 * 1024 // CHUNK):
+            yield chunk
+        yield b"\r\n"
+    yield b"--" + BOUNDARY + b"--\r\n"
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+async def main(file_mb: int) -> None:
+    parts = 2
+    before = peak_rss_mb()
+    started = time.perf_counter()
+    
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        response = await client.post(
+            "/upload",
+            content=multipart_body(file_mb, parts),
+            headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY.decode()}"}
+        )
+    response.raise_for_status()
+    
+    elapsed = time.perf_counter() - started
+    stored = response.json()
+    blobs = sum(len(files) for _, _, files in os.walk(os.environ["ATTACHMENTS_DIR"]))
+    
+    print(f"uploaded {parts} x {file_mb} MB in {elapsed:.2f}s ({parts * file_mb / elapsed:.0f} MB/s)")
+    print(f"peak RSS growth {peak_rss_mb() - before:.1f} MB")
+    print(f"parts stored {len(stored)}, blobs on disk {blobs}")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100))
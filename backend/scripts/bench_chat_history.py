@@ -0,0 +1,76 @@
+"""Benchmark: conversation page latency as the number of clients grows.
+
+Seeds clients with MESSAGES_PER_CLIENT messages each (plus admin replies)
+in growing steps and times the exact query GET /chat/messages runs for one
+conversation. With the (conversation_id, created_at, id) index the latency
+should stay flat regardless of table size.
+
+Writes bench-* users and their messages - point DATABASE_URL at a scratch
+database. Usage (from backend/):
+    python -m scripts.bench_chat_history
+"""
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.core.database import AsyncSessionLocal
+from app.core.retention import chat_message_source
+from app.routers.chat import conversation_page_query, load_conversation
+
+CLIENT_STEPS = (100, 1000, 10000, 50000)
+MESSAGES_PER_CLIENT = 20
+SAMPLES = 200
+
+async def seed(db, target_clients: int) -> None:
+    """Grow the bench data set to target_clients clients using set-based inserts"""
+    existing = (await db.execute(text("SELECT count(*) FROM users WHERE email LIKE 'bench-%'"))).scalar()
+    if existing >= target_clients:
+        return
+    
+    await db.execute(text("""
+        INSERT INTO users (email, hashed_password, full_name, role)
+        SELECT 'bench-' || n || '@example.com', 'x', 'Bench ' || n, 'client'
+        FROM generate_series(:start, :stop) n
+    """), {"start": existing + 1, "stop": target_clients})
+    await db.execute(text("""
+        INSERT INTO conversations (client_user_id, message_count, last_message_at)
+        SELECT id, :per_client, now() FROM users
+        WHERE email LIKE 'bench-%' AND id NOT IN (SELECT client_user_id FROM conversations)
+    """), {"per_client": MESSAGES_PER_CLIENT})
+    await db.execute(text("""
+        INSERT INTO chat_messages (message, conversation_id, user_id, is_from_admin, status, created_at)
+        SELECT 'bench message ' || n, c.id, c.client_user_id, n % 2 = 0, 'read',
+               now() - make_interval(mins => n)
+        FROM conversations c
+        JOIN users u ON u.id = c.client_user_id AND u.email LIKE 'bench-%'
+        CROSS JOIN generate_series(1, :per_client) n
+        WHERE NOT EXISTS (SELECT 1 FROM chat_messages m WHERE m.conversation_id = c.id)
+    """), {"per_client": MESSAGES_PER_CLIENT})
+    await db.commit()
+    await db.execute(text("ANALYZE chat_messages"))
+
+async def measure(db, client_user_id: int) -> list:
+    timings = []
+    for _ in range(SAMPLES):
+        started = time.perf_counter()
+        conversation_id, _ = await load_conversation(db, client_user_id)
+        query = conversation_page_query(chat_message_source(), conversation_id, 50, 0)
+        (await db.execute(query)).fetchall()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+async def main():
+    async with AsyncSessionLocal() as db:
+        for clients in CLIENT_STEPS:
+            await seed(db, clients)
+            client_user_id = (await db.execute(text(
+                "SELECT id FROM users WHERE email LIKE 'bench-%' ORDER BY id DESC LIMIT 1"
+            ))).scalar()
+            timings = await measure(db, client_user_id)
+            quantiles = statistics.quantiles(timings, n=100)
+            print(f"{clients:>7} clients   p50 {quantiles[49] * 1000:6.2f} ms   p99 {quantiles[98] * 1000:6.2f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
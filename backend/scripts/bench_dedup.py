@@ -0,0 +1,172 @@
+"""Benchmark: near-duplicate ticket detection - precision, recall and latency.
+
+Indexes --tickets synthetic Hebrew/Russian/English summaries (with shared
+boilerplate, as real tickets have). It then checks three kinds of query:
+edited copies of indexed tickets (word swaps, typos, an added sentence),
+fresh tickets, and tickets that share a long opening with an indexed one
+but tell a different story.
+
+A flag counts as correct when the exact shingle Jaccard between the query
+and the returned ticket is within --tolerance of TICKET_DEDUP_THRESHOLD.
+A 128-value signature estimates Jaccard with a standard deviation of about
+0.035, so pairs just under the threshold are sometimes flagged. Strict
+precision (exact Jaccard at or above the threshold) is printed too. Recall
+is over queries whose exact Jaccard to their source reaches the threshold. Latency
+is per intake check (signature + LSH lookup), next to a brute-force scan of
+every signature.
+
+Fails (exit code 1) when precision is below --min-precision or the p99
+check latency is above --budget-ms. No database needed. Usage (from backend/):
+    python -m scripts.bench_dedup [--tickets 20000] [--queries 1000] [--budget-ms 5]
+"""
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.dedup import DuplicateIndex, minhash, shingles
+from app.core.triage import normalize
+
+ALPHABETS = {
+    "he": "אבגדהוזחטיכלמנסעפצקרשת",
+    "ru": "абвгдежзийклмнопрстуфхцчшщыэюя",
+    "en": "abcdefghijklmnopqrstuvwxyz",
+}
+VOCABULARY_SIZE = 3000
+BOILERPLATE_WORDS = 12
+
+def vocabulary(rng: random.Random, alphabet: str):
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(2, 9))) for _ in range(VOCABULARY_SIZE)]
+
+class Corpus:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.words = {language: vocabulary(self.rng, alphabet) for language, alphabet in ALPHABETS.items()}
+        # Greetings and sign-offs every client uses
+        self.boilerplate = {
+            language: [" ".join(self.rng.choices(words[:50], k=BOILERPLATE_WORDS)) for _ in range(5)]
+            for language, words in self.words.items()
+        }
+    
+    def sentence(self, language: str) -> str:
+        return " ".join(self.rng.choices(self.words[language], k=self.rng.randint(8, 20)))
+    
+    def ticket(self, language: str = None) -> str:
+        language = language or self.rng.choice(list(ALPHABETS))
+        parts = [self.rng.choice(self.boilerplate[language])]
+        parts += [self.sentence(language) for _ in range(self.rng.randint(4, 10))]
+        parts.append(self.rng.choice(self.boilerplate[language]))
+        return ". ".join(parts)
+    
+    def edited(self, text: str) -> str:
+        """A resubmission - some words replaced, a typo or two, maybe a sentence added"""
+        words = text.split()
+        language = next(lang for lang, alphabet in ALPHABETS.items() if any(c in alphabet for c in text))
+        for _ in range(self.rng.randint(0, max(1, len(words) // 15))):
+            words[self.rng.randrange(len(words))] = self.rng.choice(self.words[language])
+        for _ in range(self.rng.randint(0, 2)):
+            position = self.rng.randrange(len(words))
+            word = words[position]
+            if len(word) > 2:
+                cut = self.rng.randrange(1, len(word) - 1)
+                words[position] = word[:cut] + word[cut + 1:]
+        edited = " ".join(words)
+        if self.rng.random() < 0.5:
+            edited += ". " + self.sentence(language)
+        return edited
+    
+    def same_opening(self, text: str) -> str:
+        """First third identical, the rest a different story"""
+        words = text.split()
+        language = next(lang for lang, alphabet in ALPHABETS.items() if any(c in alphabet for c in text))
+        return " ".join(words[:len(words) // 3]) + ". " + ". ".join(self.sentence(language) for _ in range(6))
+
+def jaccard(first: str, second: str) -> float:
+    a, b = shingles(normalize(first)), shingles(normalize(second))
+    union = len(np.union1d(a, b))
+    return len(np.intersect1d(a, b, assume_unique=True)) / union if union else 0.0
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=1000, help="Per query kind")
+    parser.add_argument("--budget-ms", type=float, default=5)
+    parser.add_argument("--min-precision", type=float, default=0.95)
+    parser.add_argument("--tolerance", type=float, default=0.05)
+    args = parser.parse_args()
+    
+    corpus = Corpus(seed=7)
+    texts = [corpus.ticket() for _ in range(args.tickets)]
+    now = time.time()
+    
+    started = time.perf_counter()
+    signatures = np.array([minhash(text) for text in texts], dtype=np.uint32)
+    index = DuplicateIndex()
+    index._add_many(list(range(1, args.tickets + 1)), [now] * args.tickets, signatures)
+    index.ready = True
+    built = time.perf_counter() - started
+    print(f"Indexed {args.tickets} tickets in {built:.1f}s ({args.tickets / built:.0f}/s), "
+          f"threshold {settings.TICKET_DEDUP_THRESHOLD}")
+    
+    sources = [corpus.rng.randrange(args.tickets) for _ in range(args.queries)]
+    kinds = {
+        "edited copy": [(corpus.edited(texts[source]), source) for source in sources],
+        "fresh ticket": [(corpus.ticket(), None) for _ in range(args.queries)],
+        "same opening": [(corpus.same_opening(texts[source]), source) for source in sources],
+    }
+    
+    threshold = settings.TICKET_DEDUP_THRESHOLD
+    latencies, flagged, correct, strict, positives, found = [], 0, 0, 0, 0, 0
+    print(f"\n  {'query kind':<14}{'queries':>8}{'flagged':>9}{'correct':>9}{'strict':>8}{'true dups':>11}{'found':>7}")
+    for kind, queries in kinds.items():
+        kind_flagged = kind_correct = kind_strict = kind_positives = kind_found = 0
+        for text, source in queries:
+            started = time.perf_counter()
+            result = index.check(text)
+            latencies.append((time.perf_counter() - started) * 1000)
+            
+            is_duplicate = source is not None and jaccard(text, texts[source]) >= threshold
+            kind_positives += is_duplicate
+            if result.duplicate:
+                kind_flagged += 1
+                similarity = jaccard(text, texts[result.duplicate.ticket_id - 1])
+                kind_correct += similarity >= threshold - args.tolerance
+                kind_strict += similarity >= threshold
+                kind_found += is_duplicate and result.duplicate.ticket_id - 1 == source
+        print(f"  {kind:<14}{len(queries):>8}{kind_flagged:>9}{kind_correct:>9}{kind_strict:>8}"
+              f"{kind_positives:>11}{kind_found:>7}")
+        flagged += kind_flagged
+        correct += kind_correct
+        strict += kind_strict
+        positives += kind_positives
+        found += kind_found
+    
+    precision = correct / flagged if flagged else 1.0
+    recall = found / positives if positives else 1.0
+    
+    brute = []
+    for text, _ in kinds["fresh ticket"][:100]:
+        started = time.perf_counter()
+        signature = minhash(text)
+        (signatures == signature).mean(axis=1).argmax()
+        brute.append((time.perf_counter() - started) * 1000)
+    
+    p99 = percentile(latencies, 0.99)
+    print(f"\nprecision {precision:.3f} (strict {strict / flagged if flagged else 1.0:.3f})  recall {recall:.3f}")
+    print(f"check latency  p50 {percentile(latencies, 0.5):.2f} ms  p99 {p99:.2f} ms")
+    print(f"brute force    p50 {percentile(brute, 0.5):.2f} ms (every signature compared)")
+    
+    if precision < args.min_precision or p99 > args.budget_ms:
+        print(f"\nFAIL: precision below {args.min_precision} or p99 above {args.budget_ms} ms")
+        sys.exit(1)
+    print("\nOK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark: logging cost on the event loop and per-request overhead budget.
+
+1. Caller-side cost of one log call: print() and a synchronous JSON
+   StreamHandler (formatting + write on the caller) versus the queue handler
+   from app.core.logs (copy + enqueue; the listener thread does the rest).
+2. Per-request overhead of RequestContextMiddleware, measured by driving a
+   trivial ASGI app directly, with access logging at the configured sample
+   rate and at 100%.
+
+Fails (exit code 1) when the sampled per-request overhead exceeds the
+budget. Log output goes to /dev/null. Usage (from backend/):
+    python -m scripts.bench_logging [--budget-us 50]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+from app.core.config import settings
+from app.core import logs
+
+CALLS = 20000
+REQUESTS = 20000
+
+def per_call_us(fn, calls: int = CALLS) -> float:
+    started = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - started) / calls * 1e6
+
+def drain(listener) -> None:
+    """Let the listener thread catch up so it does not skew the next measurement"""
+    while not listener.queue.empty():
+        time.sleep(0.01)
+
+def bench_log_calls(devnull) -> None:
+    logger = logging.getLogger("bench")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    
+    print_us = per_call_us(lambda i: print(f"Email sending failed: {i}", file=devnull))
+    
+    sync_handler = logging.StreamHandler(devnull)
+    sync_handler.setFormatter(logs.JsonFormatter())
+    logger.addHandler(sync_handler)
+    sync_us = per_call_us(lambda i: logger.warning("Email sending failed", extra={"error": str(i)}))
+    logger.removeHandler(sync_handler)
+    
+    logger.propagate = True
+    queued_us = per_call_us(lambda i: logger.warning("Email sending failed", extra={"error": str(i)}))
+    
+    print(f"print() to file            {print_us:6.2f} us/call")
+    print(f"sync JSON StreamHandler    {sync_us:6.2f} us/call")
+    print(f"queue handler (app.core)   {queued_us:6.2f} us/call  on the caller")
+
+async def per_request_us(app) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/health", "query_string": b"", "headers": []}
+    
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    
+    async def send(message):
+        pass
+    
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / REQUESTS * 1e6
+
+async def bench_middleware() -> float:
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b"{}"})
+    
+    wrapped = logs.RequestContextMiddleware(endpoint)
+    bare_us = await per_request_us(endpoint)
+    sampled_us = await per_request_us(wrapped) - bare_us
+    
+    configured_rate = settings.LOG_ACCESS_SAMPLE_RATE
+    settings.LOG_ACCESS_SAMPLE_RATE = 1.0
+    full_us = await per_request_us(wrapped) - bare_us
+    settings.LOG_ACCESS_SAMPLE_RATE = configured_rate
+    
+    print(f"middleware, access log sampled at {configured_rate:.0%}  {sampled_us:6.2f} us/request")
+    print(f"middleware, access log at 100%          {full_us:6.2f} us/request")
+    return sampled_us
+
+def main(budget_us: float) -> int:
+    devnull = open(os.devnull, "w")
+    real_stdout, sys.stdout = sys.stdout, devnull
+    listener = logs.setup_logging()  # listener writes to the devnull stdout
+    sys.stdout = real_stdout
+    
+    try:
+        bench_log_calls(devnull)
+        drain(listener)
+        overhead_us = asyncio.run(bench_middleware())
+    finally:
+        listener.stop()
+    
+    print(f"dropped records (queue full): {logs.NonBlockingQueueHandler.dropped}")
+    if overhead_us > budget_us:
+        print(f"FAIL: per-request logging overhead {overhead_us:.1f} us exceeds budget {budget_us:.0f} us")
+        return 1
+    print(f"OK: per-request logging overhead within {budget_us:.0f} us budget")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Logging overhead benchmark")
+    parser.add_argument("--budget-us", type=float, default=50.0)
+    sys.exit(main(parser.parse_args().budget_us))
@@ -0,0 +1,143 @@
+"""Benchmark: related-articles engine on a large blog.
+
+Builds a synthetic one-language corpus of --articles articles (default
+50000). Each article is drawn from one of --topics topics: general words
+follow a Zipf distribution and a share of words comes from the topic's own
+vocabulary. It then measures:
+1. vectorizing (articles/s) and a full rebuild of every article's
+   neighbours, as scripts/rebuild_related_articles.py does,
+2. how often an article's closest neighbour shares its topic,
+3. the incremental path for --updates edited articles - the
+   recomputation a create/update triggers (app.core.related
+   RelatedArticles._plan), without the database round trips,
+4. the same for a hub article listed by --hub-lists others, with the peak
+   memory it allocates.
+
+Fails (exit code 1) when the p99 incremental update is above --budget-ms,
+the hub update allocates more than --hub-memory-mb, or fewer than
+--min-topic-match of nearest neighbours share the topic.
+Usage (from backend/):
+    python -m scripts.bench_related [--articles 50000] [--updates 200] [--budget-ms 500] [--hub-lists 1000]
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+from app.core.config import settings
+from app.core.related import LanguageCorpus, RelatedArticles, article_text, term_vector
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+GENERAL_WORDS = 5000
+TOPIC_WORDS = 150
+WORDS_PER_ARTICLE = 300
+TOPIC_SHARE = 0.3
+
+class Blog:
+    def __init__(self, seed: int, topics: int):
+        self.rng = random.Random(seed)
+        words = set()
+        while len(words) < GENERAL_WORDS + topics * TOPIC_WORDS:
+            words.add("".join(self.rng.choice(ALPHABET) for _ in range(self.rng.randint(3, 10))))
+        words = list(words)
+        self.general = words[:GENERAL_WORDS]
+        self.general_weights = [1 / (rank + 1) for rank in range(GENERAL_WORDS)]
+        self.topics = [
+            words[GENERAL_WORDS + topic * TOPIC_WORDS:GENERAL_WORDS + (topic + 1) * TOPIC_WORDS]
+            for topic in range(topics)
+        ]
+    
+    def article(self, topic: int) -> tuple:
+        """(title, excerpt, content)"""
+        def text(count: int) -> str:
+            topical = sum(self.rng.random() < TOPIC_SHARE for _ in range(count))
+            words = self.rng.choices(self.topics[topic], k=topical)
+            words += self.rng.choices(self.general, weights=self.general_weights, k=count - topical)
+            self.rng.shuffle(words)
+            return " ".join(words)
+        return text(6), text(30), text(WORDS_PER_ARTICLE)
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=50000)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--budget-ms", type=float, default=500)
+    parser.add_argument("--min-topic-match", type=float, default=0.9)
+    parser.add_argument("--hub-lists", type=int, default=1000, help="Lists the hub article appears in")
+    parser.add_argument("--hub-memory-mb", type=float, default=256)
+    args = parser.parse_args()
+    
+    blog = Blog(seed=11, topics=args.topics)
+    topics = [blog.rng.randrange(args.topics) for _ in range(args.articles)]
+    articles = [blog.article(topic) for topic in topics]
+    print(f"{args.articles} articles, {args.topics} topics, top {settings.RELATED_ARTICLES_TOP_K} neighbours")
+    
+    started = time.perf_counter()
+    vectors = [term_vector(article_text(*article)) for article in articles]
+    vectorized = time.perf_counter() - started
+    corpus = LanguageCorpus()
+    for article_id, vector in enumerate(vectors):
+        corpus.add(article_id, *vector)
+    corpus.matrix()
+    print(f"vectorize      {vectorized:8.1f} s  ({args.articles / vectorized:.0f} articles/s, "
+          f"{corpus.matrix().nnz / args.articles:.0f} terms/article)")
+    
+    started = time.perf_counter()
+    lists = corpus.all_neighbours()
+    rebuilt = time.perf_counter() - started
+    corpus.set_floors(lists)
+    print(f"full rebuild   {rebuilt:8.1f} s  ({rebuilt / args.articles * 1000:.2f} ms/article)")
+    
+    matched = sum(1 for article_id, neighbours in lists.items() if neighbours and topics[neighbours[0][0]] == topics[article_id])
+    topic_match = matched / len(lists)
+    print(f"nearest neighbour shares the topic: {topic_match:.3f}")
+    
+    listed_by = defaultdict(set)
+    for article_id, neighbours in lists.items():
+        for related_id, _ in neighbours:
+            listed_by[related_id].add(article_id)
+    
+    latencies, recomputed, joined = [], [], []
+    for _ in range(args.updates):
+        article_id = blog.rng.randrange(args.articles)
+        edited = blog.article(topics[article_id])
+        started = time.perf_counter()
+        corpus.add(article_id, *term_vector(article_text(*edited)))
+        updated, gains = RelatedArticles._plan(corpus, article_id, listed_by[article_id])
+        latencies.append((time.perf_counter() - started) * 1000)
+        recomputed.append(len(updated))
+        joined.append(len(gains))
+    
+    p99 = percentile(latencies, 0.99)
+    print(f"incremental    p50 {percentile(latencies, 0.5):.1f} ms  p99 {p99:.1f} ms  "
+          f"({sum(recomputed) / len(recomputed):.1f} lists recomputed, {sum(joined) / len(joined):.1f} joined per update)")
+    print(f"a full rebuild per write would cost {rebuilt * 1000 / percentile(latencies, 0.5):.0f}x the p50 update")
+    
+    # Hub - every one of its lists is recomputed on an edit
+    hub = blog.rng.randrange(args.articles)
+    hub_listed_by = set(blog.rng.sample(range(args.articles), min(args.hub_lists, args.articles)))
+    corpus.add(hub, *term_vector(article_text(*blog.article(topics[hub]))))
+    corpus.matrix()
+    tracemalloc.start()
+    started = time.perf_counter()
+    updated, _ = RelatedArticles._plan(corpus, hub, hub_listed_by)
+    hub_ms = (time.perf_counter() - started) * 1000
+    hub_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    print(f"hub article    {hub_ms:.0f} ms, peak {hub_mb:.0f} MiB  ({len(updated)} lists recomputed)")
+    
+    if p99 > args.budget_ms or topic_match < args.min_topic_match or hub_mb > args.hub_memory_mb:
+        print(f"\nFAIL: incremental p99 above {args.budget_ms:.0f} ms, hub update above {args.hub_memory_mb:.0f} MiB "
+              f"or topic match below {args.min_topic_match}")
+        sys.exit(1)
+    print("\nOK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Throughput comparison between the dev server and the production launcher.
+
+Start one server, then point this script at it:
+
+    python -m app.main               # single process (current mode)
+    python -m app.server             # pre-fork, uvloop + httptools
+    python -m scripts.bench_server --url http://127.0.0.1:8000/health
+
+Reports requests/second and latency percentiles for a fixed number of
+concurrent keep-alive connections.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+async def worker(client: httpx.AsyncClient, url: str, deadline: float, latencies: list, errors: list) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await client.get(url)
+            if response.status_code >= 500:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - started)
+
+async def run(url: str, connections: int, duration: float) -> None:
+    latencies: list = []
+    errors: list = []
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    
+    async with httpx.AsyncClient(limits=limits, timeout=10) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*[
+            worker(client, url, deadline, latencies, errors) for _ in range(connections)
+        ])
+    
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"requests:   {len(latencies)} ({len(errors)} errors)")
+    print(f"throughput: {len(latencies) / duration:.0f} req/s")
+    print(f"latency:    p50 {quantiles[49] * 1000:.1f} ms   p99 {quantiles[98] * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000/health")
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.connections, args.duration))
@@ -0,0 +1,104 @@
+"""Benchmark: intake triage throughput.
+
+1. Tickets/s and characters/s for synthetic Hebrew/Russian/English
+   summaries of 300, 3000 and 20000 characters - the per-character cost
+   should stay flat (time linear in text length).
+2. The same 3000-character summaries against the shipped term lists and
+   against those lists plus --extra-terms random terms, next to a naive
+   "every term in text" scan - the automaton's cost should not grow with
+   the dictionary while the naive scan's does.
+
+Fails (exit code 1) when 3000-character summaries are triaged slower than
+--min-tickets-per-sec. Usage (from backend/):
+    python -m scripts.bench_triage [--min-tickets-per-sec 300] [--extra-terms 20000]
+"""
+import argparse
+import random
+import sys
+import time
+
+from app.core.triage import TERMS, TicketTriage, normalize
+
+FILLER = {
+    "he": "שלום אני פונה אליכם בנוגע לבעיה שקרתה לי בשבוע שעבר ואני צריך עזרה משפטית בעניין".split(),
+    "ru": "здравствуйте я обращаюсь к вам по поводу проблемы которая случилась на прошлой неделе".split(),
+    "en": "hello I am writing to you about a problem that happened to me last week and need advice".split(),
+}
+ALPHABETS = {
+    "he": "אבגדהוזחטיכלמנסעפצקרשת",
+    "ru": "абвгдежзийклмнопрстуфхцчшщыэюя",
+    "en": "abcdefghijklmnopqrstuvwxyz",
+}
+
+def summary(rng: random.Random, length: int) -> str:
+    language = rng.choice(list(FILLER))
+    terms = [term for term, _, _ in TERMS]
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice(terms) if rng.random() < 0.02 else rng.choice(FILLER[language])
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length]
+
+def random_terms(rng: random.Random, count: int) -> list:
+    return [
+        (
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(4, 12))),
+            "general",
+            1
+        )
+        for alphabet in rng.choices(list(ALPHABETS.values()), k=count)
+    ]
+
+def per_ticket_us(fn, texts) -> float:
+    started = time.perf_counter()
+    for text in texts:
+        fn(text)
+    return (time.perf_counter() - started) / len(texts) * 1e6
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--min-tickets-per-sec", type=float, default=300)
+    parser.add_argument("--extra-terms", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    shipped = TicketTriage(TERMS)
+
+    print(f"{'length':>8}{'tickets':>9}{'us/ticket':>12}{'tickets/s':>12}{'ns/char':>10}")
+    rates = {}
+    for length, count in ((300, 3000), (3000, 1000), (20000, 150)):
+        texts = [summary(rng, length) for _ in range(count)]
+        shipped.classify(texts[0])
+        us = per_ticket_us(shipped.classify, texts)
+        rates[length] = 1e6 / us
+        print(f"{length:>8}{count:>9}{us:>12.1f}{1e6 / us:>12.0f}{us * 1000 / length:>10.1f}")
+
+    texts = [summary(rng, 3000) for _ in range(300)]
+    built = time.perf_counter()
+    large = TicketTriage(TERMS + random_terms(rng, args.extra_terms))
+    built = time.perf_counter() - built
+
+    def naive(terms):
+        def scan(text):
+            text = normalize(text)
+            return [term for term in terms if term in text]
+        return scan
+
+    shipped_terms = [normalize(term) for term, _, _ in TERMS]
+    large_terms = large.matcher.terms
+    print(f"\n3000-char summaries, dictionary size ({len(TERMS)} shipped terms vs +{args.extra_terms}):")
+    print(f"  automaton  {len(TERMS):>6} terms {per_ticket_us(shipped.classify, texts):>10.1f} us/ticket")
+    print(f"  automaton  {len(large_terms):>6} terms {per_ticket_us(large.classify, texts):>10.1f} us/ticket"
+          f"  ({large.matcher.states} states, built in {built:.2f}s)")
+    print(f"  naive scan {len(shipped_terms):>6} terms {per_ticket_us(naive(shipped_terms), texts):>10.1f} us/ticket")
+    print(f"  naive scan {len(large_terms):>6} terms {per_ticket_us(naive(large_terms), texts[:30]):>10.1f} us/ticket")
+
+    if rates[3000] < args.min_tickets_per_sec:
+        print(f"\nFAIL: {rates[3000]:.0f} tickets/s at 3000 chars, below {args.min_tickets_per_sec:.0f}")
+        sys.exit(1)
+    print(f"\nOK: {rates[3000]:.0f} tickets/s at 3000 chars")
+
+if __name__ == "__main__":
+    main()
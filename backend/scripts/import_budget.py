@@ -0,0 +1,81 @@
+"""Import-time budget check for app.main - run in CI to catch startup regressions.
+
+Imports app.main in --runs fresh interpreters with -X importtime, prints
+the slowest modules of the fastest run and exits non-zero when that run
+exceeds the budget or when a module that is meant to be deferred (see
+DEFERRED_MODULES) is imported eagerly again. Single runs vary by several
+hundred ms on a loaded CI machine; the fastest of several is stable.
+
+Usage (from backend/):
+    python -m scripts.import_budget [--budget-ms 1400] [--runs 5] [--top 15]
+"""
+import argparse
+import re
+import subprocess
+import sys
+
+# Fastest of 5 runs measured 740-950 ms on a 1-CPU runner, up to 1300 ms
+# under load spikes. The deferred-module check below catches most
+# regressions deterministically; the time budget is the backstop
+DEFAULT_BUDGET_MS = 1400
+
+# Loaded on first use or during warmup, never at import time
+DEFERRED_MODULES = ("jinja2", "passlib", "jose", "httpx", "numpy", "scipy")
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(\s*)(\S+)")
+
+def profile() -> tuple:
+    """Return ([(cumulative_us, self_us, depth, module)], deferred modules imported eagerly)"""
+    code = (
+        "import sys, app.main; "
+        f"print('\\n'.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((int(cumulative_us), int(self_us), len(indent) // 2, module))
+    eager = [name for name in result.stdout.split() if name]
+    return entries, eager
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    
+    runs = []
+    for _ in range(max(1, args.runs)):
+        entries, eager = profile()
+        total_ms = next(cumulative for cumulative, _, _, module in entries if module == "app.main") / 1000
+        runs.append((total_ms, entries, eager))
+    total_ms, entries, eager = min(runs, key=lambda run: run[0])
+    eager = sorted({name for _, _, run_eager in runs for name in run_eager})
+    
+    print("Slowest top-level imports under app.main:")
+    top_level = sorted((e for e in entries if e[2] <= 1), reverse=True)[: args.top]
+    for cumulative, _, _, module in top_level:
+        print(f"  {cumulative / 1000:8.1f} ms  {module}")
+    print(f"Total import time of app.main: {total_ms:.1f} ms, fastest of {len(runs)} "
+          f"(slowest {max(run[0] for run in runs):.1f} ms, budget {args.budget_ms:.0f} ms)")
+    
+    failed = False
+    if total_ms > args.budget_ms:
+        print("FAIL: import time budget exceeded")
+        failed = True
+    if eager:
+        print(f"FAIL: deferred modules imported eagerly: {', '.join(eager)}")
+        failed = True
+    
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Bulk import tickets from a CSV or NDJSON file (historical backlog, partner batches).
+
+Same path as POST /tickets/admin/import: rows are validated against
+TicketImportRow, COPYed into a staging table and merged without duplicates.
+No emails are sent. --dry-run only validates and reports row errors.
+
+CSV needs a header row: client_name, client_email, client_phone,
+event_summary and optionally urgency_level, status, created_at. NDJSON takes
+one object per line with the same keys.
+
+Usage (from backend/):
+    python -m scripts.import_tickets tickets.csv
+    python -m scripts.import_tickets referrals.ndjson --dry-run
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.ticket_import import MAX_REPORTED_ERRORS, format_for, import_tickets, read_batches
+
+def dry_run(path: str, fmt: str) -> None:
+    received = valid = invalid = 0
+    for records, errors, rows_read in read_batches(path, fmt, settings.TICKET_IMPORT_BATCH_SIZE):
+        received += rows_read
+        valid += len(records)
+        for error in errors:
+            if invalid < MAX_REPORTED_ERRORS:
+                print(f"line {error.line}: {error.error}")
+            invalid += 1
+    print(f"{received} rows: {valid} valid, {invalid} invalid")
+
+async def main(path: str, fmt: str) -> None:
+    async with AsyncSessionLocal() as db:
+        result = await import_tickets(db, path, fmt)
+    for error in result.errors:
+        print(f"line {error.line}: {error.error}")
+    print(
+        f"{result.received} rows: {result.inserted} inserted, "
+        f"{result.duplicates} duplicates, {result.invalid} invalid"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import tickets")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("csv", "ndjson"), help="default: from the file extension")
+    parser.add_argument("--dry-run", action="store_true", help="validate only, do not touch the database")
+    args = parser.parse_args()
+    
+    fmt = args.format or format_for(args.path)
+    started = time.perf_counter()
+    if args.dry_run:
+        dry_run(args.path, fmt)
+    else:
+        asyncio.run(main(args.path, fmt))
+    print(f"Finished in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,283 @@
+"""Overload harness: do admin and chat stay responsive during a login/ticket flood?
+
+Starts a worker process that serves stand-ins for the real routes behind
+AdmissionControlMiddleware. Each endpoint holds a connection from a
+simulated DB pool (DB_POOL_SIZE + DB_MAX_OVERFLOW) for a few milliseconds.
+Login also hashes with real bcrypt in the threadpool. Ticket submission
+sends two slow "emails" in the threadpool.
+
+A niced load-generator process floods POST /auth/login and POST /tickets/
+with --flood concurrent keep-alive clients, while a few probe clients keep
+calling GET /tickets/admin and GET /chat/messages. The run is repeated with
+admission control off and on, and each prints per-class success, 503 and
+latency percentiles.
+
+A second case checks that admin work that is slow on its own is not read
+as overload: one client keeps running a slow admin request (SLOW_ADMIN_SECONDS
+each, like a big export) while a few clients browse GET /blog/articles.
+
+Fails (exit code 1) when, with admission on, a priority class has a p99
+above --budget-ms or any of its requests failed, or when the slow admin
+request got any public request shed.
+
+Usage (from backend/):
+    python -m scripts.overload_harness [--flood 300] [--seconds 15] [--budget-ms 1000]
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from app.core.config import settings
+
+PROBES = {"admin": ("GET", "/tickets/admin"), "chat": ("GET", "/chat/messages")}
+FLOOD = {"auth": ("POST", "/auth/login"), "intake": ("POST", "/tickets/")}
+PUBLIC = {"public": ("GET", "/blog/articles")}
+SLOW_ADMIN = {"slow_admin": ("GET", "/admin/report")}
+SLOW_ADMIN_SECONDS = 2.0
+PROBE_CLIENTS = 4
+PROBE_PAUSE_SECONDS = 0.05
+SMTP_SECONDS = 0.15
+BCRYPT_ROUNDS = 10
+
+class SimulatedPool:
+    """Stand-in for the SQLAlchemy pool - checkedout() is what admission reads"""
+    
+    def __init__(self, capacity: int):
+        self._slots = asyncio.Semaphore(capacity)
+        self._checkedout = 0
+    
+    def checkedout(self) -> int:
+        return self._checkedout
+    
+    @asynccontextmanager
+    async def connection(self):
+        async with self._slots:
+            self._checkedout += 1
+            try:
+                yield
+            finally:
+                self._checkedout -= 1
+
+def build_app(admission_enabled: bool):
+    import bcrypt
+    from fastapi import FastAPI
+    from starlette.concurrency import run_in_threadpool
+    from app.core.admission import AdmissionControlMiddleware, AdmissionController
+    
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    pool = SimulatedPool(capacity)
+    app = FastAPI()
+    
+    async def query(seconds: float) -> None:
+        async with pool.connection():
+            await asyncio.sleep(seconds)
+    
+    @app.post("/auth/login")
+    async def login():
+        await query(0.005)
+        await run_in_threadpool(bcrypt.hashpw, b"password", bcrypt.gensalt(BCRYPT_ROUNDS))
+        return {"access_token": "x"}
+    
+    @app.post("/tickets/")
+    async def create_ticket():
+        await query(0.01)
+        await run_in_threadpool(time.sleep, SMTP_SECONDS)
+        await run_in_threadpool(time.sleep, SMTP_SECONDS)
+        return {"id": 1}
+    
+    @app.get("/tickets/admin")
+    async def list_tickets():
+        await query(0.02)
+        return []
+    
+    @app.get("/chat/messages")
+    async def chat_messages():
+        await query(0.005)
+        return []
+    
+    @app.get("/admin/report")
+    async def slow_report():
+        await query(SLOW_ADMIN_SECONDS)
+        return []
+    
+    @app.get("/blog/articles")
+    async def articles():
+        await query(0.005)
+        return []
+    
+    if admission_enabled:
+        app.add_middleware(
+            AdmissionControlMiddleware,
+            controller=AdmissionController(pool=pool, pool_capacity=capacity)
+        )
+    return app
+
+def serve(port: int, admission_enabled: bool) -> None:
+    import uvicorn
+    
+    logging.basicConfig(level=logging.ERROR)
+    uvicorn.run(build_app(admission_enabled), host="127.0.0.1", port=port, log_level="error", loop="uvloop")
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+class Client:
+    """Minimal HTTP/1.1 keep-alive client - cheap enough that the load
+    generator does not starve the server under test on small machines"""
+    
+    def __init__(self, port: int):
+        self.port = port
+        self.reader = self.writer = None
+    
+    async def request(self, method: str, path: str):
+        """(status, Retry-After or None); status 0 on connection errors"""
+        try:
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+            self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: harness\r\nContent-Length: 0\r\n\r\n".encode())
+            head = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+            headers = {name.lower(): value.strip() for name, _, value in (line.partition(":") for line in head[1:] if line)}
+            await self.reader.readexactly(int(headers.get("content-length", 0)))
+            return int(head[0].split()[1]), headers.get("retry-after")
+        except (OSError, asyncio.IncompleteReadError):
+            self.writer = None
+            return 0, None
+
+async def wait_until_up(port: int) -> None:
+    for _ in range(100):
+        status, _ = await Client(port).request("GET", "/chat/messages")
+        if status:
+            return
+        await asyncio.sleep(0.1)
+    raise RuntimeError("Harness server did not start")
+
+async def drive(port: int, targets: dict, clients: int, pause: float, seconds: float) -> dict:
+    """clients per target, each looping requests; class -> [(status, latency_ms)]"""
+    results = defaultdict(list)
+    deadline = time.monotonic() + seconds
+    
+    async def worker(name: str, method: str, path: str) -> None:
+        client = Client(port)
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            status, retry_after = await client.request(method, path)
+            results[name].append((status, (time.perf_counter() - started) * 1000))
+            if status == 503 and retry_after:
+                # A well-behaved client; capped so the flood keeps pressing
+                await asyncio.sleep(min(float(retry_after), 1.0))
+            elif pause:
+                await asyncio.sleep(pause)
+    
+    await asyncio.gather(*[
+        worker(name, method, path)
+        for name, (method, path) in targets.items()
+        for _ in range(clients)
+    ])
+    return dict(results)
+
+def flood_process(port: int, clients: int, seconds: float, output) -> None:
+    # The load generator yields the CPU to the server when they share cores
+    os.nice(10)
+    output.put(asyncio.run(drive(port, FLOOD, clients, 0, seconds)))
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+def report(label: str, results: dict, names=(*PROBES, *FLOOD)) -> dict:
+    print(f"\n{label}")
+    print(f"  {'class':<11}{'requests':>10}{'ok':>8}{'503':>8}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    summary = {}
+    for name in names:
+        samples = results.get(name, [])
+        ok = [latency for status, latency in samples if status == 200]
+        shed = sum(1 for status, _ in samples if status == 503)
+        errors = len(samples) - len(ok) - shed
+        p99 = percentile(ok, 0.99)
+        summary[name] = (len(samples), len(ok), p99)
+        print(f"  {name:<11}{len(samples):>10}{len(ok):>8}{shed:>8}{errors:>8}"
+              f"{percentile(ok, 0.5):>10.1f}{p99:>10.1f}")
+    return summary
+
+def start_server(admission_enabled: bool):
+    port = free_port()
+    server = multiprocessing.Process(target=serve, args=(port, admission_enabled), daemon=True)
+    server.start()
+    asyncio.run(wait_until_up(port))
+    return port, server
+
+def run(admission_enabled: bool, flood: int, seconds: float) -> dict:
+    port, server = start_server(admission_enabled)
+    try:
+        output = multiprocessing.Queue()
+        flooder = multiprocessing.Process(
+            target=flood_process,
+            args=(port, flood // len(FLOOD), seconds, output),
+            daemon=True
+        )
+        flooder.start()
+        results = asyncio.run(drive(port, PROBES, PROBE_CLIENTS, PROBE_PAUSE_SECONDS, seconds))
+        results.update(output.get())
+        flooder.join()
+    finally:
+        server.terminate()
+        server.join()
+    return report(f"admission {'on' if admission_enabled else 'off'} - {flood} flooding clients, {seconds:.0f}s", results)
+
+def run_slow_admin(seconds: float) -> dict:
+    """Admission on, one slow admin client and a few public ones, no flood"""
+    port, server = start_server(True)
+    
+    async def both():
+        slow, public = await asyncio.gather(
+            drive(port, SLOW_ADMIN, 1, 0, seconds),
+            drive(port, PUBLIC, PROBE_CLIENTS, PROBE_PAUSE_SECONDS, seconds)
+        )
+        return {**slow, **public}
+    
+    try:
+        results = asyncio.run(both())
+    finally:
+        server.terminate()
+        server.join()
+    return report(f"admission on - one slow admin request at a time, {seconds:.0f}s", results, [*SLOW_ADMIN, *PUBLIC])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--flood", type=int, default=300, help="Concurrent login/ticket clients")
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--budget-ms", type=float, default=1000, help="p99 allowed for admin and chat")
+    args = parser.parse_args()
+    
+    print(f"cpus={os.cpu_count()} pool={settings.DB_POOL_SIZE}+{settings.DB_MAX_OVERFLOW} "
+          f"bcrypt rounds={BCRYPT_ROUNDS} smtp={SMTP_SECONDS * 2:.2f}s per ticket")
+    run(False, args.flood, args.seconds)
+    summary = run(True, args.flood, args.seconds)
+    
+    slow_summary = run_slow_admin(max(args.seconds, SLOW_ADMIN_SECONDS * 3))
+    
+    failed = [
+        name for name in PROBES
+        if summary[name][1] < summary[name][0] or summary[name][2] > args.budget_ms
+    ]
+    requests, ok, _ = slow_summary["public"]
+    if ok < requests:
+        print(f"\nFAIL: {requests - ok} public requests failed or were shed next to one slow admin request")
+        sys.exit(1)
+    if failed:
+        print(f"\nFAIL: {', '.join(failed)} over the {args.budget_ms:.0f} ms p99 budget or had failed requests")
+        sys.exit(1)
+    print(f"\nOK: admin and chat p99 within {args.budget_ms:.0f} ms with admission on, "
+          "and a slow admin request shed no public traffic")
+
+if __name__ == "__main__":
+    main()
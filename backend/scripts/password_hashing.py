@@ -0,0 +1,54 @@
+"""Password hashing cost: calibrate for this host and benchmark each setting.
+
+    calibrate   pick the bcrypt cost that keeps one hash within
+                PASSWORD_HASH_TARGET_MS (or --target-ms) on this machine;
+                put the result in .env as BCRYPT_ROUNDS to pin it
+    bench       time one hash per cost and report logins per second per core
+                (bcrypt is single-threaded, so a core does 1000 / ms logins/s)
+
+Changing BCRYPT_ROUNDS is safe at any time: existing hashes keep verifying,
+and weaker ones are rehashed to the new cost on the user's next login.
+Stronger hashes are kept - lowering the cost never weakens stored hashes.
+
+Usage (from backend/):
+    python -m scripts.password_hashing calibrate [--target-ms 250]
+    python -m scripts.password_hashing bench [--rounds 10 11 12 13]
+"""
+import argparse
+import os
+
+from app.core.config import settings
+from app.core.security import calibrate_bcrypt_rounds, time_bcrypt
+
+def calibrate(target_ms: int) -> None:
+    rounds = calibrate_bcrypt_rounds(target_ms)
+    print(f"BCRYPT_ROUNDS={rounds}  ({time_bcrypt(rounds) * 1000:.0f} ms per hash, target {target_ms} ms)")
+
+def bench(rounds_list) -> None:
+    cores = os.cpu_count() or 1
+    print(f"{'rounds':>6}  {'ms/hash':>9}  {'logins/s/core':>13}  {'logins/s (' + str(cores) + ' cores)':>20}")
+    for rounds in rounds_list:
+        seconds = time_bcrypt(rounds, samples=5)
+        per_core = 1 / seconds
+        print(f"{rounds:>6}  {seconds * 1000:>9.1f}  {per_core:>13.1f}  {per_core * cores:>20.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Password hashing cost tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    calibrate_parser = commands.add_parser("calibrate")
+    calibrate_parser.add_argument("--target-ms", type=int, default=settings.PASSWORD_HASH_TARGET_MS)
+    
+    bench_parser = commands.add_parser("bench")
+    bench_parser.add_argument(
+        "--rounds",
+        type=int,
+        nargs="+",
+        default=list(range(settings.BCRYPT_MIN_ROUNDS, settings.BCRYPT_MIN_ROUNDS + 4))
+    )
+    
+    args = parser.parse_args()
+    if args.command == "calibrate":
+        calibrate(args.target_ms)
+    else:
+        bench(args.rounds)
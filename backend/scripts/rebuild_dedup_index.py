@@ -0,0 +1,30 @@
+"""Rebuild the near-duplicate ticket index snapshot (DEDUP_INDEX_PATH) from the database.
+
+Workers load the snapshot on start and catch up from the database, so this
+is only needed after changing the MinHash parameters, after a bulk import,
+or to save workers the catch-up after a long outage. Running workers pick
+the new snapshot up on their next restart.
+
+Usage (from backend/):
+    python -m scripts.rebuild_dedup_index
+"""
+import asyncio
+import time
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.dedup import DuplicateIndex
+
+async def main() -> None:
+    index = DuplicateIndex()
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        await index.sync_from_db(db)
+    index.save()
+    print(
+        f"Indexed {len(index)} tickets from the last {settings.TICKET_DEDUP_WINDOW_DAYS} days "
+        f"into {settings.DEDUP_INDEX_PATH} in {time.perf_counter() - started:.1f}s"
+    )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,19 @@
+"""Rebuild sitemap.xml and the RSS/Atom feeds from the database.
+
+Normally not needed - feeds are updated on every article change and built
+on first start. Use after restoring a backup or editing articles in SQL.
+
+Usage (from backend/):
+    python -m scripts.rebuild_feeds
+"""
+import asyncio
+from app.core.database import AsyncSessionLocal
+from app.core.feeds import rebuild_feeds
+
+async def main():
+    async with AsyncSessionLocal() as db:
+        count = await rebuild_feeds(db)
+    print(f"Rebuilt sitemap and feeds for {count} published articles")
+
+if __name__ == "__main__":
+    asyncio.run(main())
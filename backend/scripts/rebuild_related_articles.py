@@ -0,0 +1,40 @@
+"""Recompute every article's related-articles list (article_related) from scratch.
+
+Article writes keep the lists current incrementally, but the scores of
+lists they do not touch drift as document frequencies change. Run this
+after deploying the table, after bulk article changes, or periodically
+(e.g. nightly) to reset the drift. Workers reload their corpora on restart.
+
+Usage (from backend/):
+    python -m scripts.rebuild_related_articles [--language he]
+"""
+import argparse
+import asyncio
+import time
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.core.related import RelatedArticles
+from app.models import Article
+
+async def main(only_language: Optional[str]) -> None:
+    engine = RelatedArticles()
+    async with AsyncSessionLocal() as db:
+        if only_language:
+            languages = [only_language]
+        else:
+            result = await db.execute(select(Article.language).where(Article.is_published == True).distinct())
+            languages = sorted(result.scalars().all())
+        
+        for language in languages:
+            started = time.perf_counter()
+            count = await engine.rebuild(db, language)
+            print(f"{language}: {count} articles in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--language", help="Only this language (default: every language with published articles)")
+    args = parser.parse_args()
+    asyncio.run(main(args.language))
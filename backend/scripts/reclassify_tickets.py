@@ -0,0 +1,44 @@
+"""Re-run intake triage (suggested urgency and category) over stored tickets.
+
+Fills tickets created before triage existed and refreshes everything after
+the term lists in app/core/triage.py change. Rows whose suggestion did not
+change are not written.
+
+Usage (from backend/):
+    python -m scripts.reclassify_tickets
+    python -m scripts.reclassify_tickets --only-missing --include-archived
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.database import AsyncSessionLocal
+from app.core.events import publish
+from app.core.triage import reclassify_tickets
+from app.models import ArchivedTicket, Ticket
+
+async def main(batch_size: int, only_missing: bool, include_archived: bool) -> None:
+    tables = [Ticket.__tablename__]
+    if include_archived:
+        tables.append(ArchivedTicket.__tablename__)
+    
+    async with AsyncSessionLocal() as db:
+        for table in tables:
+            started = time.perf_counter()
+            scanned, changed = await reclassify_tickets(db, table, batch_size, only_missing)
+            elapsed = time.perf_counter() - started
+            rate = scanned / elapsed if elapsed else 0
+            print(f"{table}: {scanned} scanned, {changed} changed in {elapsed:.1f}s ({rate:.0f} tickets/s)")
+            
+            if table == Ticket.__tablename__ and changed:
+                # Open admin dashboards refetch their ticket list
+                await publish(db, "tickets.bulk_changed", {"affected": changed})
+                await db.commit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--only-missing", action="store_true", help="Only tickets never triaged")
+    parser.add_argument("--include-archived", action="store_true", help="Also the tickets_archive partitions")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.only_missing, args.include_archived))
@@ -0,0 +1,16 @@
+"""Move closed tickets and old chat messages into the archive partitions.
+
+Usage (from backend/, e.g. nightly via cron):
+    python -m scripts.run_retention
+"""
+import asyncio
+from app.core.database import AsyncSessionLocal
+from app.core.retention import run_retention
+
+async def main():
+    async with AsyncSessionLocal() as db:
+        moved = await run_retention(db)
+    print(f"Archived {moved['tickets']} tickets and {moved['chat_messages']} chat messages")
+
+if __name__ == "__main__":
+    asyncio.run(main())
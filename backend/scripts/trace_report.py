@@ -0,0 +1,78 @@
+"""Summarize exported request traces (TRACE_FILE JSON lines) offline.
+
+Prints the slowest traces with their span tree, and per span name the
+count and total/p95 time - enough to see whether a slow request waited on
+SQL, SMTP, Turnstile, bcrypt or Redis.
+
+Usage (from backend/):
+    python -m scripts.trace_report
+    python -m scripts.trace_report var/traces/traces.jsonl.1 --top 20 --route "/api/tickets/"
+"""
+import argparse
+from collections import defaultdict
+
+import orjson
+
+from app.core.config import settings
+
+def load(path: str, route: str):
+    with open(path, "rb") as source:
+        for line in source:
+            if not line.strip():
+                continue
+            trace = orjson.loads(line)
+            if route and route not in trace["name"]:
+                continue
+            yield trace
+
+def print_tree(trace: dict) -> None:
+    children = defaultdict(list)
+    for item in trace["spans"][1:]:
+        children[item["parent_id"]].append(item)
+    
+    def walk(item: dict, depth: int) -> None:
+        label = item["name"]
+        statement = item["attributes"].get("statement")
+        if statement:
+            label += f"  {statement[:80]}"
+        error = f"  !! {item['error']}" if item.get("error") else ""
+        print(f"    {'  ' * depth}{item['duration_ms']:9.2f} ms  {label}{error}")
+        for child in sorted(children[item["span_id"]], key=lambda span: span["start"]):
+            walk(child, depth + 1)
+    
+    walk(trace["spans"][0], 0)
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", nargs="?", default=settings.TRACE_FILE)
+    parser.add_argument("--top", type=int, default=10, help="Slowest traces to print")
+    parser.add_argument("--route", default="", help="Only traces whose name contains this")
+    args = parser.parse_args()
+    
+    traces = list(load(args.path, args.route))
+    if not traces:
+        print("No traces")
+        return
+    
+    by_name = defaultdict(list)
+    for trace in traces:
+        for item in trace["spans"][1:]:
+            by_name[item["name"]].append(item["duration_ms"])
+    
+    print(f"{len(traces)} traces\n")
+    print(f"{'span':<24}{'count':>8}{'total ms':>12}{'p95 ms':>10}")
+    for name, durations in sorted(by_name.items(), key=lambda entry: -sum(entry[1])):
+        print(f"{name:<24}{len(durations):>8}{sum(durations):>12.1f}{percentile(durations, 0.95):>10.2f}")
+    
+    print(f"\nSlowest {args.top}:")
+    for trace in sorted(traces, key=lambda trace: -trace["duration_ms"])[:args.top]:
+        print(f"\n  {trace['name']}  {trace['duration_ms']:.1f} ms  status={trace['status']}  "
+              f"({trace['sampled_by']}, trace {trace['trace_id']}, request {trace['request_id']})")
+        print_tree(trace)
+
+if __name__ == "__main__":
+    main()
@@ -41,9 +41,10 @@ export const AuthProvider = ({ children }) => {
   const login = async (credentials) => {
     try {
       const response = await authAPI.login(credentials)
-      const { access_token } = response.data
+      const { access_token, refresh_token } = response.data
       
       localStorage.setItem('token', access_token)
+      localStorage.setItem('refresh_token', refresh_token)
       
       // Get user info
       const userResponse = await authAPI.getMe()
@@ -74,7 +75,12 @@ export const AuthProvider = ({ children }) => {
   }
 
   const logout = () => {
+    const refreshToken = localStorage.getItem('refresh_token')
+    if (refreshToken) {
+      authAPI.logout(refreshToken).catch(() => {})
+    }
     localStorage.removeItem('token')
+    localStorage.removeItem('refresh_token')
     localStorage.removeItem('user')
     setUser(null)
   }
@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react'
 import { useTranslation } from 'react-i18next'
 import { useAuth } from '../../hooks/useAuth'
-import { ticketsAPI, chatAPI } from '../../services/api'
+import { ticketsAPI, chatAPI, adminAPI, authAPI } from '../../services/api'
 
 const AdminDashboard = () => {
   const { t } = useTranslation()
@@ -27,12 +27,13 @@ const AdminDashboard = () => {
         const chatUsersResponse = await chatAPI.getUsers()
         setChatUsers(chatUsersResponse.data)
         
-        // Calculate stats
-        const newTicketsCount = ticketsResponse.data.filter(t => t.status === 'New').length
+        // Fetch server-side aggregated stats
+        const dashboardResponse = await adminAPI.getDashboard()
+        const dashboard = dashboardResponse.data
         setStats({
-          newTickets: newTicketsCount,
-          activeChats: chatUsersResponse.data.length,
-          totalClients: chatUsersResponse.data.length
+          newTickets: dashboard.tickets_by_status.New || 0,
+          activeChats: dashboard.unread_conversations,
+          totalClients: dashboard.total_clients
         })
         
       } catch (error) {
@@ -45,6 +46,64 @@ const AdminDashboard = () => {
     fetchData()
   }, [])
 
+  // Live ticket feed - replaces reloading the list to see new tickets
+  useEffect(() => {
+    let source = null
+    let reconnectTimer = null
+    let stopped = false
+
+    const reloadTickets = async () => {
+      try {
+        const ticketsResponse = await ticketsAPI.getAll({ limit: 10 })
+        setTickets(ticketsResponse.data)
+      } catch (error) {
+        console.error('Failed to fetch tickets:', error)
+      }
+    }
+
+    const upsertTicket = (event) => {
+      const ticket = JSON.parse(event.data)
+      setTickets(prev => {
+        const exists = prev.some(item => item.id === ticket.id)
+        return exists
+          ? prev.map(item => item.id === ticket.id ? { ...item, ...ticket } : item)
+          : [ticket, ...prev].slice(0, 10)
+      })
+    }
+
+    const connect = () => {
+      source = ticketsAPI.openEvents()
+      // Every (re)connect may follow missed events - resync the list
+      source.onopen = reloadTickets
+      source.addEventListener('ticket.created', (event) => {
+        upsertTicket(event)
+        setStats(prev => ({ ...prev, newTickets: prev.newTickets + 1 }))
+      })
+      source.addEventListener('ticket.updated', upsertTicket)
+      source.addEventListener('ticket.deleted', (event) => {
+        const { id } = JSON.parse(event.data)
+        setTickets(prev => prev.filter(ticket => ticket.id !== id))
+      })
+      source.addEventListener('tickets.bulk_changed', reloadTickets)
+      source.onerror = () => {
+        // Closed for good (e.g. expired token): refresh the token, then reopen
+        if (source.readyState === EventSource.CLOSED && !stopped) {
+          reconnectTimer = setTimeout(async () => {
+            await authAPI.getMe().catch(() => {})
+            if (!stopped) connect()
+          }, 5000)
+        }
+      }
+    }
+
+    connect()
+    return () => {
+      stopped = true
+      clearTimeout(reconnectTimer)
+      if (source) source.close()
+    }
+  }, [])
+
   const updateTicketStatus = async (ticketId, newStatus) => {
     try {
       await ticketsAPI.update(ticketId, { status: newStatus })
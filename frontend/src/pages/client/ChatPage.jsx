@@ -22,23 +22,55 @@ const ChatPage = () => {
   }, [messages])
 
   useEffect(() => {
-    const fetchMessages = async () => {
+    let cancelled = false
+    let cursor = 0
+    let etag = null
+
+    // New messages and status changes replace entries by id
+    const mergeMessages = (incoming) => {
+      setMessages(prev => {
+        const byId = new Map(prev.map(message => [message.id, message]))
+        incoming.forEach(message => byId.set(message.id, message))
+        return Array.from(byId.values()).sort(
+          (a, b) => new Date(a.created_at) - new Date(b.created_at) || a.id - b.id
+        )
+      })
+    }
+
+    const syncMessages = async () => {
       try {
         const response = await chatAPI.getMessages({ limit: 100 })
         setMessages(response.data)
+        cursor = response.headers['x-chat-cursor'] || 0
+        etag = response.headers['etag'] || null
       } catch (error) {
         console.error('Failed to fetch messages:', error)
       } finally {
         setLoading(false)
       }
+
+      // Long-poll for changes after the cursor; an idle conversation costs one empty 304 per cycle
+      while (!cancelled) {
+        try {
+          const response = await chatAPI.syncMessages(cursor, etag)
+          if (cancelled) break
+          if (response.status === 200) {
+            mergeMessages(response.data)
+          }
+          cursor = response.headers['x-chat-cursor'] || cursor
+          etag = response.headers['etag'] || etag
+        } catch (error) {
+          console.error('Failed to sync messages:', error)
+          await new Promise(resolve => setTimeout(resolve, 5000))
+        }
+      }
     }
 
-    fetchMessages()
-    
-    // Poll for new messages every 5 seconds
-    const interval = setInterval(fetchMessages, 5000)
-    
-    return () => clearInterval(interval)
+    syncMessages()
+
+    return () => {
+      cancelled = true
+    }
   }, [])
 
   const sendMessage = async (e) => {
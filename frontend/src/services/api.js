@@ -24,14 +24,40 @@ api.interceptors.request.use(
   }
 )
 
+// Single in-flight refresh shared by concurrent 401s
+let refreshPromise = null
+
+const refreshAccessToken = async () => {
+  const refreshToken = localStorage.getItem('refresh_token')
+  if (!refreshToken) {
+    throw new Error('No refresh token')
+  }
+  const response = await axios.post(`${API_URL}/auth/refresh`, { refresh_token: refreshToken })
+  localStorage.setItem('token', response.data.access_token)
+  localStorage.setItem('refresh_token', response.data.refresh_token)
+  return response.data.access_token
+}
+
 // Response interceptor to handle auth errors
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
-    if (error.response?.status === 401) {
-      localStorage.removeItem('token')
-      localStorage.removeItem('user')
-      window.location.href = '/login'
+  async (error) => {
+    const originalRequest = error.config
+    if (error.response?.status === 401 && originalRequest && !originalRequest._retry) {
+      originalRequest._retry = true
+      try {
+        refreshPromise = refreshPromise || refreshAccessToken()
+        const token = await refreshPromise
+        originalRequest.headers.Authorization = `Bearer ${token}`
+        return api(originalRequest)
+      } catch (refreshError) {
+        localStorage.removeItem('token')
+        localStorage.removeItem('refresh_token')
+        localStorage.removeItem('user')
+        window.location.href = '/login'
+      } finally {
+        refreshPromise = null
+      }
     }
     return Promise.reject(error)
   }
@@ -41,6 +67,8 @@ api.interceptors.response.use(
 export const authAPI = {
   register: (userData) => api.post('/auth/register', userData),
   login: (credentials) => api.post('/auth/login', credentials),
+  logout: (refreshToken) => api.post('/auth/logout', { refresh_token: refreshToken }),
+  logoutAll: () => api.post('/auth/logout-all'),
   getMe: () => api.get('/auth/me'),
   createAdmin: (adminData) => api.post('/auth/create-admin', adminData),
 }
@@ -52,16 +80,55 @@ export const ticketsAPI = {
   getById: (id) => api.get(`/tickets/admin/${id}`),
   update: (id, data) => api.put(`/tickets/admin/${id}`, data),
   delete: (id) => api.delete(`/tickets/admin/${id}`),
+  bulkSetStatus: (data) => api.post('/tickets/admin/bulk/status', data),
+  bulkSetUrgency: (data) => api.post('/tickets/admin/bulk/urgency', data),
+  bulkDelete: (data) => api.post('/tickets/admin/bulk/delete', data),
+  // CSV or NDJSON file sent as the raw request body
+  importFile: (file) => api.post('/tickets/admin/import', file, {
+    headers: { 'Content-Type': /\.(ndjson|jsonl)$/i.test(file.name) ? 'application/x-ndjson' : 'text/csv' },
+  }),
+  // Live feed (Server-Sent Events) - EventSource cannot send headers, so the token goes in the URL
+  openEvents: () => new EventSource(
+    `${API_URL}/tickets/admin/events?token=${encodeURIComponent(localStorage.getItem('token') || '')}`
+  ),
 }
 
 // Chat API
 export const chatAPI = {
   sendMessage: (message) => api.post('/chat/messages', message),
   getMessages: (params = {}) => api.get('/chat/messages', { params }),
+  // Delta sync: long-polls for changes after `since`; 304 when nothing changed
+  syncMessages: (since, etag, wait = 25) => api.get('/chat/messages', {
+    params: { since, wait },
+    headers: etag ? { 'If-None-Match': etag } : {},
+    validateStatus: (status) => status === 200 || status === 304,
+    timeout: (wait + 10) * 1000,
+  }),
   markAsRead: (messageId) => api.put(`/chat/messages/${messageId}/read`),
   getUsers: () => api.get('/chat/users'),
 }
 
+// Attachments API - files go up as multipart "file" parts
+const uploadFiles = (url, files) => {
+  const form = new FormData()
+  Array.from(files).forEach((file) => form.append('file', file))
+  return api.post(url, form, { headers: { 'Content-Type': 'multipart/form-data' } })
+}
+
+export const attachmentsAPI = {
+  uploadToTicket: (ticketId, files) => uploadFiles(`/attachments/tickets/${ticketId}`, files),
+  getForTicket: (ticketId) => api.get(`/attachments/tickets/${ticketId}`),
+  uploadToMessage: (messageId, files) => uploadFiles(`/attachments/messages/${messageId}`, files),
+  getForMessage: (messageId) => api.get(`/attachments/messages/${messageId}`),
+  download: (id) => api.get(`/attachments/${id}`, { responseType: 'blob' }),
+  delete: (id) => api.delete(`/attachments/${id}`),
+}
+
+// Admin API
+export const adminAPI = {
+  getDashboard: () => api.get('/admin/dashboard'),
+}
+
 // Blog API
 export const blogAPI = {
   getArticles: (params = {}) => api.get('/blog/articles', { params }),